@@ -0,0 +1,80 @@
+"""
+broadcast 직렬화 비교 벤치마크 (클라이언트 N명에게 같은 payload 전송 시 CPU 시간)
+
+기존 경로: Consumer 마다 encode_json → json.dumps(ensure_ascii=False) 를 클라이언트 수만큼
+신규 경로: 생산자가 payload_json.dumps 1번 → 모든 Consumer 가 같은 텍스트 전송
+Consumer 전송은 outbox → send 를 흉내내는 코루틴으로 대체 (소켓 I/O 제외)
+
+python -m benchmarks.broadcast_encode
+python -m benchmarks.broadcast_encode --clients 1000 --rounds 200
+"""
+import argparse, asyncio, json, random, time
+
+from data.services.payload_json import dumps, orjson
+
+INDEX_NAMES = ["코스피", "코스닥", "코스피200", "다우존스", "나스닥", "S&P500", "니케이225", "항셍", "상해종합", "유로스톡스50"]
+
+
+def sample_payloads(rounds: int) -> list:
+    payloads = []
+    for _ in range(rounds):
+        payloads.append({"indices": [
+            {
+                "code": f"{i:04d}",
+                "name": name,
+                "yesterday": round(random.uniform(500, 40000), 2),
+                "today": round(random.uniform(500, 40000), 2),
+                "change_rate": round(random.uniform(-3, 3), 2),
+                "time": "093001",
+            }
+            for i, name in enumerate(INDEX_NAMES)
+        ]})
+    return payloads
+
+
+async def _send(text):
+    return len(text)
+
+
+async def _legacy(payloads, clients):
+    for payload in payloads:
+        for _ in range(clients):
+            await _send(json.dumps(payload, ensure_ascii=False))
+
+
+async def _shared(payloads, clients):
+    for payload in payloads:
+        text = dumps(payload)
+        for _ in range(clients):
+            await _send(text)
+
+
+def _measure(label, run, payloads, clients):
+    start = time.process_time()
+    asyncio.run(run(payloads, clients))
+    cpu = time.process_time() - start
+    per_msg_us = cpu / (len(payloads) * clients) * 1e6
+    print(f"{label:<24} cpu {cpu:>7.3f}s  {per_msg_us:>7.2f} us/client-msg")
+    return cpu
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=100)
+    args = parser.parse_args()
+
+    random.seed(7)
+    payloads = sample_payloads(args.rounds)
+    # 두 경로의 전송 텍스트가 같은 JSON 인지 먼저 확인
+    assert all(json.loads(dumps(p)) == json.loads(json.dumps(p, ensure_ascii=False)) for p in payloads)
+
+    print(f"clients {args.clients}  rounds {args.rounds}  payload {len(dumps(payloads[0])):,} bytes  "
+          f"encoder {'orjson' if orjson else 'json'}")
+    legacy = _measure("per-client json.dumps", _legacy, payloads, args.clients)
+    shared = _measure("shared text", _shared, payloads, args.clients)
+    print(f"→ CPU {legacy / shared:.1f}x 절감")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+멀티 프로세스 디코딩 처리량 벤치마크 (frames/sec vs 디코딩 프로세스 수)
+
+python -m benchmarks.decode_scaling                       # 0(수신 루프 직접), 1, 2, 4 프로세스
+python -m benchmarks.decode_scaling --workers 1 2 4 8 --frames 200000
+
+각 프로세스는 실제 워커와 같이 decode_frame → conflation → JSON 직렬화까지 수행한다 (Redis 기록 제외).
+"""
+import argparse, asyncio, json, random, time
+
+from benchmarks.frame_decode import _price_record, _index_record
+from kis.websocket.parser.frame_decoder import register_prefix
+from kis.websocket.util.conflation import ConflationBuffer
+from kis.websocket.util.decode_pool import DecodePool
+from kis.websocket.util.decode_worker import decode_frame, apply_control
+
+SUBMIT_CHUNK = 200  # 수신 루프 1회차에 들어오는 프레임 수 (이후 call_soon flush)
+
+
+def _codes(symbols: int) -> list:
+    return [f"{i:06d}" for i in range(1, symbols + 1)]
+
+
+def synthetic_frames(n: int, symbols: int) -> list:
+    codes = _codes(symbols)
+    frames = []
+    for i in range(n):
+        if i % 50 == 0:
+            frames.append("0|H0UPCNT0|001|" + "^".join(_index_record("0001")))
+            continue
+        count = random.randint(1, 4)
+        symbol = random.choice(codes)
+        body = "^".join("^".join(_price_record(symbol)) for _ in range(count))
+        frames.append(f"0|H0STCNT0|{count:03d}|{body}")
+    return frames
+
+
+def registrations(symbols: int) -> list:
+    # 구독 등록 (tr_id, 종목, prefix) - ws 클라이언트가 구독 시 등록하는 것과 동일
+    return [("H0STCNT0", code, "price") for code in _codes(symbols)] + [("H0UPCNT0", "0001", "index")]
+
+
+def _process(batch, sink, books) -> int:
+    records = 0
+    for raw in batch:
+        records += decode_frame(raw, sink, books, lambda parsed: None)
+    for parsed in sink.drain().values():
+        json.dumps(parsed)
+    return records
+
+
+def _bench_worker(worker_id, frames, results, redis_url):
+    sink, books = ConflationBuffer(), {}
+    done = records = 0
+    results.put(("ready", worker_id, None))
+    while True:
+        batch = frames.get()
+        if batch is None:
+            break
+        if isinstance(batch, tuple):
+            apply_control(batch, books)
+            continue
+        records += _process(batch, sink, books)
+        done += len(batch)
+    results.put(("done", worker_id, {"frames": done, "records": records}))
+
+
+def run_inline(frames: list, symbols: int) -> float:
+    for registration in registrations(symbols):
+        register_prefix(*registration)
+    sink, books = ConflationBuffer(), {}
+    start = time.perf_counter()
+    for i in range(0, len(frames), SUBMIT_CHUNK):
+        _process(frames[i:i + SUBMIT_CHUNK], sink, books)
+    return time.perf_counter() - start
+
+
+async def run_pool(frames: list, workers: int, symbols: int) -> float:
+    pool = DecodePool(workers, target=_bench_worker)
+    pool.start()
+    for _ in range(workers):
+        pool._results.get()  # ready
+    for registration in registrations(symbols):
+        pool.register(*registration)
+
+    start = time.perf_counter()
+    for i in range(0, len(frames), SUBMIT_CHUNK):
+        for raw in frames[i:i + SUBMIT_CHUNK]:
+            pool.submit(raw)
+        await asyncio.sleep(0)
+    pool.flush()
+    for q in pool._frames:
+        q.put(None)
+    for _ in range(workers):
+        pool._results.get()  # done
+    elapsed = time.perf_counter() - start
+
+    for proc in pool._procs:
+        proc.join()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=100000)
+    parser.add_argument("--symbols", type=int, default=300)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4])
+    args = parser.parse_args()
+
+    random.seed(7)
+    frames = synthetic_frames(args.frames, args.symbols)
+    print(f"frames={len(frames)} symbols={args.symbols}")
+
+    base = None
+    for workers in args.workers:
+        elapsed = (run_inline(frames, args.symbols) if workers == 0
+                   else asyncio.run(run_pool(frames, workers, args.symbols)))
+        rate = len(frames) / elapsed
+        base = base or rate
+        label = "inline (수신 루프)" if workers == 0 else f"{workers} process"
+        print(f"{label:<20} {rate:>12,.0f} frames/sec  x{rate / base:.2f}  ({elapsed * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
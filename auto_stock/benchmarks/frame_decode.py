@@ -0,0 +1,107 @@
+"""
+KIS 실시간 프레임 디코딩 벤치마크 (records/sec)
+
+python -m benchmarks.frame_decode                    # 합성 혼잡 구간 프레임
+python -m benchmarks.frame_decode --file frames.txt  # 수집한 원본 프레임 (한 줄에 1 프레임)
+"""
+import argparse, random, time
+
+from kis.constants.const_realtime import REALTIME_FIELD_COUNT
+from kis.websocket.parser.frame_decoder import iter_records, PREFIX_DECODERS
+from kis.websocket.parser.price_parser import parse_price
+from kis.websocket.parser.index_parser import parse_index
+
+SYMBOLS = ["005930", "000660", "035420", "207940", "051910", "068270", "035720", "006400"]
+
+
+def _price_record(symbol: str) -> list:
+    fields = [str(random.randint(1, 9)) for _ in range(REALTIME_FIELD_COUNT["H0STCNT0"])]
+    fields[0] = symbol
+    fields[1] = "093001"
+    fields[4] = str(random.randint(-500, 500))
+    fields[10] = str(random.randint(1, 10 ** 9))
+    fields[11] = str(random.randint(50000, 80000))
+    return fields
+
+
+def _index_record(code: str) -> list:
+    fields = ["0"] * REALTIME_FIELD_COUNT["H0UPCNT0"]
+    fields[0] = code
+    fields[1] = "093001"
+    fields[2] = f"{random.uniform(2400, 2700):.2f}"
+    return fields
+
+
+def synthetic_frames(n: int) -> list:
+    # 장 초반 혼잡 구간: 한 프레임에 1~8 건의 체결가 레코드 + 간헐적 지수 프레임
+    frames = []
+    for i in range(n):
+        if i % 20 == 0:
+            frames.append("0|H0UPCNT0|001|" + "^".join(_index_record("0001")))
+            continue
+        count = random.randint(1, 8)
+        symbol = random.choice(SYMBOLS)
+        body = "^".join("^".join(_price_record(symbol)) for _ in range(count))
+        frames.append(f"0|H0STCNT0|{count:03d}|{body}")
+    return frames
+
+
+def load_frames(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [line.rstrip("\n") for line in f if "|" in line]
+
+
+DECODERS = {"H0STCNT0": PREFIX_DECODERS["price"], "H0UPCNT0": PREFIX_DECODERS["index"]}
+LEGACY_PARSERS = {"H0STCNT0": parse_price, "H0UPCNT0": parse_index}
+
+
+def run_multi_record(frames: list) -> int:
+    records = 0
+    for raw in frames:
+        for tr_id, fields, base in iter_records(raw):
+            decoder = DECODERS.get(tr_id)
+            if decoder and decoder(tr_id, fields, base):
+                records += 1
+    return records
+
+
+def run_first_record_only(frames: list) -> int:
+    records = 0
+    for raw in frames:
+        parser = LEGACY_PARSERS.get(raw.split("|", 2)[1])
+        if parser and parser(raw):
+            records += 1
+    return records
+
+
+def _measure(label: str, fn, frames: list, repeat: int):
+    best = None
+    records = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        records = fn(frames)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{label:<22} records={records:>8}  {records / best:>12,.0f} records/sec  ({best * 1000:.1f} ms)")
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--file", help="원본 프레임 파일 (한 줄에 1 프레임)")
+    parser.add_argument("--frames", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    random.seed(7)
+    frames = load_frames(args.file) if args.file else synthetic_frames(args.frames)
+    total = sum(int(raw.split("|", 3)[2] or 1) for raw in frames)
+    print(f"frames={len(frames)} records(in frames)={total}")
+
+    _measure("multi-record decoder", run_multi_record, frames, args.repeat)
+    kept = _measure("first-record only", run_first_record_only, frames, args.repeat)
+    print(f"first-record only 방식 유실 레코드: {total - kept}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+프레임 처리 경로 마이크로 벤치마크 (4개 파서: price / quote / index / exec)
+
+기존 경로: 모든 프레임 json.loads 시도 → raw.split("|") → body split(tr_key) → parse_* 내부 재 split
+신규 경로: 첫 글자 검사 → iter_records (split 1회) → 구독 prefix 디코더(PREFIX_DECODERS)에 필드/base 전달
+할당량은 split 으로 생성되는 객체 수(list + 필드 문자열)로 비교 (json.loads 실패 예외 객체 제외)
+측정 결과 (20000 프레임): price / quote / exec 약 2.8~2.9x, index 2.0x 감소 - 목표(3x) 미달
+  신규 경로는 레코드 경계 계산을 위해 body 를 1번은 전부 split 해야 하므로,
+  필드 수가 적은 index 는 기존 경로(body split 2회) 대비 절반 이하로 줄일 수 없다
+
+python -m benchmarks.frame_dispatch
+"""
+import argparse, json, time
+
+from kis.constants.const_realtime import REALTIME_FIELD_COUNT
+from kis.websocket.parser.frame_decoder import iter_records, is_pipe_frame, register_prefix, get_prefix, PREFIX_DECODERS
+
+# tr_id: (구독 prefix, tr_key, 값을 채울 필드)
+SAMPLES = {
+    "H0STCNT0": ("price", "005930", {1: "093001", 4: "-100", 10: "123456789", 11: "71900"}),
+    "H0STASP0": ("quote", "005930", {1: "093001", 2: "71900"}),
+    "H0UPCNT0": ("index", "0001", {1: "093001", 2: "2612.34"}),
+    "H0STCNI0": ("exec", "HTSID01", {2: "093001", 5: "0000123456", 10: "1", 11: "71900", 12: "10"}),
+}
+
+
+def _frame(tr_id: str) -> str:
+    _, key, values = SAMPLES[tr_id]
+    fields = ["0"] * REALTIME_FIELD_COUNT[tr_id]
+    fields[0] = key
+    for idx, value in values.items():
+        fields[idx] = value
+    return f"0|{tr_id}|001|" + "^".join(fields)
+
+
+# ------------------ 기존 경로 (변경 전 kis_ws_client / parser 동작 재현) ------------------
+def _legacy_price(raw):
+    parts = raw.split("|")
+    tr_id = parts[1]
+    tr_key = parts[3].split("^")[0]
+    fields = parts[3].split("^")
+    current_price = float(fields[11])
+    change = int(fields[4])
+    previous_price = current_price - change
+    return {
+        "tr_id": tr_id, "symbol": tr_key, "timestamp": fields[1], "current_price": current_price,
+        "change_rate": round((change / previous_price) * 100, 2) if previous_price != 0 else 0.0,
+        "trade_value": int(fields[10]),
+    }
+
+
+def _legacy_quote(raw):
+    parts = raw.split("|")
+    tr_id = parts[1]
+    tr_key = parts[3].split("^")[0]
+    fields = parts[3].split("^")
+    return {"tr_id": tr_id, "symbol": tr_key, "time": fields[1], "quote": int(fields[2])}
+
+
+def _legacy_index(raw):
+    _, _, _, body = raw.split("|", 3)
+    fields = body.split("^")
+    time_str = fields[1]
+    return {"code": fields[0], "name": fields[0], "price": float(fields[2]),
+            "timestamp": f"{time_str[:2]}:{time_str[2:4]}:{time_str[4:6]}"}
+
+
+def _legacy_exec(raw):
+    parts = raw.split("|")
+    body = parts[3].split("^")
+    return {"tr_key": parts[3].split("^")[0], "exec_type": body[10], "order_no": body[5],
+            "price": body[11], "qty": body[12], "ts": body[2]}
+
+
+LEGACY = {"H0STCNT0": _legacy_price, "H0STASP0": _legacy_quote, "H0UPCNT0": _legacy_index, "H0STCNI0": _legacy_exec}
+
+
+def legacy_path(raw):
+    try:
+        json.loads(raw)
+    except json.JSONDecodeError:
+        pass
+    parts = raw.split("|")
+    tr_id = parts[1]
+    parts[3].split("^")[0]
+    return LEGACY[tr_id](raw)
+
+
+# ------------------ 신규 경로 (decode_worker.decode_frame 과 같은 조회) ------------------
+def dispatch_path(raw):
+    if not is_pipe_frame(raw):
+        return None
+    for tr_id, fields, base in iter_records(raw):
+        return PREFIX_DECODERS[get_prefix(tr_id, fields[base])](tr_id, fields, base)
+
+
+def _time_per_frame(fn, frames, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for raw in frames:
+            fn(raw)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(frames) * 1e9
+
+
+class _CountingStr(str):
+    """
+    split 호출마다 생성되는 객체 수(list 1 + 문자열 N)를 집계하는 str
+    (분할 결과도 _CountingStr 로 감싸 body 재분할까지 추적)
+    """
+    objects = 0
+
+    def split(self, *args, **kwargs):
+        result = [_CountingStr(part) for part in str.split(self, *args, **kwargs)]
+        _CountingStr.objects += len(result) + 1
+        return result
+
+
+def _count_objects(fn, raw):
+    _CountingStr.objects = 0
+    fn(_CountingStr(raw))
+    return _CountingStr.objects
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for tr_id, (redis_prefix, key, _) in SAMPLES.items():
+        register_prefix(tr_id, key, redis_prefix)
+
+    print(f"{'tr_id':<10}{'legacy ns':>12}{'dispatch ns':>14}{'legacy obj':>12}{'dispatch obj':>14}{'ratio':>8}")
+    for tr_id in SAMPLES:
+        raw = _frame(tr_id)
+        frames = [raw] * args.frames
+        assert dispatch_path(raw) is not None
+
+        legacy_ns = _time_per_frame(legacy_path, frames, args.repeat)
+        dispatch_ns = _time_per_frame(dispatch_path, frames, args.repeat)
+        legacy_obj = _count_objects(legacy_path, raw)
+        dispatch_obj = _count_objects(dispatch_path, raw)
+        print(f"{tr_id:<10}{legacy_ns:>12.0f}{dispatch_ns:>14.0f}{legacy_obj:>12}{dispatch_obj:>14}"
+              f"{legacy_obj / dispatch_obj:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
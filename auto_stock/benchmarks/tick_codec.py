@@ -0,0 +1,64 @@
+"""
+tick 인코딩 비교 벤치마크 (bytes/key, encode/decode ns)
+
+python -m benchmarks.tick_codec
+python -m benchmarks.tick_codec --ticks 50000
+"""
+import argparse, random, time
+
+from benchmarks.frame_decode import _price_record, _index_record
+from kis.constants.const_realtime import DEPTH_SLOTS, DEPTH_FIELD_OFFSET
+from kis.websocket.parser.price_parser import decode_price
+from kis.websocket.parser.index_parser import decode_index
+from kis.websocket.parser.depth_parser import decode_depth
+from kis.websocket.util.tick_codec import encode_tick, decode_tick, msgpack
+
+
+def _depth_record(symbol: str) -> list:
+    fields = ["0"] * 59
+    fields[0], fields[1] = symbol, "093001"
+    for i in range(DEPTH_SLOTS):
+        fields[DEPTH_FIELD_OFFSET + i] = str(random.randint(1, 10 ** 6))
+    return fields
+
+
+def sample_ticks(n: int) -> dict:
+    symbols = [f"{i:06d}" for i in range(1, 301)]
+    return {
+        "price": [decode_price("H0STCNT0", _price_record(random.choice(symbols))) for _ in range(n)],
+        "index": [decode_index("H0UPCNT0", _index_record("0001")) for _ in range(n)],
+        "depth": [decode_depth("H0STASP0", _depth_record(random.choice(symbols))) for _ in range(n)],
+    }
+
+
+def _measure(prefix: str, ticks: list, codec: str):
+    start = time.perf_counter_ns()
+    encoded = [encode_tick(prefix, tick, codec) for tick in ticks]
+    encode_ns = (time.perf_counter_ns() - start) / len(ticks)
+
+    start = time.perf_counter_ns()
+    for value in encoded:
+        decode_tick(value)
+    decode_ns = (time.perf_counter_ns() - start) / len(ticks)
+
+    size = sum(len(value) for value in encoded) / len(encoded)
+    print(f"{prefix:<6} {codec:<8} {size:>8.1f} bytes/key  encode {encode_ns:>7,.0f} ns  decode {decode_ns:>7,.0f} ns")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ticks", type=int, default=20000)
+    args = parser.parse_args()
+
+    random.seed(7)
+    codecs = ["json", "struct"] + (["msgpack"] if msgpack else [])
+    for prefix, ticks in sample_ticks(args.ticks).items():
+        # 왕복 결과가 JSON 과 같은지 먼저 확인
+        assert all(decode_tick(encode_tick(prefix, t, c)) == t for t in ticks[:100] for c in codecs)
+        for codec in codecs:
+            _measure(prefix, ticks, codec)
+        print()
+
+
+if __name__ == "__main__":
+    main()
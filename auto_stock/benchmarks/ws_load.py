@@ -0,0 +1,317 @@
+"""
+Channels WebSocket 부하 테스트 (연결 시간 / push 지연 percentile / 연결당 메모리)
+
+- Redis 는 재생 서버와 같은 방식으로 채운다: 캡처(또는 합성) 파이프 프레임 → 디코더 → RedisTickWriter
+- 측정 구간에는 표식 tick (현재가/지수 = MARK_BASE + 회차) 을 주기적으로 기록/발행
+  → 클라이언트가 받은 payload 에서 표식을 찾아 발행 → 수신 지연 계산
+- 기본(in-process): channels.testing.WebsocketCommunicator 로 data.routing 에 직접 연결
+  (channels.testing 은 daphne 필요 - requirements.txt 에 포함, pip install daphne)
+  payload 생성 함수(REST)는 Redis 값으로 대체 → KIS REST 호출 없이 실행
+- --url: 실행 중인 uvicorn 에 websockets 클라이언트로 연결 (--server-pid 로 서버 RSS 측정)
+
+python -m benchmarks.ws_load --consumer index --clients 2000
+python -m benchmarks.ws_load --consumer price --codes 5 --clients 2000 --delta
+python -m benchmarks.ws_load --consumer rank --clients 1000 --layer memory
+python -m benchmarks.ws_load --consumer price --capture capture.log --url ws://127.0.0.1:8000 --server-pid 1234
+"""
+import argparse, asyncio, json, os, random, time, tracemalloc
+
+from benchmarks.frame_decode import _price_record, _index_record
+from kis.constants.const_index import INDEX_CODE_NAME_MAP
+from kis.websocket.parser.frame_decoder import iter_records, PREFIX_DECODERS
+from kis.websocket.util.redis_writer import RedisTickWriter
+from kis.websocket.util.replay_server import load_frames
+
+MARK_BASE = 1_000_000  # 실제 시세와 겹치지 않는 표식 값
+SYMBOLS = [f"{i:06d}" for i in range(5930, 5930 + 200)]
+PATHS = {"index": "/ws/index/", "rank": "/ws/rank/", "price": "/ws/price/{codes}/"}
+
+# 재생 프레임 tr_id → redis_prefix (ws 클라이언트는 종목별 구독 prefix 사용)
+SEED_PREFIXES = {
+    os.getenv("PRICE_REALTIME_TR_ID", "H0STCNT0"): "price",
+    os.getenv("INDEX_REALTIME_TR_ID", "H0UPCNT0"): "index",
+    "H0STCNT0": "price",
+    "H0UPCNT0": "index",
+    "H0STASP0": "depth",
+}
+
+
+# ------------------ Redis 채우기 (재생 서버 대체) ------------------
+def seed_frames(capture, codes) -> list:
+    if capture:
+        return [raw for _, raw in load_frames(capture)]
+    frames = ["0|H0STCNT0|001|" + "^".join(_price_record(code)) for code in codes]
+    frames += ["0|H0UPCNT0|001|" + "^".join(_index_record(code)) for code in INDEX_CODE_NAME_MAP]
+    return frames
+
+
+async def seed_redis(writer, frames) -> dict:
+    # 프레임 → 디코더 → RedisTickWriter (kis_ws_client.handle_pipe_frame 과 같은 경로)
+    last = {}  # {(redis_prefix, tr_key): tick}
+    for raw in frames:
+        for tr_id, fields, base in iter_records(raw):
+            redis_prefix = SEED_PREFIXES.get(tr_id)
+            decoder = PREFIX_DECODERS.get(redis_prefix)
+            parsed = decoder(tr_id, fields, base) if decoder else None
+            if parsed:
+                writer.put(redis_prefix, fields[base], parsed)
+                last[(redis_prefix, fields[base])] = parsed
+    await writer.flush()
+    return last
+
+
+class MarkFeeder:
+    """
+    측정 구간 표식 tick 발행 - 회차 k 의 발행 시각을 기록
+    """
+
+    def __init__(self, writer, ticks: dict, consumer: str, codes: list):
+        self._writer = writer
+        if consumer == "index":
+            self._targets = [(("index", code), "price") for code in INDEX_CODE_NAME_MAP]
+        else:
+            self._targets = [(("price", code), "current_price") for code in codes]
+        self._ticks = ticks
+        self.sent_at = {}  # {k: perf_counter}
+
+    async def run(self, interval: float, stop: asyncio.Event):
+        k = 0
+        while not stop.is_set():
+            for (redis_prefix, tr_key), field in self._targets:
+                tick = dict(self._ticks.get((redis_prefix, tr_key)) or {})
+                tick[field] = float(MARK_BASE + k)
+                self._writer.put(redis_prefix, tr_key, tick)
+            self.sent_at[k] = time.perf_counter()
+            await self._writer.flush()
+            k += 1
+            await asyncio.sleep(interval)
+
+
+def find_marks(content):
+    # payload 에서 표식 값(currentPrice / today) 추출 → 회차 목록
+    marks = []
+    stack = [content]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, dict):
+            for field in ("currentPrice", "today"):
+                try:
+                    value = float(node.get(field) or 0)
+                except (TypeError, ValueError):
+                    continue
+                if value >= MARK_BASE:
+                    marks.append(int(value - MARK_BASE))
+            stack.extend(v for v in node.values() if isinstance(v, (list, dict)))
+    return marks
+
+
+# ------------------ 클라이언트 ------------------
+class LoadClient:
+    def __init__(self, connect, receive, close):
+        self._connect, self._receive, self._close = connect, receive, close
+        self.connect_seconds = None
+        self.latencies = []
+        self.messages = 0
+
+    async def open(self, timeout: float):
+        start = time.perf_counter()
+        await self._connect(timeout)
+        self.connect_seconds = time.perf_counter() - start
+
+    # 측정 종료 시 task cancel 로 중단 (communicator 는 receive timeout 시 앱을 종료하므로 timeout 없이 대기)
+    async def listen(self, sent_at: dict):
+        seen = set()
+        while True:
+            try:
+                text = await self._receive()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                return
+            now = time.perf_counter()
+            self.messages += 1
+            for k in find_marks(json.loads(text)):
+                if k in sent_at and k not in seen:
+                    seen.add(k)
+                    self.latencies.append(now - sent_at[k])
+
+    async def close(self):
+        try:
+            await self._close()
+        except Exception:
+            pass
+
+
+def communicator_client(application, path):
+    from channels.testing import WebsocketCommunicator
+    communicator = WebsocketCommunicator(application, path)
+
+    async def connect(timeout):
+        connected, _ = await communicator.connect(timeout=timeout)
+        if not connected:
+            raise ConnectionError(path)
+
+    return LoadClient(connect, lambda: communicator.receive_from(timeout=24 * 3600), communicator.disconnect)
+
+
+def websocket_client(url):
+    import websockets
+    state = {}
+
+    async def connect(timeout):
+        state["ws"] = await asyncio.wait_for(websockets.connect(url, max_queue=None), timeout)
+
+    async def receive():
+        return await state["ws"].recv()
+
+    async def close():
+        if "ws" in state:
+            await state["ws"].close()
+
+    return LoadClient(connect, receive, close)
+
+
+# ------------------ in-process 준비 ------------------
+def setup_inprocess(layer: str, ticks: dict):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "auto_stock.settings")
+    import django
+    django.setup()
+    from django.conf import settings
+    if layer == "memory":
+        settings.CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+    from channels.routing import URLRouter
+    import data.consumers, data.routing
+    from data.services.market_broadcast import index_broadcaster, rank_broadcaster
+
+    # REST 대신 Redis 에 채운 값으로 payload 생성
+    def index_payload():
+        return {"indices": [
+            {"name": name, "yesterday": None, "today": (ticks.get(("index", code)) or {}).get("price")}
+            for code, name in INDEX_CODE_NAME_MAP.items()
+        ]}
+
+    def stock_payload(codes):
+        return [
+            {"name": code, "code": code, "currentPrice": str(tick.get("current_price", "0")),
+             "changePercent": str(tick.get("change_rate", "0")), "volume": str(tick.get("trade_value", "0")),
+             "price": "0"}
+            for code in codes for tick in [ticks.get(("price", code)) or {}]
+        ]
+
+    index_broadcaster._build = index_payload
+    rank_broadcaster._build = lambda: {"rank": [{"code": code, "name": code} for code in SYMBOLS[:10]]}
+    data.consumers.get_realtime_stock_payload = stock_payload
+    return URLRouter(data.routing.websocket_urlpatterns)
+
+
+def rss_bytes(pid="self") -> int:
+    with open(f"/proc/{pid}/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def percentiles(values: list) -> str:
+    if not values:
+        return "n/a"
+    values = sorted(values)
+    pick = lambda p: values[min(int(len(values) * p), len(values) - 1)] * 1000
+    return (f"p50 {pick(0.50):7.2f}ms  p95 {pick(0.95):7.2f}ms  "
+            f"p99 {pick(0.99):7.2f}ms  max {values[-1] * 1000:7.2f}ms")
+
+
+async def run(args):
+    random.seed(7)
+    codes = SYMBOLS[:max(args.codes, 1)]
+    writer = RedisTickWriter()
+    ticks = await seed_redis(writer, seed_frames(args.capture, SYMBOLS))
+    print(f"[seed] tick {len(ticks)}건 기록 ({'capture' if args.capture else 'synthetic'})")
+
+    path = PATHS[args.consumer].format(codes=",".join(codes))
+    if args.consumer == "price" and args.delta:
+        path += "?mode=delta"
+
+    if args.url:
+        make_client = lambda: websocket_client(args.url.rstrip("/") + path)
+        mem_before = rss_bytes(args.server_pid) if args.server_pid else None
+    else:
+        application = setup_inprocess(args.layer, ticks)
+        make_client = lambda: communicator_client(application, path)
+        tracemalloc.start()
+        mem_before = (tracemalloc.get_traced_memory()[0], rss_bytes())
+
+    # 연결 (동시 연결 시도 수 제한)
+    clients, failed = [make_client() for _ in range(args.clients)], 0
+    gate = asyncio.Semaphore(args.concurrency)
+
+    async def open_client(client):
+        nonlocal failed
+        async with gate:
+            try:
+                await client.open(args.timeout)
+            except Exception:
+                failed += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(open_client(c) for c in clients))
+    ramp = time.perf_counter() - start
+    clients = [c for c in clients if c.connect_seconds is not None]
+
+    if args.url:
+        mem_after = rss_bytes(args.server_pid) if args.server_pid else None
+    else:
+        mem_after = (tracemalloc.get_traced_memory()[0], rss_bytes())
+        tracemalloc.stop()
+
+    # push 지연 측정
+    stop = asyncio.Event()
+    feeder = MarkFeeder(writer, ticks, args.consumer, codes)
+    tasks = [asyncio.create_task(c.listen(feeder.sent_at)) for c in clients]
+    feed = asyncio.create_task(feeder.run(args.interval, stop))
+    await asyncio.sleep(args.duration)
+    stop.set()
+    await feed
+    await asyncio.sleep(args.interval)  # 마지막 표식 수신 대기
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    await asyncio.gather(*(c.close() for c in clients))
+    await writer.close()
+
+    # 결과
+    latencies = [v for c in clients for v in c.latencies]
+    print(f"{args.consumer} {path}  clients {len(clients)}/{args.clients} (실패 {failed})  연결 {ramp:.2f}s")
+    print(f"connect  {percentiles([c.connect_seconds for c in clients])}")
+    print(f"push     {percentiles(latencies)}  (수신 {sum(c.messages for c in clients):,}건, 표식 {len(feeder.sent_at)}회)")
+    if clients and mem_after is not None:
+        if args.url:
+            print(f"memory   server RSS {(mem_after - mem_before) / len(clients) / 1024:,.1f} KiB/conn")
+        else:
+            traced = (mem_after[0] - mem_before[0]) / len(clients) / 1024
+            rss = (mem_after[1] - mem_before[1]) / len(clients) / 1024
+            print(f"memory   traced {traced:,.1f} KiB/conn  RSS {rss:,.1f} KiB/conn")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--consumer", choices=list(PATHS), default="price")
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=200, help="동시 연결 시도 수")
+    parser.add_argument("--codes", type=int, default=5, help="price: 클라이언트당 종목 수")
+    parser.add_argument("--delta", action="store_true", help="price: ?mode=delta 로 연결")
+    parser.add_argument("--duration", type=float, default=10, help="push 측정 시간 (초)")
+    parser.add_argument("--interval", type=float, default=0.2, help="표식 tick 발행 주기 (초)")
+    parser.add_argument("--timeout", type=float, default=10)
+    parser.add_argument("--capture", help="WS_CAPTURE_FILE 캡처 파일 (없으면 합성 프레임)")
+    parser.add_argument("--layer", choices=["settings", "memory"], default="settings",
+                        help="in-process channel layer (settings: CHANNEL_LAYERS 그대로)")
+    parser.add_argument("--url", help="실행 중인 서버 (ex. ws://127.0.0.1:8000)")
+    parser.add_argument("--server-pid", help="--url 사용 시 RSS 를 측정할 서버 pid")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,124 @@
-import asyncio, os, logging, json
+import asyncio, os, logging
+from urllib.parse import parse_qs
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from asgiref.sync import sync_to_async
 
-from data.services.realtime_index import get_realtime_index_payload
-from data.services.realtime_rank import get_popular_rank_payload
-from data.services.realtime_stock_price import get_realtime_stock_payload
+from data.services.realtime_stock_price import get_realtime_stock_payload, apply_price_tick, diff_price_tick
+from data.services.market_broadcast import (
+    index_broadcaster, rank_broadcaster, get_price_broadcaster, discard_price_broadcaster,
+)
+from data.services.realtime_depth import DEPTH_TR_ID, get_depth_snapshot_async, ladder_to_levels, diff_depth
+from data.services.tick_hub import tick_hub
+from data.services.outbox import Outbox
+from data.services.payload_json import dumps
+from data.metrics import CONSUMER_CONNECTIONS, OUTBOX_DROPPED, SLOW_CLIENT_EVICTIONS
+from kis.websocket.util.kis_data_save import publish_subscription_requests
 
 logger = logging.getLogger(__name__)
 
+# 느린 클라이언트 강제 종료 close code
+SLOW_CLIENT_CLOSE_CODE = 4008
+
 # 중복 코드를 줄이기 위한 기본 클래스
 class BaseMarketConsumer(AsyncJsonWebsocketConsumer):
     def __init__(self, *args, **kwargs):
         logger.debug("[BaseMarketConsumer - __init__] 초기화")
         super().__init__(*args, **kwargs)
         self._task = None
+        self._tick_keys = []    # [(redis_prefix, tr_key)]
+        self._ws_acquired = []  # [(tr_id, redis_prefix, tr_keys)] - 종료 시 참조 해제
+        self._broadcasts = []   # 가입한 TopicBroadcaster (종료 시 탈퇴)
+        self._counted = False
+        self._outbox = None     # 연결별 송신 대기열 (accept 후 생성)
+
+    # topic group 가입 → 최근 payload(snapshot) 반환, 이후 갱신은 group_send 로 수신
+    async def join_broadcast(self, broadcaster):
+        payload = await broadcaster.join(self)
+        self._broadcasts.append(broadcaster)
+        return payload
+
+    async def leave_broadcasts(self):
+        for broadcaster in self._broadcasts:
+            try:
+                await broadcaster.leave(self)
+            except Exception as e:
+                logger.warning(f"[BaseMarketConsumer - leave_broadcasts] group 탈퇴 실패: {e}")
+        self._broadcasts = []
+
+    # group_send {"type": "broadcast.payload"} → 생산자가 직렬화한 텍스트를 그대로 전송 (topic 별 최신값만)
+    async def broadcast_payload(self, event):
+        self.push(event.get("topic", "broadcast"), event["text"])
+
+    # ------------------ 송신 대기열 ------------------
+    # 모든 전송은 outbox 를 거친다 → 클라이언트가 느려도 group 메시지 처리가 밀리지 않음
+    # 같은 topic 의 미전송 payload 는 최신값으로 교체 (merge 지정 시 합침)
+    def push(self, topic, payload, merge=None):
+        if self._outbox is None:
+            return
+        dropped = self._outbox.dropped
+        self._outbox.put(topic, payload, merge)
+        if self._outbox.dropped > dropped:
+            OUTBOX_DROPPED.labels(type(self).__name__).inc()
+
+    # outbox → 실제 전송 (topic 별 전송 직전 가공은 하위 클래스에서)
+    # str 은 이미 직렬화된 공유 payload → 인코딩 없이 전송
+    async def send_outbox(self, topic, payload):
+        if isinstance(payload, str):
+            await self.send(text_data=payload)
+        else:
+            await self.send_json(payload)
+
+    async def evict_slow_client(self, reason):
+        logger.warning(f"[BaseMarketConsumer - evict_slow_client] 느린 클라이언트 종료 ({reason}): {self.scope['path']}")
+        SLOW_CLIENT_EVICTIONS.labels(type(self).__name__).inc()
+        try:
+            await self.close(code=SLOW_CLIENT_CLOSE_CODE)
+        except Exception as e:
+            logger.warning(f"[BaseMarketConsumer - evict_slow_client] close 실패: {e}")
+
+    # 종목별 tick 채널 구독 (TickHub → self.on_tick)
+    # tr_id 가 있으면 KIS 실시간 구독 참조 카운트 증가 (연결 종료 시 해제)
+    async def subscribe_ticks(self, redis_prefix, tr_keys, tr_id=None):
+        tr_keys = list(tr_keys)
+        for tr_key in tr_keys:
+            await tick_hub.subscribe(redis_prefix, tr_key, self.on_tick)
+            self._tick_keys.append((redis_prefix, tr_key))
+
+        if tr_id:
+            await sync_to_async(publish_subscription_requests)(tr_id, tr_keys, redis_prefix, "acquire")
+            self._ws_acquired.append((tr_id, redis_prefix, tr_keys))
+
+    async def unsubscribe_ticks(self):
+        for redis_prefix, tr_key in self._tick_keys:
+            await tick_hub.unsubscribe(redis_prefix, tr_key, self.on_tick)
+        self._tick_keys = []
+
+        for tr_id, redis_prefix, tr_keys in self._ws_acquired:
+            try:
+                await sync_to_async(publish_subscription_requests)(tr_id, tr_keys, redis_prefix, "release")
+            except Exception as e:
+                logger.warning(f"[BaseMarketConsumer - unsubscribe_ticks] 구독 해제 요청 실패: {e}")
+        self._ws_acquired = []
+
+    async def on_tick(self, channel, tick):
+        pass
+
+    async def accept(self, *args, **kwargs):
+        await super().accept(*args, **kwargs)
+        CONSUMER_CONNECTIONS.labels(type(self).__name__).inc()
+        self._counted = True
+        self._outbox = Outbox(self.send_outbox, self.evict_slow_client)
+        self._outbox.start()
 
     async def disconnect(self, close_code):
         logger.debug("[BaseMarketConsumer - disconnect] disconnect 진입")
+        if self._counted:
+            CONSUMER_CONNECTIONS.labels(type(self).__name__).dec()
+            self._counted = False
+        await self.leave_broadcasts()
+        await self.unsubscribe_ticks()
+        if self._outbox:
+            await self._outbox.close()
         # 연결 종료 시 백그라운드 태스크를 반드시 취소해야 메모리 누수가 없습니다.
         if self._task and not self._task.done():
             logger.debug("[BaseMarketConsumer - disconnect] 백그라운드 태스크 취소 시도")
@@ -32,7 +134,7 @@ class BaseMarketConsumer(AsyncJsonWebsocketConsumer):
     @classmethod
     async def encode_json(cls, content):
         logger.debug("[BaseMarketConsumer - encode_json] JSON 인코딩")
-        return json.dumps(content, ensure_ascii=False)
+        return dumps(content)
 
 # Indices
 class IndicesConsumer(BaseMarketConsumer):
@@ -41,34 +143,15 @@ class IndicesConsumer(BaseMarketConsumer):
         await self.accept()
         logger.debug("[IndiciesConsumer - connect] WebSocket accept 완료")
 
-        logger.debug("[IndiciesConsumer - connect] get_realtime_index_payload() 비동기 호출 전")
-        payload = await sync_to_async(get_realtime_index_payload)()
-        logger.debug("[IndiciesConsumer - connect] get_realtime_index_payload() 비동기 호출 후")
+        # payload 생성/tick 반영은 index_broadcaster 1곳에서만 (group 가입만)
+        logger.debug("[IndiciesConsumer - connect] index group 가입")
+        payload = await self.join_broadcast(index_broadcaster)
 
         logger.debug("[IndiciesConsumer - connect] payload 전송 전")
-        await self.send_json(payload)
+        if payload:
+            self.push(index_broadcaster.topic, payload)
         logger.debug("[IndiciesConsumer - connect] payload 전송 후")
 
-        logger.debug("[IndiciesConsumer - connect] push loop 태스크 생성")
-        self._task = asyncio.create_task(self._push_loop())
-
-    async def _push_loop(self):
-        logger.debug("[IndiciesConsumer - _push_loop] 시작")
-        try:
-            while True:
-                await asyncio.sleep(5)
-                logger.debug("[IndiciesConsumer - _push_loop] get_realtime_index_payload 비동기 호출 전")
-                payload = await sync_to_async(get_realtime_index_payload)()
-                logger.debug("[IndiciesConsumer - _push_loop] get_realtime_index_payload 비동기 호출 후")
-
-                logger.debug("[IndiciesConsumer - _push_loop] payload 전송 전")
-                if payload["indices"]:
-                    await self.send_json(payload)
-                logger.debug("[IndiciesConsumer - _push_loop] payload 전송 후")
-        except asyncio.CancelledError:
-            logger.debug("[IndiciesConsumer - _push_loop] 태스크 취소")
-            pass # 정상 종료
-
 # Top 10
 class RankConsumer(BaseMarketConsumer):
     async def connect(self):
@@ -76,50 +159,43 @@ class RankConsumer(BaseMarketConsumer):
         await self.accept()
         logger.debug("[RankConsumer - connect] WebSocket accept 완료")
 
-        logger.debug("[RankConsumer - connect] get_popular_rank_payload 비동기 호출 전")
-        payload = await sync_to_async(get_popular_rank_payload)()
-        logger.debug("[RankConsumer - connect] get_popular_rank_payload 비동기 호출 후")
+        logger.debug("[RankConsumer - connect] rank group 가입")
+        payload = await self.join_broadcast(rank_broadcaster)
 
         logger.debug("[RankConsumer - connect] payload 전송 전")
-        await self.send_json({
-            "rank": payload.get("rank", [])
+        self.push(rank_broadcaster.topic, {
+            "rank": (payload or {}).get("rank", [])
         })
         logger.debug("[RankConsumer - connect] payload 전송 후")
 
-        logger.debug("[RankConsumer - connect] push loop 태스크 생성")
-        self._task = asyncio.create_task(self._push_loop())
-
-    async def _push_loop(self):
-        logger.debug("[RankConsumer - _push_loop] 시작")
-        try:
-            while True:
-                await asyncio.sleep(30)
-                logger.debug("[RankConsumer - _push_loop] get_popular_rank_payload 비동기 호출 전")
-                payload = await sync_to_async(get_popular_rank_payload)()
-                logger.debug("[RankConsumer - _push_loop] get_popular_rank_payload 비동기 호출 후")
-
-                logger.debug("[RankConsumer - _push_loop] payload 전송 전")
-                await self.send_json({
-                    "rank": payload.get("rank", [])
-                })
-                logger.debug("[RankConsumer - _push_loop] payload 전송 후")
-        except asyncio.CancelledError:
-            logger.debug("[RankConsumer - _push_loop] 태스크 취소")
-            pass
-
 # Stock price
+# - 기본: tick 마다 전체 종목 목록 전송
+# - ?mode=delta: 연결 시 snapshot, 이후 바뀐 종목/필드만 seq 와 함께 전송
+#   {"type": "snapshot" | "resync", "seq": n, "items": [...]}
+#   {"type": "delta", "seq": n, "items": [{"code": ..., 바뀐 필드}]}
+#   클라이언트는 seq 가 건너뛰면 {"action": "resync"} 전송
+# - 연결 중 종목 변경: {"action": "subscribe" | "unsubscribe", "codes": [...]}
+#   추가된 종목만 초기 데이터 조회 → {"type": "subscribed", "seq": n, "items": [...]}
+#   MAX_CODES 초과 / 조회 실패로 추가하지 못한 종목은 {"type": "rejected", "seq": n, "codes": [...], "max_codes": 100}
+#   {"type": "unsubscribed", "seq": n, "codes": [...]}
+# - 클라이언트가 느리면 전송 전 tick 을 합쳐서 보냄 (seq 는 전송 시점에 부여)
+#   기본 모드는 최신 전체 목록 1건, delta 모드는 종목별 바뀐 필드를 합친 delta 1건
 class StockPriceConsumer(BaseMarketConsumer):
+    MAX_CODES = 100  # 연결 1개당 최대 종목 수
+
     async def connect(self):
         logger.debug("[StockPriceConsumer - connect] 실행")
+        query = parse_qs(self.scope.get("query_string", b"").decode())
+        self.delta_mode = query.get("mode", [""])[0] == "delta"
+        self._seq = 0
+        self._topic_seq = {}  # {code: (epoch, seq)} 생산자 발행 번호 (유실 감지)
+        self._items = {}
+        self._price_groups = {}  # {code: PriceBroadcaster}
+        self._control = 0        # 합치지 않는 제어 메시지 topic 번호
 
-        # Read Parameters
-        codes_str = self.scope['url_route']['kwargs'].get('codes', "")
+        # Read Parameters (없으면 빈 목록으로 연결 후 subscribe 명령으로 추가)
+        codes_str = self.scope['url_route']['kwargs'].get('codes') or ""
         logger.debug(f"[StockPriceConsumer - connect] codes 파라미터: {codes_str}")
-        
-        if not codes_str:
-            logger.debug("[StockPriceConsumer - connect] codes 없음 → 연결 종료")
-            await self.close()
-            return
 
         await self.accept()
         logger.debug("[StockPriceConsumer - connect] WebSocket accept 완료")
@@ -129,31 +205,174 @@ class StockPriceConsumer(BaseMarketConsumer):
         logger.debug(f"[StockPriceConsumer - connect] 파싱된 target_codes: {self.target_codes}")
 
         # Send Data
-        logger.debug("[StockPriceConsumer - connect] get_realtime_stock_payload 비동기 호출 전")
-        payload = await sync_to_async(get_realtime_stock_payload)(self.target_codes)
-        logger.debug("[StockPriceConsumer - connect] get_realtime_stock_payload 비동기 호출 후")
+        logger.debug("[StockPriceConsumer - connect] 초기 데이터 조회 / 종목 group 가입")
+        _, rejected = await self.add_codes(self.target_codes)
 
         logger.debug("[StockPriceConsumer - connect] payload 전송 전")
-        await self.send_json(payload)
+        if self.delta_mode:
+            self.send_snapshot("snapshot")
+        else:
+            self.push("items", None)
+        self.notify_rejected(rejected)
         logger.debug("[StockPriceConsumer - connect] payload 전송 후")
 
-        logger.debug("[StockPriceConsumer - connect] push loop 태스크 생성")
-        self._task = asyncio.create_task(self._push_loop())
+    # 새 종목만 초기 데이터 조회 + group 가입 → (추가된 항목, 추가하지 못한 종목) 반환
+    async def add_codes(self, codes):
+        codes = [c for c in dict.fromkeys(codes) if c not in self._price_groups]
+        limit = max(self.MAX_CODES - len(self._price_groups), 0)
+        codes, rejected = codes[:limit], codes[limit:]
+        if not codes:
+            return [], rejected
 
-    async def _push_loop(self):
-        logger.debug("[StockPriceConsumer - _push_loop] 시작")
-        try:
-            while True:
-                await asyncio.sleep(5)
-
-                # Update Data
-                logger.debug("[StockPriceConsumer - _push_loop] get_realtime_stock_payload 비동기 호출 전")
-                payload = await sync_to_async(get_realtime_stock_payload)(self.target_codes)
-                logger.debug("[StockPriceConsumer - _push_loop] get_realtime_stock_payload 비동기 호출 후")
-
-                logger.debug("[StockPriceConsumer - _push_loop] payload 전송 전")
-                await self.send_json(payload)
-                logger.debug("[StockPriceConsumer - _push_loop] payload 전송 후")
-        except asyncio.CancelledError:
-            logger.debug("[StockPriceConsumer - _push_loop] 태스크 취소")
-            pass
\ No newline at end of file
+        logger.debug("[StockPriceConsumer - add_codes] get_realtime_stock_payload 비동기 호출 전")
+        payload = await sync_to_async(get_realtime_stock_payload)(codes)
+        logger.debug("[StockPriceConsumer - add_codes] get_realtime_stock_payload 비동기 호출 후")
+
+        requested = set(codes)
+        added = [item for item in payload if item.get("code") in requested]
+        for item in added:
+            self._items[item["code"]] = item
+
+        # 이후 갱신은 종목별 group 으로 전달 (tick 구독은 종목당 생산자 1곳) - 항목이 추가된 종목만
+        for item in added:
+            code = item["code"]
+            broadcaster = get_price_broadcaster(code)
+            await broadcaster.join(self)
+            self._price_groups[code] = broadcaster
+        rejected += [code for code in codes if code not in self._price_groups]
+        return added, rejected
+
+    async def remove_codes(self, codes):
+        removed = []
+        for code in dict.fromkeys(codes):
+            broadcaster = self._price_groups.pop(code, None)
+            self._items.pop(code, None)
+            self._topic_seq.pop(code, None)
+            if self._outbox:
+                self._outbox.discard(lambda topic: topic == f"delta:{code}")
+            if broadcaster is None:
+                continue
+            try:
+                await broadcaster.leave(self)
+            except Exception as e:
+                logger.warning(f"[StockPriceConsumer - remove_codes] group 탈퇴 실패: {e}")
+            discard_price_broadcaster(code)
+            removed.append(code)
+        return removed
+
+    async def leave_broadcasts(self):
+        await super().leave_broadcasts()
+        await self.remove_codes(list(self._price_groups))
+
+    # snapshot 은 전송 시점의 전체 목록 → 대기 중인 delta 는 포함되므로 버림
+    def send_snapshot(self, kind):
+        self._outbox.discard(lambda topic: topic.startswith("delta:"))
+        self.push("snapshot", kind)
+
+    # 제어 메시지 (subscribed / unsubscribed / rejected) 는 합치지 않고 순서대로 전송
+    def push_control(self, payload):
+        self._control += 1
+        self.push(f"control:{self._control}", payload)
+
+    def notify_rejected(self, rejected):
+        if rejected:
+            logger.info(f"[StockPriceConsumer] 종목 추가 거부 {len(rejected)}건 (최대 {self.MAX_CODES})")
+            self.push_control({"type": "rejected", "codes": rejected, "max_codes": self.MAX_CODES})
+
+    async def send_outbox(self, topic, payload):
+        if topic == "items":
+            await self.send_json(list(self._items.values()))
+        elif topic == "snapshot":
+            await self.send_json({"type": payload, "seq": self._seq, "items": list(self._items.values())})
+        elif topic.startswith("delta:"):
+            self._seq += 1
+            code = topic.split(":", 1)[1]
+            await self.send_json({"type": "delta", "seq": self._seq, "items": [{"code": code, **payload}]})
+        else:
+            self._seq += 1
+            await self.send_json({**payload, "seq": self._seq})
+
+    async def receive_json(self, content, **kwargs):
+        action = content.get("action")
+        codes = content.get("codes") or []
+        if isinstance(codes, str):
+            codes = codes.split(",")
+        codes = [str(c).strip() for c in codes if str(c).strip()]
+
+        if action == "resync" and self.delta_mode:
+            self.send_snapshot("resync")
+
+        elif action == "subscribe":
+            added, rejected = await self.add_codes(codes)
+            if self.delta_mode:
+                self.push_control({"type": "subscribed", "items": added})
+            else:
+                self.push("items", None)
+            self.notify_rejected(rejected)
+
+        elif action == "unsubscribe":
+            removed = await self.remove_codes(codes)
+            if self.delta_mode:
+                self.push_control({"type": "unsubscribed", "codes": removed})
+            else:
+                self.push("items", None)
+
+    # group_send {"type": "price.tick"}
+    async def price_tick(self, event):
+        data = event["payload"]
+        code, tick = data["code"], data["tick"]
+        item = self._items.get(code)
+        if item is None:
+            return
+
+        if not self.delta_mode:
+            apply_price_tick(item, tick)
+            self.push("items", None)
+            return
+
+        # 생산자 발행 번호가 건너뛰었으면 (channel layer 유실 등) 전체 재전송
+        last = self._topic_seq.get(code)
+        self._topic_seq[code] = (data.get("epoch"), data.get("seq"))
+        changed = diff_price_tick(item, tick)
+        if last and last[0] == data.get("epoch") and data.get("seq") != last[1] + 1:
+            self.send_snapshot("resync")
+            return
+
+        if not changed:
+            return
+        self.push(f"delta:{code}", changed, merge=lambda old, new: {**old, **new})
+
+
+# Order book (10단계 호가) - 최초 snapshot 이후 바뀐 단계만 delta 로 전송
+# - 느린 클라이언트는 최신 호가 1건만 대기 → 전송 시점에 마지막 전송분과 비교
+class DepthConsumer(BaseMarketConsumer):
+    async def connect(self):
+        logger.debug("[DepthConsumer - connect] 실행")
+        self.code = self.scope['url_route']['kwargs'].get('code', "")
+        await self.accept()
+        logger.debug("[DepthConsumer - connect] WebSocket accept 완료")
+
+        self._ladder = None
+        snapshot = await get_depth_snapshot_async(self.code)
+        if snapshot and snapshot.get("ladder"):
+            self.push("depth", snapshot)
+
+        logger.debug("[DepthConsumer - connect] 호가 tick 채널 구독")
+        await self.subscribe_ticks("depth", [self.code], DEPTH_TR_ID)
+
+    async def on_tick(self, channel, tick):
+        if tick.get("ladder"):
+            self.push("depth", tick)
+
+    async def send_outbox(self, topic, tick):
+        ladder = tick["ladder"]
+        if self._ladder is None:
+            message = {"type": "snapshot", **ladder_to_levels(ladder)}
+        else:
+            delta = diff_depth(self._ladder, ladder)
+            if delta is None:
+                return
+            message = {"type": "delta", **delta}
+
+        self._ladder = ladder
+        await self.send_json({"code": self.code, "time": tick.get("time"), **message})
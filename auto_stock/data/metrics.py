@@ -0,0 +1,17 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+# ASGI 프로세스 metrics - django_prometheus /metrics 로 함께 노출
+
+TICKHUB_MESSAGES = Counter("tickhub_messages_total", "TickHub 가 수신한 tick 수", ["prefix"])
+TICKHUB_DISPATCH_SECONDS = Histogram(
+    "tickhub_dispatch_seconds", "tick 1건을 모든 Consumer 에 전달하는 시간",
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5),
+)
+TICKHUB_DELIVERY_LAG_SECONDS = Histogram(
+    "tickhub_delivery_lag_seconds", "거래소 체결 시각 → Consumer 전달 지연", ["prefix"],
+    buckets=(0.5, 1, 2, 3, 5, 10, 30, 60, 300),
+)
+TICKHUB_CHANNELS = Gauge("tickhub_channels", "구독 중인 tick 채널 수")
+CONSUMER_CONNECTIONS = Gauge("market_consumer_connections", "연결된 시세 WebSocket 수", ["consumer"])
+OUTBOX_DROPPED = Counter("market_ws_dropped_total", "전송 전에 새 값으로 교체된(합쳐진) 메시지 수", ["consumer"])
+SLOW_CLIENT_EVICTIONS = Counter("market_ws_slow_client_evictions_total", "느린 클라이언트 강제 종료 수", ["consumer"])
@@ -1,9 +1,10 @@
 # routing.py
 from django.urls import re_path
-from .consumers import IndicesConsumer, RankConsumer, StockPriceConsumer
+from .consumers import IndicesConsumer, RankConsumer, StockPriceConsumer, DepthConsumer
 
 websocket_urlpatterns = [
     re_path(r'ws/index/$', IndicesConsumer.as_asgi()),    # IndicesConsumer
     re_path(r'ws/rank/$', RankConsumer.as_asgi()),        # RankConsumer
-    re_path(r'ws/price/(?P<codes>[^/]+)/$', StockPriceConsumer.as_asgi()), # StockPriceConsumer
+    re_path(r'ws/price/(?:(?P<codes>[^/]+)/)?$', StockPriceConsumer.as_asgi()), # StockPriceConsumer (종목은 subscribe 명령으로 변경 가능)
+    re_path(r'ws/depth/(?P<code>[^/]+)/$', DepthConsumer.as_asgi()),       # DepthConsumer
 ]
\ No newline at end of file
@@ -0,0 +1,233 @@
+import os, json, uuid, asyncio, logging
+import redis.asyncio as aioredis
+from asgiref.sync import sync_to_async
+from channels.layers import get_channel_layer
+
+from data.services.tick_hub import tick_hub
+from data.services.payload_json import dumps
+from kis.websocket.util.kis_data_save import publish_subscription_requests
+from kis.websocket.util.tick_channel import split_tick_channel
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+
+# 생산자 lease - 여러 ASGI 프로세스 중 1곳만 payload 생성/발행
+BROADCAST_LEASE_TTL = 15
+BROADCAST_LEASE_RENEW = 5
+
+# 캐시가 없을 때 새 Consumer 가 생산자의 첫 payload 를 기다리는 시간(초) / Redis 재확인 주기
+BROADCAST_SNAPSHOT_WAIT = 3
+BROADCAST_SNAPSHOT_POLL = 0.5
+
+_redis = None
+
+
+def _get_redis():
+    global _redis
+    if _redis is None:
+        _redis = aioredis.Redis.from_url(REDIS_URL, decode_responses=True)
+    return _redis
+
+
+class TopicBroadcaster:
+    """
+    topic 1개의 payload 를 한 번만 만들어 channel_layer.group_send 로 모든 Consumer 에 전달
+    - Consumer 는 join/leave 로 group 가입/탈퇴만 한다 (Consumer 별 push loop 없음)
+    - 프로세스에 가입 Consumer 가 있는 동안만 생산 태스크 실행
+    - Redis lease 를 잡은 프로세스 1곳만 생산 (lease 만료 시 다른 프로세스가 이어받음)
+    - 최근 payload 는 Redis 에 저장 → 새 Consumer 는 REST 호출 없이 snapshot 수신
+      (캐시가 없으면 생산자의 첫 생성을 기다린다 - snapshot 에서 따로 생성하지 않음)
+    - 생성 결과가 비어 있으면 ({"rank": []} 등) 발행/저장하지 않고 직전 payload 유지
+    - payload 는 생산자가 1번만 JSON 텍스트로 직렬화 → 모든 Consumer 가 같은 텍스트를 그대로 전송
+    """
+
+    event_type = "broadcast.payload"
+    shared_text = True  # False 면 dict 그대로 전달 (Consumer 별로 가공하는 payload)
+
+    def __init__(self, topic: str, build=None, interval=None):
+        self.topic = topic
+        self.group = f"market.{topic}"
+        self._build = build        # 동기 payload 생성 함수 (REST 등)
+        self._interval = interval  # 재생성 주기 (None = tick 으로만 갱신)
+        self._members = 0
+        self._task = None
+        self._stopping = None  # 취소 후 lease 반납 중인 이전 생산 태스크
+        self._leading = False
+        self._built = asyncio.Event()  # 이 프로세스가 생산자로서 첫 생성을 마침
+        self.payload = None
+
+    @property
+    def _cache_key(self):
+        return f"broadcast:{self.topic}"
+
+    @property
+    def _lease_key(self):
+        return f"broadcast:lease:{self.topic}"
+
+    # ------------------ Consumer 가입 / 탈퇴 ------------------
+    async def join(self, consumer):
+        await consumer.channel_layer.group_add(self.group, consumer.channel_name)
+        self._members += 1
+        if self._stopping:
+            # 이전 태스크가 생산 중지/lease 반납을 마친 뒤 새로 시작 (구독 release 가 acquire 뒤에 오지 않도록)
+            await asyncio.wait([self._stopping])
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return await self.snapshot()
+
+    async def leave(self, consumer):
+        await consumer.channel_layer.group_discard(self.group, consumer.channel_name)
+        self._members = max(self._members - 1, 0)
+        if self._members == 0 and self._task and not self._task.done():
+            task, self._task = self._task, None
+            task.cancel()
+            self._stopping = task
+            await asyncio.wait([task])
+            if self._stopping is task:
+                self._stopping = None
+
+    @property
+    def members(self) -> int:
+        return self._members
+
+    async def snapshot(self):
+        if self._build is None:
+            return None
+
+        # 캐시가 없으면 생산자(이 프로세스 또는 다른 프로세스)의 첫 생성 결과를 기다린다
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + BROADCAST_SNAPSHOT_WAIT
+        while True:
+            cached = await _get_redis().get(self._cache_key)
+            if cached:
+                return json.loads(cached)
+            if self._built.is_set():
+                return self.payload  # 이 프로세스가 생산자 - 생성 결과가 비었으면 None
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return None
+            try:
+                await asyncio.wait_for(self._built.wait(), timeout=min(remaining, BROADCAST_SNAPSHOT_POLL))
+            except asyncio.TimeoutError:
+                pass
+
+    @staticmethod
+    def is_empty(payload) -> bool:
+        # {"indices": []}, {"rank": []} 처럼 값이 모두 비어 있는 payload
+        return not payload or (isinstance(payload, dict) and not any(payload.values()))
+
+    # ------------------ 생산 ------------------
+    async def publish(self, payload, store=True):
+        text = dumps(payload) if store or self.shared_text else None
+        if store:
+            await self._store(payload, text)
+
+        event = {"type": self.event_type, "topic": self.topic}
+        if self.shared_text:
+            event["text"] = text
+        else:
+            event["payload"] = payload
+        await get_channel_layer().group_send(self.group, event)
+
+    async def _store(self, payload, text=None):
+        self.payload = payload
+        ttl = int(self._interval * 3) if self._interval else BROADCAST_LEASE_TTL * 4
+        await _get_redis().set(self._cache_key, text or dumps(payload), ex=ttl)
+
+    async def _release_lease(self, token: str):
+        redis = _get_redis()
+        if await redis.get(self._lease_key) == token:
+            await redis.delete(self._lease_key)
+
+    async def _hold_lease(self, token: str) -> bool:
+        redis = _get_redis()
+        if await redis.set(self._lease_key, token, nx=True, ex=BROADCAST_LEASE_TTL):
+            return True
+        if await redis.get(self._lease_key) == token:
+            await redis.expire(self._lease_key, BROADCAST_LEASE_TTL)
+            return True
+        return False
+
+    async def _run(self):
+        token = uuid.uuid4().hex
+        next_build = 0.0
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                leading = await self._hold_lease(token)
+                if leading != self._leading:
+                    self._leading = leading
+                    if not leading:
+                        self._built.clear()
+                    await (self.on_lead() if leading else self.on_step_down())
+                    next_build = 0.0
+
+                if leading and self._build and loop.time() >= next_build:
+                    try:
+                        payload = await sync_to_async(self._build)()
+                        if self.is_empty(payload):
+                            logger.info(f"[Broadcast] {self.topic} 빈 payload → 발행 생략")
+                        else:
+                            await self.publish(payload)
+                    except Exception as e:
+                        logger.warning(f"[Broadcast] {self.topic} payload 생성 실패: {e}")
+                    self._built.set()
+                    next_build = loop.time() + self._interval
+
+                await asyncio.sleep(BROADCAST_LEASE_RENEW)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            try:
+                if self._leading:
+                    self._leading = False
+                    self._built.clear()
+                    await self.on_step_down()
+            except Exception as e:
+                logger.warning(f"[Broadcast] {self.topic} 생산 중지 처리 실패: {e}")
+            finally:
+                # 생산자 전환 전(lease 획득 직후 취소)이나 on_step_down 실패여도 내 lease 는 반납
+                # → 다른 프로세스가 TTL 만료까지 기다리지 않고 바로 이어받음
+                await self._release_lease(token)
+
+    # 생산자가 되었을 때 / 내려왔을 때 (tick 구독 등)
+    async def on_lead(self):
+        logger.debug(f"[Broadcast] {self.topic} 생산 시작")
+
+    async def on_step_down(self):
+        logger.debug(f"[Broadcast] {self.topic} 생산 중지")
+
+
+class TickBroadcaster(TopicBroadcaster):
+    """
+    생산자 프로세스만 종목 tick 채널을 구독하고 tick 도착 시 발행
+    - tr_id 가 있으면 KIS 실시간 구독 참조도 생산자 1곳에서만 acquire/release
+    """
+
+    def __init__(self, topic, redis_prefix, tr_keys, tr_id=None, **kwargs):
+        super().__init__(topic, **kwargs)
+        self._redis_prefix = redis_prefix
+        self._tr_keys = list(tr_keys)
+        self._tr_id = tr_id
+
+    async def on_lead(self):
+        await super().on_lead()
+        for tr_key in self._tr_keys:
+            await tick_hub.subscribe(self._redis_prefix, tr_key, self._on_tick)
+        if self._tr_id:
+            await sync_to_async(publish_subscription_requests)(self._tr_id, self._tr_keys, self._redis_prefix, "acquire")
+
+    async def on_step_down(self):
+        for tr_key in self._tr_keys:
+            await tick_hub.unsubscribe(self._redis_prefix, tr_key, self._on_tick)
+        if self._tr_id:
+            await sync_to_async(publish_subscription_requests)(self._tr_id, self._tr_keys, self._redis_prefix, "release")
+        await super().on_step_down()
+
+    async def _on_tick(self, channel, tick):
+        _, tr_key = split_tick_channel(channel)
+        await self.on_tick(tr_key, tick)
+
+    async def on_tick(self, tr_key, tick):
+        pass
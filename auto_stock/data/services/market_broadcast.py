@@ -0,0 +1,62 @@
+import os, uuid
+
+from data.services.broadcaster import TopicBroadcaster, TickBroadcaster
+from data.services.realtime_index import get_realtime_index_payload, apply_index_tick
+from data.services.realtime_rank import get_popular_rank_payload
+from kis.constants.const_index import INDEX_CODE_NAME_MAP
+
+# 해외 지수(REST) 갱신 주기 - 국내 지수는 tick 수신 시 즉시 발행
+INDEX_REFRESH_INTERVAL = 60
+RANK_REFRESH_INTERVAL = 30
+
+
+# 지수: 주기적 전체 payload + 국내 지수 tick 반영
+class IndexBroadcaster(TickBroadcaster):
+    async def on_tick(self, code, tick):
+        if self.payload and apply_index_tick(self.payload, code, tick):
+            await self.publish(self.payload)
+
+
+# 종목 시세: tick 만 그대로 발행 (Consumer 가 자기 종목 목록에 반영)
+# - 생산자(epoch) 별 연속 번호(seq) → Consumer 가 유실(gap) 감지 시 resync
+class PriceBroadcaster(TickBroadcaster):
+    event_type = "price.tick"
+    shared_text = False  # tick 은 Consumer 마다 자기 종목 목록에 반영
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._epoch = None
+        self._seq = 0
+
+    async def on_lead(self):
+        self._epoch = uuid.uuid4().hex[:8]
+        self._seq = 0
+        await super().on_lead()
+
+    async def on_tick(self, code, tick):
+        self._seq += 1
+        await self.publish({"code": code, "tick": tick, "epoch": self._epoch, "seq": self._seq}, store=False)
+
+
+index_broadcaster = IndexBroadcaster(
+    "index", "index", INDEX_CODE_NAME_MAP.keys(), os.getenv("INDEX_REALTIME_TR_ID"),
+    build=get_realtime_index_payload, interval=INDEX_REFRESH_INTERVAL,
+)
+rank_broadcaster = TopicBroadcaster("rank", build=get_popular_rank_payload, interval=RANK_REFRESH_INTERVAL)
+
+_price_broadcasters = {}  # {code: PriceBroadcaster}
+
+
+def get_price_broadcaster(code: str) -> PriceBroadcaster:
+    broadcaster = _price_broadcasters.get(code)
+    if broadcaster is None:
+        broadcaster = _price_broadcasters[code] = PriceBroadcaster(
+            f"price.{code}", "price", [code], os.getenv("PRICE_REALTIME_TR_ID"),
+        )
+    return broadcaster
+
+
+def discard_price_broadcaster(code: str):
+    broadcaster = _price_broadcasters.get(code)
+    if broadcaster and broadcaster.members == 0:
+        del _price_broadcasters[code]
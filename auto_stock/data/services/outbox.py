@@ -0,0 +1,89 @@
+import os, time, asyncio, logging
+
+logger = logging.getLogger(__name__)
+
+# 느린 클라이언트 기준: 전송 1건이 이 시간(초) 이상 걸리거나 미전송 topic 이 한도를 넘으면 연결 종료
+MARKET_WS_MAX_LAG = float(os.getenv("MARKET_WS_MAX_LAG", "10"))
+MARKET_WS_MAX_PENDING = int(os.getenv("MARKET_WS_MAX_PENDING", "256"))
+
+
+class Outbox:
+    """
+    WebSocket 연결 1개의 송신 대기열 (topic 별 최신값 1건)
+    - put() 은 대기만 하고 즉시 반환 → group 메시지 처리 / tick 수신이 클라이언트 속도에 묶이지 않음
+    - 같은 topic 의 미전송 payload 는 새 값으로 교체 (merge 지정 시 합침) → dropped 집계
+    - 전송이 max_lag 초 이상 막히거나 미전송 topic 이 max_pending 을 넘으면 on_evict 호출
+    """
+
+    def __init__(self, send, on_evict, max_lag=MARKET_WS_MAX_LAG, max_pending=MARKET_WS_MAX_PENDING):
+        self._send = send          # async (topic, payload)
+        self._on_evict = on_evict  # async (reason)
+        self._max_lag = max_lag
+        self._max_pending = max_pending
+        self._pending = {}         # {topic: payload} - 먼저 들어온 topic 부터 전송
+        self._ready = asyncio.Event()
+        self._task = None
+        self._evicted = False
+
+        self.sent = 0
+        self.dropped = 0
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task and not self._task.done() and self._task is not asyncio.current_task():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def __len__(self):
+        return len(self._pending)
+
+    def put(self, topic, payload, merge=None):
+        if self._evicted:
+            return
+
+        if topic in self._pending:
+            self.dropped += 1
+            payload = merge(self._pending[topic], payload) if merge else payload
+        self._pending[topic] = payload
+        self._ready.set()
+
+        if len(self._pending) > self._max_pending:
+            self._evict(f"미전송 topic {len(self._pending)}개")
+
+    def discard(self, predicate):
+        # 조건에 맞는 미전송 topic 제거 (snapshot 으로 대체된 delta 등)
+        for topic in [t for t in self._pending if predicate(t)]:
+            del self._pending[topic]
+
+    def _evict(self, reason):
+        if self._evicted:
+            return
+        self._evicted = True
+        self._pending.clear()
+        self._ready.set()
+        asyncio.create_task(self._on_evict(reason))
+
+    async def _run(self):
+        while not self._evicted:
+            await self._ready.wait()
+            self._ready.clear()
+
+            while self._pending and not self._evicted:
+                topic = next(iter(self._pending))
+                payload = self._pending.pop(topic)
+                start = time.monotonic()
+                try:
+                    await asyncio.wait_for(self._send(topic, payload), timeout=self._max_lag)
+                except asyncio.TimeoutError:
+                    self._evict(f"전송 {time.monotonic() - start:.1f}초 지연")
+                    return
+                except Exception as e:
+                    logger.warning(f"[Outbox] 전송 실패 ({topic}): {e}")
+                    self._evict("전송 실패")
+                    return
+                self.sent += 1
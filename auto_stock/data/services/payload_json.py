@@ -0,0 +1,19 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # orjson 미설치 시 표준 json
+    orjson = None
+
+
+def dumps(content) -> str:
+    """
+    WebSocket 전송용 JSON 텍스트 (ensure_ascii=False 와 같은 결과)
+    - orjson 이 있으면 orjson 사용, orjson 이 처리 못하는 값은 표준 json 으로
+    """
+    if orjson:
+        try:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError:
+            pass
+    return json.dumps(content, ensure_ascii=False)
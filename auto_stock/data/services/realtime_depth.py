@@ -0,0 +1,70 @@
+import os
+from asgiref.sync import sync_to_async
+
+from kis.constants.const_realtime import DEPTH_LEVELS
+from kis.websocket.util.kis_data_save import subscribe_and_get_data, subscribe_and_get_data_async, get_cached_data
+from kis.api.util.market_time import is_after_market_close
+
+DEPTH_TR_ID = os.getenv("DEPTH_REALTIME_TR_ID", "H0STASP0")
+
+# ladder 배열 구간 (const_realtime.DEPTH_SLOTS 순서)
+_ASK_PRICE = 0
+_BID_PRICE = DEPTH_LEVELS
+_ASK_QTY = DEPTH_LEVELS * 2
+_BID_QTY = DEPTH_LEVELS * 3
+_TOTAL_ASK = DEPTH_LEVELS * 4
+_TOTAL_BID = DEPTH_LEVELS * 4 + 1
+
+
+# 10단계 호가 조회 (장중: WebSocket 구독 / 장마감: 캐시)
+def get_depth_snapshot(code: str) -> dict:
+    if is_after_market_close():
+        return subscribe_and_get_data(DEPTH_TR_ID, code, "depth", timeout=3)
+    return get_cached_data(code, "depth")
+
+
+async def get_depth_snapshot_async(code: str) -> dict:
+    if is_after_market_close():
+        return await subscribe_and_get_data_async(DEPTH_TR_ID, code, "depth", timeout=3)
+    return await sync_to_async(get_cached_data)(code, "depth")
+
+
+# ladder 배열 → 호가 단계 목록 (1단계 = 최우선 호가)
+def ladder_to_levels(ladder: list) -> dict:
+    return {
+        "asks": [[lv + 1, ladder[_ASK_PRICE + lv], ladder[_ASK_QTY + lv]] for lv in range(DEPTH_LEVELS)],
+        "bids": [[lv + 1, ladder[_BID_PRICE + lv], ladder[_BID_QTY + lv]] for lv in range(DEPTH_LEVELS)],
+        "totalAskQty": ladder[_TOTAL_ASK],
+        "totalBidQty": ladder[_TOTAL_BID],
+    }
+
+
+# 이전/현재 ladder 비교 → 바뀐 단계만 [단계, 가격, 잔량] 으로 반환 (변화 없으면 None)
+def diff_depth(prev: list, cur: list) -> dict:
+    asks, bids = [], []
+    for lv in range(DEPTH_LEVELS):
+        if prev[_ASK_PRICE + lv] != cur[_ASK_PRICE + lv] or prev[_ASK_QTY + lv] != cur[_ASK_QTY + lv]:
+            asks.append([lv + 1, cur[_ASK_PRICE + lv], cur[_ASK_QTY + lv]])
+        if prev[_BID_PRICE + lv] != cur[_BID_PRICE + lv] or prev[_BID_QTY + lv] != cur[_BID_QTY + lv]:
+            bids.append([lv + 1, cur[_BID_PRICE + lv], cur[_BID_QTY + lv]])
+
+    totals_changed = prev[_TOTAL_ASK] != cur[_TOTAL_ASK] or prev[_TOTAL_BID] != cur[_TOTAL_BID]
+    if not (asks or bids or totals_changed):
+        return None
+
+    return {
+        "asks": asks,
+        "bids": bids,
+        "totalAskQty": cur[_TOTAL_ASK],
+        "totalBidQty": cur[_TOTAL_BID],
+    }
+
+
+# 매수/매도 가능 잔량 (주문 전 유동성 확인용) - 호가 정보가 없으면 None
+def get_available_depth_qty(code: str, side: str, levels=DEPTH_LEVELS):
+    depth = get_cached_data(code, "depth")
+    if not depth or not depth.get("ladder"):
+        return None
+    ladder = depth["ladder"]
+    start = _ASK_QTY if side == "BUY" else _BID_QTY
+    return sum(ladder[start:start + min(levels, DEPTH_LEVELS)])
@@ -7,7 +7,7 @@ from kis.api.index import (
     fetch_overseas_index_snapshot,
 )
 from kis.websocket.util.kis_data_save import (
-    subscribe_and_get_data,
+    subscribe_and_get_many,
     get_cached_data,
 )
 from kis.constants.const_index import (
@@ -25,6 +25,7 @@ def get_realtime_index_payload() -> dict:
 
     # True = 장중, False = 장마감
     is_market_open = is_after_market_close()
+    realtime = subscribe_and_get_many(tr_id, list(INDEX_CODE_NAME_MAP), "index", timeout=3) if is_market_open else {}
 
     # --------------------------------------------------
     # 1) 국내 지수 (코스피 / 코스닥)
@@ -33,7 +34,7 @@ def get_realtime_index_payload() -> dict:
         yesterday = get_or_set_index_yesterday(code)
 
         if is_market_open:
-            ws_data = subscribe_and_get_data(tr_id, code, "index", timeout=3)
+            ws_data = realtime.get(code)
         else:
             ws_data = get_cached_data(code, "index")
 
@@ -66,3 +67,16 @@ def get_realtime_index_payload() -> dict:
             })
 
     return {"indices": results} if results else {"indices": []}
+
+# 실시간 tick → 지수 응답 갱신 (갱신된 경우 True)
+def apply_index_tick(payload: dict, code: str, tick: dict) -> bool:
+    name = INDEX_CODE_NAME_MAP.get(code)
+    price = tick.get("price")
+    if not name or not price:
+        return False
+
+    for item in payload.get("indices", []):
+        if item.get("name") == name:
+            item["today"] = price
+            return True
+    return False
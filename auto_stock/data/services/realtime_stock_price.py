@@ -1,7 +1,10 @@
 import os
-from kis.websocket.util.kis_data_save import subscribe_and_get_data, get_cached_data
+from kis.websocket.util.kis_data_save import (
+    subscribe_and_get_many,
+    get_cached_data,
+)
 from kis.data.search_code import mapping_code_to_name
-from kis.api.quote import kis_get_price_snapshot
+from kis.api.util.price_snapshot_cache import get_price_snapshots
 from kis.api.util.market_time import is_after_market_close
 
 # Stock price Payload
@@ -10,12 +13,18 @@ def get_realtime_stock_payload(codes: list) -> dict:
     results = []
     is_market_open = is_after_market_close()
 
+    # 캐시 없는(또는 구독 해제된) 종목은 한 번의 publish 로 일괄 구독 요청 → 동시에 대기 (최대 3초)
+    ws_data = subscribe_and_get_many(tr_id, codes, "price", timeout=3) if is_market_open else {}
+
+    # 현재가 snapshot (시가총액 / REST Fallback) - 멀티종목 일괄 조회 + 공유 캐시
+    snapshots = get_price_snapshots(codes)
+
     for code in codes:
         # 데이터 수집 (WebSocket/Redis 캐시)
-        snap = kis_get_price_snapshot(code)
+        snap = snapshots.get(code, {})
         if is_market_open:
             print("[INFO] 실시간 조회")
-            data = subscribe_and_get_data(tr_id, code, "price", timeout=3)
+            data = ws_data.get(code)
         else:
             print("[INFO] 캐싱 데이터 조회")
             data = get_cached_data(code, "price")
@@ -30,20 +39,38 @@ def get_realtime_stock_payload(codes: list) -> dict:
                 "currentPrice": str(data.get("current_price", "0")),
                 "changePercent": str(data.get("change_rate", "0")),
                 "volume": str(data.get("trade_value", "0")),
-                "price": str(snap["market_cap"]),
+                "price": str(snap.get("market_cap", "0")),
             })
         else:
             print("[INFO] 캐싱 데이터 없음")
             print("[INFO] REST 응답")
             # REST Fallback
-            price = snap.get("price")
             results.append({
                 "name": stock_name,
                 "code": code,
-                "currentPrice": str(snap["price"]),
-                "changePercent": str(snap["change_rate"]),
-                "volume": str(snap["volume"]),
-                "price": str(snap["market_cap"]),
+                "currentPrice": str(snap.get("price", "0")),
+                "changePercent": str(snap.get("change_rate", "0")),
+                "volume": str(snap.get("volume", "0")),
+                "price": str(snap.get("market_cap", "0")),
             })
 
-    return results
\ No newline at end of file
+    return results
+
+# 실시간 tick → 종목 응답 항목 갱신
+def apply_price_tick(item: dict, tick: dict) -> dict:
+    item["currentPrice"] = str(tick.get("current_price", item.get("currentPrice", "0")))
+    item["changePercent"] = str(tick.get("change_rate", item.get("changePercent", "0")))
+    item["volume"] = str(tick.get("trade_value", item.get("volume", "0")))
+    return item
+
+
+# 실시간 tick → 바뀐 필드만 반환 (delta 모드, 변화 없으면 빈 dict)
+def diff_price_tick(item: dict, tick: dict) -> dict:
+    before = (item.get("currentPrice"), item.get("changePercent"), item.get("volume"))
+    apply_price_tick(item, tick)
+    after = (item["currentPrice"], item["changePercent"], item["volume"])
+    return {
+        field: value
+        for field, old, value in zip(("currentPrice", "changePercent", "volume"), before, after)
+        if old != value
+    }
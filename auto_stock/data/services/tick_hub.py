@@ -0,0 +1,102 @@
+import os, time, asyncio, logging
+import redis.asyncio as aioredis
+
+from kis.websocket.util.tick_channel import tick_channel, split_tick_channel
+from kis.websocket.util.metrics import exchange_lag
+from kis.websocket.util.tick_codec import decode_tick
+from data.metrics import (
+    TICKHUB_MESSAGES, TICKHUB_DISPATCH_SECONDS, TICKHUB_DELIVERY_LAG_SECONDS, TICKHUB_CHANNELS,
+)
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+
+
+class TickHub:
+    """
+    ASGI 프로세스당 하나의 Redis pub/sub 연결로 tick 채널을 구독하고,
+    채널을 구독한 Consumer 콜백들에게 tick을 분배한다.
+    - 같은 종목을 보는 Consumer가 여러 개여도 Redis 구독은 1회
+    - 마지막 Consumer가 빠지면 채널 구독 해제 (idle 종목 비용 없음)
+    """
+
+    def __init__(self):
+        self._redis = None
+        self._pubsub = None
+        self._task = None
+        self._lock = asyncio.Lock()
+        self._listeners = {}  # {channel: {callback}}
+        TICKHUB_CHANNELS.set_function(lambda: len(self._listeners))
+
+    async def subscribe(self, redis_prefix: str, tr_key: str, callback):
+        channel = tick_channel(redis_prefix, tr_key)
+
+        async with self._lock:
+            if self._pubsub is None:
+                self._redis = aioredis.Redis.from_url(REDIS_URL)  # tick 값은 binary (tick_codec)
+                self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+
+            callbacks = self._listeners.setdefault(channel, set())
+            callbacks.add(callback)
+            if len(callbacks) == 1:
+                await self._pubsub.subscribe(channel)
+                logger.debug(f"[TickHub] 채널 구독 → {channel}")
+
+            # 최초 구독 이후에 수신 루프 시작 (구독 없는 pubsub 연결은 읽을 수 없음)
+            if self._task is None or self._task.done():
+                self._task = asyncio.create_task(self._listen_loop())
+
+    async def unsubscribe(self, redis_prefix: str, tr_key: str, callback):
+        channel = tick_channel(redis_prefix, tr_key)
+
+        async with self._lock:
+            callbacks = self._listeners.get(channel)
+            if not callbacks:
+                return
+
+            callbacks.discard(callback)
+            if not callbacks:
+                del self._listeners[channel]
+                await self._pubsub.unsubscribe(channel)
+                logger.debug(f"[TickHub] 채널 구독 해제 → {channel}")
+
+    async def _listen_loop(self):
+        while True:
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[TickHub] 수신 오류: {e}")
+                await asyncio.sleep(1)
+                continue
+
+            if not message or message["type"] != "message":
+                continue
+
+            channel = message["channel"].decode()
+            try:
+                tick = decode_tick(message["data"])
+            except ValueError:
+                logger.warning(f"[TickHub] 유효하지 않은 tick 데이터: {message['data']}")
+                continue
+
+            # tick 1건은 한 번만 디코딩하고 모든 Consumer에 전달
+            start = time.perf_counter()
+            for callback in list(self._listeners.get(channel, ())):
+                try:
+                    await callback(channel, tick)
+                except Exception as e:
+                    logger.warning(f"[TickHub] 콜백 처리 실패 ({channel}): {e}")
+            TICKHUB_DISPATCH_SECONDS.observe(time.perf_counter() - start)
+
+            redis_prefix, _ = split_tick_channel(channel)
+            TICKHUB_MESSAGES.labels(redis_prefix).inc()
+            lag = exchange_lag(tick.get("timestamp") or tick.get("time") or "")
+            if lag is not None:
+                TICKHUB_DELIVERY_LAG_SECONDS.labels(redis_prefix).observe(lag)
+
+
+# 프로세스 공유 인스턴스
+tick_hub = TickHub()
@@ -1,4 +1,14 @@
-from django.test import TestCase
+import asyncio
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIRequestFactory
+
+from data.consumers import StockPriceConsumer
+from data.services import broadcaster as broadcaster_module
+from data.services.broadcaster import TopicBroadcaster
+from data.services.outbox import Outbox
+from data.views import TickHistoryView
 
 
 ## kis/auth 토큰 발급 테스트
@@ -16,3 +26,357 @@ class DummyKisPricesTest(TestCase):
     def test_placeholder(self):
         self.assertTrue(True)
 
+
+async def _flush(outbox):
+    # 송신 태스크를 돌려 대기 중인 topic 을 모두 전송
+    outbox.start()
+    for _ in range(100):
+        await asyncio.sleep(0)
+    await outbox.close()
+
+
+## 연결별 송신 대기열 - topic 별 최신값 1건 / 느린 클라이언트 종료
+class OutboxTest(SimpleTestCase):
+    def setUp(self):
+        self.sent = []
+        self.evicted = []
+        self.outbox = Outbox(self.send, self.on_evict, max_lag=1, max_pending=3)
+
+    async def send(self, topic, payload):
+        self.sent.append((topic, payload))
+
+    async def on_evict(self, reason):
+        self.evicted.append(reason)
+
+    async def test_coalesces_pending_topic(self):
+        self.outbox.put("items", 1)
+        self.outbox.put("rank", "a")
+        self.outbox.put("items", 2)
+        await _flush(self.outbox)
+
+        # 먼저 들어온 topic 순서 유지, 같은 topic 은 최신값만
+        self.assertEqual(self.sent, [("items", 2), ("rank", "a")])
+        self.assertEqual(self.outbox.dropped, 1)
+        self.assertEqual(self.outbox.sent, 2)
+
+    async def test_replacing_none_payload_counts_as_dropped(self):
+        self.outbox.put("items", None)
+        self.outbox.put("items", None)
+        self.assertEqual(self.outbox.dropped, 1)
+
+    async def test_merge(self):
+        merge = lambda old, new: {**old, **new}
+        self.outbox.put("delta:005930", {"currentPrice": "1"}, merge)
+        self.outbox.put("delta:005930", {"volume": "9"}, merge)
+        self.outbox.put("delta:005930", {"currentPrice": "2"}, merge)
+        await _flush(self.outbox)
+        self.assertEqual(self.sent, [("delta:005930", {"currentPrice": "2", "volume": "9"})])
+
+    async def test_discard(self):
+        self.outbox.put("delta:005930", {})
+        self.outbox.put("snapshot", "resync")
+        self.outbox.discard(lambda topic: topic.startswith("delta:"))
+        await _flush(self.outbox)
+        self.assertEqual(self.sent, [("snapshot", "resync")])
+
+    async def test_evicts_when_too_many_topics_pending(self):
+        for n in range(4):
+            self.outbox.put(f"control:{n}", n)
+        await asyncio.sleep(0)
+
+        self.assertEqual(len(self.evicted), 1)
+        self.assertEqual(len(self.outbox), 0)
+        self.outbox.put("items", 1)  # 종료된 뒤에는 무시
+        self.assertEqual(len(self.outbox), 0)
+
+    async def test_evicts_slow_send(self):
+        async def slow_send(topic, payload):
+            await asyncio.sleep(1)
+
+        outbox = Outbox(slow_send, self.on_evict, max_lag=0.01)
+        outbox.start()
+        outbox.put("items", 1)
+        await asyncio.sleep(0.1)
+        await outbox.close()
+        self.assertEqual(len(self.evicted), 1)
+
+
+## 종목 시세 delta 모드 - 전송 시점 seq / 생산자 번호 유실 시 resync
+class StockPriceDeltaTest(SimpleTestCase):
+    def setUp(self):
+        self.messages = []
+        consumer = self.consumer = StockPriceConsumer()
+        consumer.delta_mode = True
+        consumer._seq = 0
+        consumer._topic_seq = {}
+        consumer._control = 0
+        consumer._items = {
+            "005930": {"code": "005930", "currentPrice": "70000", "changePercent": "0.5", "volume": "100"},
+        }
+        consumer.send_json = self.record
+        consumer._outbox = Outbox(consumer.send_outbox, consumer.evict_slow_client)
+
+    async def record(self, content, close=False):
+        self.messages.append(content)
+
+    async def tick(self, seq, epoch="e1", price=70000.0, volume=100):
+        await self.consumer.price_tick({"payload": {
+            "code": "005930", "epoch": epoch, "seq": seq,
+            "tick": {"current_price": price, "change_rate": 0.5, "trade_value": volume},
+        }})
+
+    async def flush(self):
+        await _flush(self.consumer._outbox)
+        self.consumer._outbox = Outbox(self.consumer.send_outbox, self.consumer.evict_slow_client)
+
+    async def test_delta_only_changed_fields(self):
+        await self.tick(1, price=70100.0)
+        await self.tick(2, price=70100.0)  # 변화 없음 → 전송 없음
+        await self.flush()
+
+        self.assertEqual(self.messages, [
+            {"type": "delta", "seq": 1, "items": [{"code": "005930", "currentPrice": "70100.0"}]},
+        ])
+
+    async def test_pending_deltas_merge_and_seq_assigned_at_send(self):
+        await self.tick(1, price=70100.0)
+        await self.tick(2, price=70100.0, volume=200)
+        await self.flush()
+        await self.tick(3, price=70200.0)
+        await self.flush()
+
+        self.assertEqual([m["seq"] for m in self.messages], [1, 2])
+        self.assertEqual(self.messages[0]["items"], [{"code": "005930", "currentPrice": "70100.0", "volume": "200"}])
+
+    async def test_producer_gap_sends_resync(self):
+        await self.tick(1, price=70100.0)
+        await self.flush()
+        await self.tick(2, price=70200.0)
+        await self.tick(4, price=70300.0)  # 3 유실 → 대기 중 delta 버리고 전체 재전송
+        await self.flush()
+        self.assertEqual(self.messages[1]["items"][0]["currentPrice"], "70300.0")
+
+        await self.tick(5, price=70400.0)
+        await self.flush()
+        self.assertEqual([(m["type"], m["seq"]) for m in self.messages], [("delta", 1), ("resync", 1), ("delta", 2)])
+
+    async def test_new_producer_epoch_is_not_a_gap(self):
+        await self.tick(7, epoch="e1", price=70100.0)
+        await self.tick(1, epoch="e2", price=70200.0)
+        await self.flush()
+        self.assertEqual([m["type"] for m in self.messages], ["delta"])
+
+    async def test_client_resync_and_control_messages(self):
+        await self.tick(1, price=70100.0)
+        await self.consumer.receive_json({"action": "resync"})
+        self.consumer.push_control({"type": "unsubscribed", "codes": []})
+        self.consumer.push_control({"type": "unsubscribed", "codes": []})
+        await self.flush()
+
+        # resync snapshot 이 대기 중 delta 를 대체, 제어 메시지는 합치지 않고 seq 증가
+        self.assertEqual([(m["type"], m["seq"]) for m in self.messages],
+                         [("resync", 0), ("unsubscribed", 1), ("unsubscribed", 2)])
+
+
+
+class _FakePriceBroadcaster:
+    def __init__(self, code):
+        self.code = code
+        self.members = 0
+
+    async def join(self, consumer):
+        self.members += 1
+
+    async def leave(self, consumer):
+        self.members -= 1
+
+
+def _price_payload(codes):
+    # 조회 실패 종목(999999)은 항목 없음
+    return [{"code": code, "currentPrice": "1000"} for code in codes if code != "999999"]
+
+
+## 연결 중 종목 추가/제거 - 항목이 추가된 종목만 group 가입 / 한도 초과는 rejected 로 알림
+@mock.patch("data.consumers.discard_price_broadcaster")
+@mock.patch("data.consumers.get_realtime_stock_payload", side_effect=_price_payload)
+class StockPriceSubscribeTest(SimpleTestCase):
+    def setUp(self):
+        self.messages = []
+        self.broadcasters = {}
+        consumer = self.consumer = StockPriceConsumer()
+        consumer.delta_mode = True
+        consumer._seq = 0
+        consumer._topic_seq = {}
+        consumer._control = 0
+        consumer._items = {}
+        consumer._price_groups = {}
+        consumer.send_json = self.record
+        consumer._outbox = Outbox(consumer.send_outbox, consumer.evict_slow_client)
+
+        patcher = mock.patch("data.consumers.get_price_broadcaster", side_effect=self.get_broadcaster)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_broadcaster(self, code):
+        return self.broadcasters.setdefault(code, _FakePriceBroadcaster(code))
+
+    async def record(self, content, close=False):
+        self.messages.append(content)
+
+    async def test_joins_only_added_codes(self, fetch, discard):
+        added, rejected = await self.consumer.add_codes(["005930", "999999", "005930"])
+
+        self.assertEqual([item["code"] for item in added], ["005930"])
+        self.assertEqual(rejected, ["999999"])
+        self.assertEqual(list(self.consumer._price_groups), ["005930"])
+        self.assertEqual(self.broadcasters["005930"].members, 1)
+        self.assertNotIn("999999", self.broadcasters)
+
+        # 이미 가입한 종목은 다시 조회/가입하지 않음
+        self.assertEqual(await self.consumer.add_codes(["005930"]), ([], []))
+        self.assertEqual(fetch.call_count, 1)
+        self.assertEqual(self.broadcasters["005930"].members, 1)
+
+    async def test_max_codes_overflow_is_reported(self, fetch, discard):
+        self.consumer.MAX_CODES = 2
+        await self.consumer.receive_json({"action": "subscribe", "codes": ["000001", "000002", "000003"]})
+        await _flush(self.consumer._outbox)
+
+        self.assertEqual(fetch.call_args[0][0], ["000001", "000002"])
+        self.assertEqual([m["type"] for m in self.messages], ["subscribed", "rejected"])
+        self.assertEqual(self.messages[1]["codes"], ["000003"])
+        self.assertEqual(self.messages[1]["max_codes"], 2)
+
+    async def test_remove_codes_leaves_joined_groups(self, fetch, discard):
+        await self.consumer.add_codes(["005930", "000660"])
+
+        removed = await self.consumer.remove_codes(["005930", "035420"])
+
+        self.assertEqual(removed, ["005930"])
+        self.assertEqual(self.broadcasters["005930"].members, 0)
+        self.assertEqual(list(self.consumer._items), ["000660"])
+        discard.assert_called_once_with("005930")
+
+
+class _FakeRedis:
+    # lease / 캐시에 쓰는 명령만 (만료 없음)
+    def __init__(self):
+        self.values = {}
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def expire(self, key, ttl):
+        return key in self.values
+
+    async def delete(self, key):
+        self.values.pop(key, None)
+
+
+class _FakeLayer:
+    async def group_add(self, group, channel):
+        pass
+
+    async def group_discard(self, group, channel):
+        pass
+
+
+class _FakeConsumer:
+    channel_name = "test.channel"
+    channel_layer = _FakeLayer()
+
+
+class _StepDownBroadcaster(TopicBroadcaster):
+    def __init__(self, *args, fail=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.events = []
+        self._fail = fail
+
+    async def on_lead(self):
+        self.events.append("lead")
+
+    async def on_step_down(self):
+        self.events.append("step_down")
+        await asyncio.sleep(0)  # 반납 전에 다른 태스크가 끼어들 수 있는 지점
+        if self._fail:
+            raise RuntimeError("step down failed")
+
+
+## 생산자 lease - 탈퇴 시 반납 / 재가입은 이전 태스크 종료 후
+class TopicBroadcasterLeaseTest(SimpleTestCase):
+    def setUp(self):
+        self.redis = _FakeRedis()
+        patcher = mock.patch.object(broadcaster_module, "_get_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def started(self, broadcaster):
+        await broadcaster.join(_FakeConsumer())
+        for _ in range(10):
+            await asyncio.sleep(0)
+        return self.redis.values.get(broadcaster._lease_key)
+
+    async def test_leave_releases_lease(self):
+        broadcaster = _StepDownBroadcaster("t1")
+        self.assertIsNotNone(await self.started(broadcaster))
+
+        await broadcaster.leave(_FakeConsumer())
+        self.assertEqual(broadcaster.events, ["lead", "step_down"])
+        self.assertNotIn(broadcaster._lease_key, self.redis.values)
+
+    async def test_lease_released_when_step_down_fails(self):
+        broadcaster = _StepDownBroadcaster("t2", fail=True)
+        await self.started(broadcaster)
+
+        await broadcaster.leave(_FakeConsumer())
+        self.assertNotIn(broadcaster._lease_key, self.redis.values)
+
+    async def test_other_process_lease_kept(self):
+        broadcaster = _StepDownBroadcaster("t3")
+        self.redis.values[broadcaster._lease_key] = "other"
+        await self.started(broadcaster)
+        self.assertEqual(broadcaster.events, [])
+
+        await broadcaster.leave(_FakeConsumer())
+        self.assertEqual(self.redis.values[broadcaster._lease_key], "other")
+
+    async def test_rejoin_waits_for_previous_task(self):
+        # 탈퇴 처리 중 재가입 → 이전 태스크의 step_down/반납 뒤 새 token 으로 lead
+        broadcaster = _StepDownBroadcaster("t4")
+        old_token = await self.started(broadcaster)
+
+        leaving = asyncio.create_task(broadcaster.leave(_FakeConsumer()))
+        await asyncio.sleep(0)
+        new_token = await self.started(broadcaster)
+        await leaving
+
+        self.assertEqual(broadcaster.events, ["lead", "step_down", "lead"])
+        self.assertNotEqual(new_token, old_token)
+        self.assertIsNotNone(new_token)
+        await broadcaster.leave(_FakeConsumer())
+
+
+## 장중 tick 이력 조회 - minutes 검증
+@mock.patch("data.views.get_tick_history", return_value=[])
+class TickHistoryViewTest(SimpleTestCase):
+    def get(self, **params):
+        request = APIRequestFactory().get("/api/data/history/", {"code": "005930", **params})
+        return TickHistoryView.as_view()(request)
+
+    def test_non_finite_minutes_rejected(self, get_tick_history):
+        for minutes in ("nan", "inf", "-inf", "abc"):
+            with self.subTest(minutes=minutes):
+                self.assertEqual(self.get(minutes=minutes).status_code, 400)
+        get_tick_history.assert_not_called()
+
+    def test_minutes_clamped(self, get_tick_history):
+        response = self.get(minutes="100000")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["minutes"], TickHistoryView.MAX_MINUTES)
+        get_tick_history.assert_called_once_with("005930", "price", minutes=TickHistoryView.MAX_MINUTES)
@@ -10,4 +10,6 @@ urlpatterns = [
     path("token/", views.TokenStatusView.as_view(), name="kis-auth-token-status"), # restapi   (OK)
     path("index/", views.RealtimeIndexView.as_view(), name="kis-index"),           # websocket (..)
     path("rank/", views.PopularStockRankingView.as_view(), name="kis-rank"),       # websocket (..)
+    path("history/", views.TickHistoryView.as_view(), name="kis-tick-history"),    # websocket 이력
+    path("subscriptions/", views.SubscriptionStatsView.as_view(), name="kis-ws-subscriptions"),
 ]
\ No newline at end of file
@@ -1,4 +1,4 @@
-import os, redis, logging
+import os, json, math, redis, logging
 import time
 import pandas as pd
 
@@ -11,9 +11,11 @@ from kis.api.index import fetch_overseas_index_snapshot, fetch_domestic_index_sn
 from kis.api.quote import kis_get_price_snapshot
 from kis.api.rank import fetch_top10_symbols
 from kis.data.search_code import mapping_code_to_name
-from kis.websocket.util.kis_data_save import subscribe_and_get_data, get_cached_data
+from kis.websocket.util.kis_data_save import subscribe_and_get_data, get_cached_data, get_tick_history
 from kis.constants.const_index import INDEX_CODE_NAME_MAP, OVERSEAS_INDEX_CODE_NAME_MAP
 from kis.api.util.market_time import is_after_market_close
+from kis.websocket.util.tick_channel import SUBSCRIPTION_STATS_KEY
+from kis.websocket.util.redis_writer import TICK_HISTORY_MINUTES
 from data.services.realtime_index import get_realtime_index_payload
 from data.services.realtime_rank import get_popular_rank_payload
 from data.services.realtime_stock_price import get_realtime_stock_payload
@@ -92,4 +94,38 @@ class PopularStockRankingView(APIView):
         logger.debug("[PopularStockRankingView - get] get_popular_rank_payload 호출 후")
 
         logger.debug("[PopularStockRankingView - get] 종료")
-        return Response(payload, status=200)
\ No newline at end of file
+        return Response(payload, status=200)
+
+
+# 장중 tick 이력 조회 (WebSocket 수신분 → Redis Stream, KIS 호출 없음)
+class TickHistoryView(APIView):
+    MAX_MINUTES = TICK_HISTORY_MINUTES  # stream 보관 기간 (redis_writer 에서 시간 기준 trim)
+
+    def get(self, request):
+        code = request.query_params.get("code")
+        kind = request.query_params.get("type", "price")
+
+        if not code:
+            return Response({"detail": "code is required"}, status=400)
+        if kind not in ("price", "index"):
+            return Response({"detail": "type must be price or index"}, status=400)
+
+        try:
+            minutes = float(request.query_params.get("minutes", "10"))
+        except ValueError:
+            return Response({"detail": "minutes must be a number"}, status=400)
+        if not math.isfinite(minutes):  # nan / inf 는 float() 를 통과한다
+            return Response({"detail": "minutes must be a number"}, status=400)
+        minutes = min(max(minutes, 0), self.MAX_MINUTES)
+
+        history = get_tick_history(code, kind, minutes=minutes)
+        return Response({"code": code, "type": kind, "minutes": minutes, "ticks": history}, status=200)
+
+
+# 실시간 구독 현황 (prefix 별 구독 수 / 참조 수, 세션별 부하)
+class SubscriptionStatsView(APIView):
+    def get(self, request):
+        raw = r.get(SUBSCRIPTION_STATS_KEY)
+        if not raw:
+            return Response({"detail": "websocket client stats not available"}, status=503)
+        return Response(json.loads(raw), status=200)
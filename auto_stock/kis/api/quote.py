@@ -6,6 +6,16 @@ from kis.api.util.request_real import request_get
 
 logger = logging.getLogger(__name__)
 
+# 멀티종목 시세 조회 1회 요청 최대 종목 수
+MULTI_PRICE_MAX_CODES = 30
+
+
+def _f(v):
+    try:
+        return float(v)
+    except:
+        return np.nan
+
 
 def kis_get_last_quote(symbol: str, count: int = 100) -> pd.DataFrame:
     """
@@ -45,20 +55,53 @@ def kis_get_price_snapshot(symbol: str) -> dict:
         res = request_get(path, tr_id, params)
         output = res.get("output", {})
 
-        def _f(v):
-            try:
-                return float(v)
-            except:
-                return np.nan
-
         return {
             "price": _f(output.get("stck_prpr")),
             "market_cap": _f(output.get("hts_avls")),
             "volume": _f(output.get("acml_vol")),
             "change": _f(output.get("prdy_vrss")),
             "change_rate": _f(output.get("prdy_ctrt")),
+            "listed_shares": _f(output.get("lstn_stcn")),
         }
 
     except Exception as e:
         logger.warning(f"[KIS] price snapshot failed ({symbol}): {e}")
         return {}
+
+
+def kis_get_price_snapshots(symbols: list) -> dict:
+    """
+    REST: 관심종목(멀티종목) 시세 조회 - 최대 30종목씩 1회 요청
+    반환: {종목코드: {"price", "volume", "change", "change_rate"}} (시가총액 없음)
+    - 응답에 상장주식수(lstn_stcn)가 있으면 "listed_shares" 도 포함
+    """
+    path = "/uapi/domestic-stock/v1/quotations/intstock-multprice"
+    tr_id = os.getenv("PRICE_MULTI_TR_ID", "FHKST11300006")
+
+    results = {}
+    for i in range(0, len(symbols), MULTI_PRICE_MAX_CODES):
+        chunk = symbols[i:i + MULTI_PRICE_MAX_CODES]
+        params = {}
+        for n, symbol in enumerate(chunk, start=1):
+            params[f"FID_COND_MRKT_DIV_CODE_{n}"] = "J"
+            params[f"FID_INPUT_ISCD_{n}"] = symbol
+
+        try:
+            res = request_get(path, tr_id, params)
+        except Exception as e:
+            logger.warning(f"[KIS] multi price snapshot failed ({len(chunk)}종목): {e}")
+            continue
+
+        for output in res.get("output") or []:
+            code = output.get("inter_shrn_iscd")
+            if not code:
+                continue
+            results[code] = {
+                "price": _f(output.get("inter2_prpr")),
+                "volume": _f(output.get("acml_vol")),
+                "change": _f(output.get("inter2_prdy_vrss")),
+                "change_rate": _f(output.get("prdy_ctrt")),
+            }
+            if output.get("lstn_stcn"):
+                results[code]["listed_shares"] = _f(output["lstn_stcn"])
+    return results
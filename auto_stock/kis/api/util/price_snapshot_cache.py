@@ -0,0 +1,141 @@
+import os, json, math, logging, threading
+from concurrent.futures import ThreadPoolExecutor
+import redis
+
+from kis.api.quote import kis_get_price_snapshot, kis_get_price_snapshots
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+r = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+
+# 현재가 snapshot 공유 캐시 - 이 시간 안의 요청은 종목 수와 무관하게 REST 호출 없음
+PRICE_SNAPSHOT_TTL = float(os.getenv("PRICE_SNAPSHOT_TTL", "5"))
+# 상장주식수 (시가총액 계산용) - 하루 1회만 조회
+LISTED_SHARES_TTL = 60 * 60 * 24
+LISTED_SHARES_BATCH = int(os.getenv("LISTED_SHARES_BATCH", "10"))  # 백그라운드 단건 조회 묶음 크기
+
+# 상장주식수 백그라운드 조회 (요청 경로를 막지 않음) / 조회 대기 중인 종목
+_listed_fetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="listed-shares")
+_listed_pending = set()
+_listed_lock = threading.Lock()
+
+
+def _snapshot_key(code: str) -> str:
+    return f"snapshot:price:{code}"
+
+
+def _listed_key(code: str) -> str:
+    return f"snapshot:listed:{code}"
+
+
+def _cache_listed_shares(shares: dict):
+    if not shares:
+        return
+    pipe = r.pipeline(transaction=False)
+    for code, listed in shares.items():
+        pipe.set(_listed_key(code), listed, ex=LISTED_SHARES_TTL)
+    pipe.execute()
+
+
+def _fetch_listed_shares(codes: list):
+    # 백그라운드: 단건 현재가 조회 (lstn_stcn) → 묶음 단위로 캐시
+    shares = {}
+    try:
+        for code in codes:
+            listed = kis_get_price_snapshot(code).get("listed_shares")
+            if listed and not math.isnan(listed):
+                shares[code] = listed
+        _cache_listed_shares(shares)
+    except Exception as e:
+        logger.warning(f"[SNAPSHOT] 상장주식수 조회 실패 ({len(codes)}종목): {e}")
+    finally:
+        with _listed_lock:
+            _listed_pending.difference_update(codes)
+
+
+def _schedule_listed_shares(codes: list):
+    # 이미 조회 대기 중인 종목은 제외
+    with _listed_lock:
+        codes = [code for code in codes if code not in _listed_pending]
+        _listed_pending.update(codes)
+    for i in range(0, len(codes), LISTED_SHARES_BATCH):
+        _listed_fetcher.submit(_fetch_listed_shares, codes[i:i + LISTED_SHARES_BATCH])
+    if codes:
+        logger.info(f"[SNAPSHOT] 상장주식수 캐시 없음 {len(codes)}건 → 백그라운드 조회")
+
+
+def _listed_shares(fetched: dict) -> dict:
+    """
+    상장주식수: 캐시 → 멀티종목 응답 → (없으면) 백그라운드 조회 예약
+    - 요청 경로에서는 단건 조회를 하지 않는다 → 아직 모르는 종목은 빠진 채 반환 (시가총액 NaN)
+    """
+    codes = list(fetched)
+    cached = r.mget([_listed_key(code) for code in codes]) if codes else []
+    shares, from_response, unknown = {}, {}, []
+    for code, value in zip(codes, cached):
+        listed = fetched[code].pop("listed_shares", None)
+        if value is not None:
+            shares[code] = float(value)
+        elif listed and not math.isnan(listed):
+            shares[code] = from_response[code] = listed
+        else:
+            unknown.append(code)
+
+    _cache_listed_shares(from_response)
+    if unknown:
+        _schedule_listed_shares(unknown)
+    return shares
+
+
+def get_price_snapshots(codes: list) -> dict:
+    """
+    종목 현재가 snapshot 일괄 조회 (모든 호출이 Redis 캐시 공유)
+    - 캐시 없는 종목만 멀티종목 시세 조회 (30종목당 1회 요청)
+    - 시가총액(억원) = 현재가 × 상장주식수 (멀티종목 응답에 시가총액이 없음)
+      상장주식수를 아직 모르는 종목은 시가총액 NaN (백그라운드 조회 후 다음 갱신부터 채워짐)
+    - 멀티종목 조회가 실패했거나 응답에서 빠진 종목은 단건 현재가 조회로 대체
+    반환: {종목코드: {"price", "market_cap", "volume", "change", "change_rate"}}
+    """
+    codes = list(dict.fromkeys(codes))
+    if not codes:
+        return {}
+
+    results = {}
+    missing = []
+    for code, value in zip(codes, r.mget([_snapshot_key(code) for code in codes])):
+        if value:
+            results[code] = json.loads(value)
+        else:
+            missing.append(code)
+
+    if not missing:
+        return results
+
+    fetched = kis_get_price_snapshots(missing)
+    shares = _listed_shares(fetched)
+    for code, snap in fetched.items():
+        listed = shares.get(code)
+        snap["market_cap"] = float(round(snap["price"] * listed / 1e8)) if listed and not math.isnan(snap["price"]) else math.nan
+
+    # 멀티종목 누락분 → 단건 조회 (시가총액 포함, 상장주식수도 함께 캐시)
+    fallback = [code for code in missing if code not in fetched]
+    for code in fallback:
+        snap = kis_get_price_snapshot(code)
+        if not snap:
+            continue
+        listed = snap.pop("listed_shares", None)
+        if listed and not math.isnan(listed):
+            r.set(_listed_key(code), listed, ex=LISTED_SHARES_TTL)
+        fetched[code] = snap
+
+    pipe = r.pipeline(transaction=False)
+    for code, snap in fetched.items():
+        results[code] = snap
+        pipe.set(_snapshot_key(code), json.dumps(snap), px=int(PRICE_SNAPSHOT_TTL * 1000))
+    pipe.execute()
+
+    if fallback:
+        logger.warning(f"[SNAPSHOT] 멀티종목 시세 누락 {len(fallback)}건 → 단건 조회로 대체")
+    logger.debug(f"[SNAPSHOT] 캐시 {len(codes) - len(missing)}건 / 조회 {len(fetched)}/{len(missing)}건")
+    return results
@@ -0,0 +1,16 @@
+## KIS 실시간(WebSocket) TR 별 레코드 필드 수
+# 한 프레임에 여러 레코드가 '^' 로 이어 붙어 오므로 고정 필드 수로 레코드를 구분한다.
+REALTIME_FIELD_COUNT = {
+    "H0STCNT0": 46,  # 국내주식 실시간 체결가
+    "H0STASP0": 59,  # 국내주식 실시간 호가
+    "H0UPCNT0": 30,  # 국내 업종(지수) 실시간 체결
+    "H0STCNI0": 26,  # 실시간 체결 통보 (실전)
+    "H0STCNI9": 26,  # 실시간 체결 통보 (모의)
+}
+
+## 실시간 호가(H0STASP0) 10단계 depth ladder
+# 레코드 필드 3 ~ 44 를 순서 그대로 고정 크기 배열 1개에 담는다.
+# [매도호가1~10, 매수호가1~10, 매도잔량1~10, 매수잔량1~10, 총매도잔량, 총매수잔량]
+DEPTH_LEVELS = 10
+DEPTH_FIELD_OFFSET = 3
+DEPTH_SLOTS = DEPTH_LEVELS * 4 + 2
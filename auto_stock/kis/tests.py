@@ -1,3 +1,814 @@
-from django.test import TestCase
+import math, time, queue, asyncio, threading
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from kis.constants.const_realtime import REALTIME_FIELD_COUNT, DEPTH_FIELD_OFFSET, DEPTH_SLOTS
+from kis.websocket.parser.frame_decoder import (
+    iter_records, frame_symbol, is_pipe_frame, register_prefix, get_prefix, PREFIX_DECODERS,
+)
+from kis.websocket.util.tick_codec import (
+    encode_tick, decode_tick, msgpack, VERSION_PRICE_V1, VERSION_INDEX_V1, VERSION_DEPTH_V1,
+)
+from kis.websocket.util.subscription_registry import SubscriptionRegistry
+from kis.websocket.util.subscription_lease import SubscriptionLeases
+from kis.websocket.util import kis_data_save
+from kis.websocket.util.kis_data_save import wait_for_ticks, subscribe_and_get_many
+from kis.websocket.util.tick_channel import tick_channel
+from kis.websocket.util.execution_worker import ExecutionWorkerPool
+from kis.websocket.util import connection_pool
+from kis.websocket.util.connection_pool import WsConnectionPool
+from kis.websocket.util.decode_pool import DecodePool
+from kis.websocket.util.redis_writer import RedisTickWriter
+from kis.websocket.util.decode_worker import decode_frame, apply_control
+from kis.api.util import price_snapshot_cache
+from kis.api.util.price_snapshot_cache import get_price_snapshots
+
+
+def _price_record(symbol, price="70000", change="500", volume="123456"):
+    fields = ["0"] * REALTIME_FIELD_COUNT["H0STCNT0"]
+    fields[0], fields[1], fields[4], fields[10], fields[11] = symbol, "093001", change, volume, price
+    return fields
+
+
+def _index_record(code, price="2650.12"):
+    fields = ["0"] * REALTIME_FIELD_COUNT["H0UPCNT0"]
+    fields[0], fields[1], fields[2] = code, "093001", price
+    return fields
+
+
+def _depth_record(symbol):
+    fields = ["0"] * REALTIME_FIELD_COUNT["H0STASP0"]
+    fields[0], fields[1] = symbol, "093001"
+    for i in range(DEPTH_SLOTS):
+        fields[DEPTH_FIELD_OFFSET + i] = str(i + 1)
+    return fields
+
+
+def _frame(tr_id, *records, count=None):
+    body = "^".join("^".join(record) for record in records)
+    return f"0|{tr_id}|{count or len(records):03d}|{body}"
+
+
+## 파이프 프레임 → 레코드 순회 / 레코드 디코더
+class FrameDecoderTest(SimpleTestCase):
+    def decode_all(self, raw, redis_prefix):
+        decoder = PREFIX_DECODERS[redis_prefix]
+        return [decoder(tr_id, fields, base) for tr_id, fields, base in iter_records(raw)]
+
+    def test_single_record(self):
+        raw = _frame("H0STCNT0", _price_record("005930"))
+        records = self.decode_all(raw, "price")
+
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["symbol"], "005930")
+        self.assertEqual(records[0]["timestamp"], "093001")
+        self.assertEqual(records[0]["current_price"], 70000.0)
+        self.assertEqual(records[0]["change_rate"], round(500 / 69500 * 100, 2))
+        self.assertEqual(records[0]["trade_value"], 123456)
+
+    def test_multi_record_frame(self):
+        # 한 프레임의 모든 레코드를 순서대로 반환 (첫 레코드만 읽지 않음)
+        symbols = ["005930", "000660", "035420"]
+        raw = _frame("H0STCNT0", *[_price_record(s, price=str(1000 * (i + 1))) for i, s in enumerate(symbols)])
+        records = self.decode_all(raw, "price")
+
+        self.assertEqual([r["symbol"] for r in records], symbols)
+        self.assertEqual([r["current_price"] for r in records], [1000.0, 2000.0, 3000.0])
+
+    def test_multi_record_index_and_depth(self):
+        indices = self.decode_all(_frame("H0UPCNT0", _index_record("0001"), _index_record("1001", "850.5")), "index")
+        self.assertEqual([(r["code"], r["price"], r["timestamp"]) for r in indices],
+                         [("0001", 2650.12, "09:30:01"), ("1001", 850.5, "09:30:01")])
+
+        depths = self.decode_all(_frame("H0STASP0", _depth_record("005930"), _depth_record("000660")), "depth")
+        self.assertEqual([r["symbol"] for r in depths], ["005930", "000660"])
+        self.assertEqual(depths[1]["ladder"], list(range(1, DEPTH_SLOTS + 1)))
+
+    def test_truncated_multi_record_frame(self):
+        # 건수보다 레코드가 적은 프레임 → 온전한 레코드까지만
+        width = REALTIME_FIELD_COUNT["H0STCNT0"]
+        raw = _frame("H0STCNT0", _price_record("005930"), _price_record("000660"), count=3)
+        self.assertEqual([base for _, _, base in iter_records(raw)], [0, width])
+
+        # 마지막 레코드가 잘린 프레임 → 잘린 레코드는 버림 (경계 추정으로 엉뚱한 필드를 읽지 않음)
+        raw = _frame("H0STCNT0", _price_record("005930"), _price_record("000660")[:20])
+        self.assertEqual([r["symbol"] for r in self.decode_all(raw, "price")], ["005930"])
+
+    def test_unregistered_tr_boundary_estimated(self):
+        raw = _frame("H0XXXXX0", ["a", "1", "2"], ["b", "3", "4"])
+        self.assertEqual([fields[base] for _, fields, base in iter_records(raw)], ["a", "b"])
+
+        raw = _frame("H0XXXXX0", ["a", "1", "2"], ["b", "3"])
+        self.assertEqual([base for _, _, base in iter_records(raw)], [0])
+
+    def test_truncated_record_decodes_to_none(self):
+        raw = _frame("H0STCNT0", _price_record("005930")[:5])
+        self.assertEqual(self.decode_all(raw, "price"), [None])
+
+    def test_not_a_pipe_frame(self):
+        self.assertEqual(list(iter_records("0|H0STCNT0|001")), [])
+        self.assertFalse(is_pipe_frame('{"header": {"tr_id": "PINGPONG"}}'))
+        self.assertTrue(is_pipe_frame(_frame("H0STCNT0", _price_record("005930"))))
+
+    def test_frame_symbol(self):
+        raw = _frame("H0STCNT0", _price_record("005930"), _price_record("000660"))
+        self.assertEqual(frame_symbol(raw), "005930")
+
+    def test_prefix_registered_per_symbol(self):
+        # H0STASP0 는 종목마다 quote / depth 로 다르게 구독될 수 있다
+        register_prefix("H0STASP0", "005930", "depth")
+        register_prefix("H0STASP0", "000660", "quote")
+        register_prefix("H0STASP0", "035420", "unknown")
+
+        self.assertEqual(get_prefix("H0STASP0", "005930"), "depth")
+        self.assertEqual(get_prefix("H0STASP0", "000660"), "quote")
+        self.assertIsNone(get_prefix("H0STASP0", "035420"))
+
+
+## tick 저장/발행 인코딩 round-trip
+class TickCodecTest(SimpleTestCase):
+    PRICE = {
+        "tr_id": "H0STCNT0", "symbol": "005930", "timestamp": "093001",
+        "current_price": 70000.0, "change_rate": 0.72, "trade_value": 123456789,
+    }
+    INDEX = {"code": "0001", "name": "KOSPI", "price": 2650.12, "timestamp": "09:30:01"}
+    DEPTH = {"tr_id": "H0STASP0", "symbol": "005930", "time": "093001", "ladder": list(range(DEPTH_SLOTS))}
+
+    def test_struct_round_trip(self):
+        for redis_prefix, tick, version in (
+            ("price", self.PRICE, VERSION_PRICE_V1),
+            ("depth", self.DEPTH, VERSION_DEPTH_V1),
+        ):
+            with self.subTest(redis_prefix):
+                value = encode_tick(redis_prefix, tick)
+                self.assertEqual(value[0], version)
+                self.assertEqual(decode_tick(value), tick)
+
+    def test_index_round_trip_restores_name(self):
+        value = encode_tick("index", self.INDEX)
+        self.assertEqual(value[0], VERSION_INDEX_V1)
+        decoded = decode_tick(value)
+        self.assertEqual(decoded["code"], "0001")
+        self.assertEqual(decoded["price"], 2650.12)
+        self.assertEqual(decoded["timestamp"], "09:30:01")
+
+    def test_json_fallback(self):
+        # layout 없는 prefix / layout 에 맞지 않는 값 → JSON
+        quote = {"symbol": "005930", "ask": 70100, "bid": 70000}
+        self.assertEqual(decode_tick(encode_tick("quote", quote)), quote)
+
+        broken = {**self.PRICE, "trade_value": "n/a"}
+        value = encode_tick("price", broken)
+        self.assertEqual(value[:1], b"{")
+        self.assertEqual(decode_tick(value), broken)
+
+    def test_oversized_string_field_falls_back(self):
+        # 고정 폭(종목 8/9바이트, 시각 6바이트)을 넘는 값은 잘리지 않고 JSON 으로 round-trip
+        for redis_prefix, tick in (
+            ("price", {**self.PRICE, "symbol": "Q5001234A9"}),
+            ("price", {**self.PRICE, "timestamp": "0930011"}),
+            ("depth", {**self.DEPTH, "tr_id": "H0STASP0X"}),
+            ("index", {**self.INDEX, "code": "0001234"}),
+        ):
+            with self.subTest(redis_prefix, tick=tick):
+                value = encode_tick(redis_prefix, tick)
+                self.assertEqual(value[:1], b"{")
+                self.assertEqual(decode_tick(value), tick)
+
+        # 9자 종목 코드는 price layout 에 그대로 들어간다
+        tick = {**self.PRICE, "symbol": "Q50012345"}
+        value = encode_tick("price", tick)
+        self.assertEqual(value[0], VERSION_PRICE_V1)
+        self.assertEqual(decode_tick(value), tick)
+
+    def test_legacy_json_values(self):
+        self.assertEqual(decode_tick('{"price": 1}'), {"price": 1})
+        self.assertEqual(decode_tick(b'{"price": 1}'), {"price": 1})
+
+    def test_msgpack_round_trip(self):
+        if msgpack is None:
+            self.skipTest("msgpack 미설치")
+        self.assertEqual(decode_tick(encode_tick("price", self.PRICE, codec="msgpack")), self.PRICE)
+
+    def test_malformed_values(self):
+        with self.assertRaises(ValueError):
+            decode_tick(b"\x7f")
+        with self.assertRaises(ValueError):
+            decode_tick(encode_tick("price", self.PRICE)[:-3])
+
+
+## 실시간 구독 참조 (보유자별 lease) / 유휴 구독 해제
+class SubscriptionRegistryTest(SimpleTestCase):
+    KEY = ("H0STCNT0", "005930")
+
+    def setUp(self):
+        self.registry = SubscriptionRegistry(idle_grace=10, lease_ttl=30)
+        self.now = float(int(time.monotonic()))  # 정수 시각 - (now + 10) - now 가 10 보다 작게 반올림되지 않도록
+
+    def test_refcount_by_holder(self):
+        self.assertTrue(self.registry.acquire(self.KEY, "price", "a", now=self.now))
+        self.assertFalse(self.registry.acquire(self.KEY, "price", "b", now=self.now))
+        self.assertFalse(self.registry.acquire(self.KEY, "price", "a", now=self.now))  # lease 갱신
+        self.assertEqual(self.registry.stats()["price"]["refs"], 2)
+
+        self.registry.release(self.KEY, "a", now=self.now)
+        self.registry.release(self.KEY, "a", now=self.now)  # 중복 release 무시
+        self.assertEqual(self.registry.stats()["price"]["refs"], 1)
+        self.assertEqual(self.registry.expired(now=self.now + 20), [])
+
+    def test_idle_subscription_expires_after_grace(self):
+        self.registry.acquire(self.KEY, "price", "a", now=self.now)
+        self.registry.release(self.KEY, "a", now=self.now)
+
+        self.assertEqual(self.registry.expired(now=self.now + 9), [])
+        self.assertEqual(self.registry.expired(now=self.now + 10), [self.KEY])
+
+    def test_reacquire_during_grace_keeps_subscription(self):
+        self.registry.acquire(self.KEY, "price", "a", now=self.now)
+        self.registry.release(self.KEY, "a", now=self.now)
+        self.registry.acquire(self.KEY, "price", "b", now=self.now + 5)
+        self.assertEqual(self.registry.expired(now=self.now + 20), [])
+
+    def test_lapsed_lease_is_released(self):
+        # release 없이 종료된 보유자 → lease 만료 시각부터 유휴 시간 계산
+        self.registry.acquire(self.KEY, "price", "dead", now=self.now)
+        self.assertEqual(self.registry.expired(now=self.now + 29), [])
+        self.assertEqual(self.registry.expired(now=self.now + 35), [])
+        self.assertEqual(self.registry.expired(now=self.now + 40), [self.KEY])
+
+    def test_heartbeat_renews_lease(self):
+        self.registry.acquire(self.KEY, "price", "a", now=self.now)
+        self.registry.acquire(self.KEY, "price", "a", now=self.now + 25)
+        self.assertEqual(self.registry.expired(now=self.now + 50), [])
+
+    def test_touch_and_pinned(self):
+        # 참조 없는 구독 → 유휴 상태로 시작 / 체결 통보는 만료되지 않음
+        exec_key = ("H0STCNI9", "user")
+        self.registry.touch(self.KEY, "price")
+        self.registry.touch(exec_key, "exec")
+
+        expired = self.registry.expired(now=time.monotonic() + 60)
+        self.assertEqual(expired, [self.KEY])
+        self.assertTrue(self.registry.is_priority(exec_key))
+        self.assertFalse(self.registry.is_priority(self.KEY))
+
+    def test_open_position_symbols_are_priority(self):
+        quote_key = ("H0STASP0", "005930")
+        self.registry.touch(self.KEY, "price")
+        self.registry.touch(quote_key, "quote")
+        self.registry.touch(("H0STCNT0", "000660"), "price")
+
+        self.registry.set_priority_symbols({"005930"})
+        self.assertTrue(self.registry.is_priority(self.KEY))
+        self.assertTrue(self.registry.is_priority(quote_key))
+        self.assertFalse(self.registry.is_priority(("H0STCNT0", "000660")))
+
+        self.registry.set_priority_symbols(set())  # 매도 완료
+        self.assertFalse(self.registry.is_priority(self.KEY))
+
+
+## 프로세스 단위 참조 합산 (0→1 / 1→0 일 때만 발행)
+class SubscriptionLeasesTest(SimpleTestCase):
+    def setUp(self):
+        self.leases = SubscriptionLeases(publish=lambda *args: None, interval=3600)
+
+    def test_publishes_only_transitions(self):
+        self.assertEqual(self.leases.acquire("H0STCNT0", ["005930", "000660"], "price"), ["005930", "000660"])
+        self.assertEqual(self.leases.acquire("H0STCNT0", ["005930"], "price"), [])
+
+        self.assertEqual(self.leases.release("H0STCNT0", ["005930", "000660"], "price"), ["000660"])
+        self.assertEqual(self.leases.release("H0STCNT0", ["005930", "035420"], "price"), ["005930"])
+        self.assertEqual(self.leases.held(), {})
+
+    def test_held_grouped_for_heartbeat(self):
+        self.leases.acquire("H0STCNT0", ["005930", "000660"], "price")
+        self.leases.acquire("H0UPCNT0", ["0001"], "index")
+        self.assertEqual(self.leases.held(), {
+            ("H0STCNT0", "price"): ["005930", "000660"],
+            ("H0UPCNT0", "index"): ["0001"],
+        })
+
+
+## 체결 통보 워커 풀 - 큐 초과분 celery 전달은 수신 루프 밖에서
+class ExecutionWorkerOverflowTest(SimpleTestCase):
+    def test_overflow_hand_off_does_not_block_submit(self):
+        released = threading.Event()
+        delivered = []
+
+        def slow_delay(notices):
+            released.wait(5)  # broker 응답 지연
+            delivered.append(notices)
+
+        pool = ExecutionWorkerPool(workers=0, maxsize=1)
+        with mock.patch("kis.websocket.util.execution_worker.process_execution_notices") as task:
+            task.delay.side_effect = slow_delay
+            start = time.monotonic()
+            for n in range(3):
+                pool.submit({"order_no": str(n)})
+            self.assertLess(time.monotonic() - start, 0.5)
+
+            released.set()
+            pool.stop()
+
+        self.assertEqual(delivered, [[{"order_no": "1"}], [{"order_no": "2"}]])
+
+
+class _Sink:
+    def __init__(self):
+        self.items = []
+
+    def put(self, redis_prefix, tr_key, parsed):
+        self.items.append((redis_prefix, tr_key))
+
+
+## 디코딩 프로세스 구독 등록/해제 반영
+class DecodeWorkerControlTest(SimpleTestCase):
+    def test_unregister_drops_book(self):
+        # 해제 후 재구독 → 첫 호가 스냅샷이 이전 잔량과 같아도 기록
+        sink, books = _Sink(), {}
+        raw = _frame("H0STASP0", _depth_record("005930"))
+        apply_control(("register", [("H0STASP0", "005930", "depth")]), books)
+        decode_frame(raw, sink, books, None)
+        decode_frame(raw, sink, books, None)  # 변화 없음 → 생략
+        self.assertEqual(sink.items, [("depth", "005930")])
+
+        apply_control(("unregister", [("H0STASP0", "005930")]), books)
+        self.assertNotIn("005930", books)
+        self.assertIsNone(get_prefix("H0STASP0", "005930"))
+
+        apply_control(("register", [("H0STASP0", "005930", "depth")]), books)
+        decode_frame(raw, sink, books, None)
+        self.assertEqual(sink.items, [("depth", "005930")] * 2)
+
+    @mock.patch.object(DecodePool, "_schedule_flush")  # 이벤트 루프 없이 flush 직접 호출
+    def test_controls_flushed_in_order_before_frames(self, _):
+        pool = DecodePool(workers=1, queue_size=2)
+        pool._frames = [queue.Queue(maxsize=2)]
+
+        pool.register("H0STCNT0", "005930", "price")
+        pool.register("H0STCNT0", "000660", "price")
+        pool.unregister("H0STCNT0", "005930")
+        pool.submit(_frame("H0STCNT0", _price_record("000660")))
+        pool.flush()
+
+        # 대기열 초과 → 프레임은 유실, 남은 구독 변경은 다음 flush 에 전달
+        self.assertEqual(pool._frames[0].get_nowait(),
+                         ("register", [("H0STCNT0", "005930", "price"), ("H0STCNT0", "000660", "price")]))
+        self.assertEqual(pool._frames[0].get_nowait(), ("unregister", [("H0STCNT0", "005930")]))
+        self.assertEqual(pool.dropped, 1)
+
+        pool.register("H0STCNT0", "005930", "price")
+        pool.flush()
+        self.assertEqual(pool._frames[0].get_nowait(), ("register", [("H0STCNT0", "005930", "price")]))
+        self.assertTrue(pool._frames[0].empty())
+
+
+class _FakeSyncRedis:
+    # snapshot 캐시에 쓰는 명령만 (만료 없음)
+    def __init__(self):
+        self.values = {}
+
+    def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+    def set(self, key, value, ex=None, px=None):
+        self.values[key] = str(value)
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def execute(self):
+        pass
+
+
+def _multi_snapshot(price=70000.0, listed=None):
+    snap = {"price": price, "volume": 100.0, "change": 500.0, "change_rate": 0.72}
+    if listed:
+        snap["listed_shares"] = listed
+    return snap
+
+
+## 현재가 snapshot 공유 캐시 - 상장주식수는 요청 경로에서 단건 조회하지 않음
+class PriceSnapshotCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.redis = _FakeSyncRedis()
+        self.jobs = []
+        price_snapshot_cache._listed_pending.clear()
+        for target, value in (
+            ("r", self.redis),
+            ("_listed_fetcher", mock.Mock(submit=lambda fn, codes: self.jobs.append((fn, codes)))),
+            ("LISTED_SHARES_BATCH", 2),
+        ):
+            patcher = mock.patch.object(price_snapshot_cache, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def run_jobs(self):
+        jobs, self.jobs = self.jobs, []
+        for fn, codes in jobs:
+            fn(codes)
+
+    def expire_snapshots(self):
+        for key in [key for key in self.redis.values if key.startswith("snapshot:price:")]:
+            del self.redis.values[key]
+
+    @mock.patch.object(price_snapshot_cache, "kis_get_price_snapshot")
+    @mock.patch.object(price_snapshot_cache, "kis_get_price_snapshots")
+    def test_listed_shares_from_multi_response(self, multi, single):
+        multi.return_value = {"005930": _multi_snapshot(listed=5969782550.0)}
+
+        snaps = get_price_snapshots(["005930"])
+
+        self.assertEqual(snaps["005930"]["market_cap"], float(round(70000 * 5969782550 / 1e8)))
+        self.assertNotIn("listed_shares", snaps["005930"])
+        self.assertEqual(self.redis.values["snapshot:listed:005930"], "5969782550.0")
+        single.assert_not_called()
+        self.assertEqual(self.jobs, [])
+
+    @mock.patch.object(price_snapshot_cache, "kis_get_price_snapshot", return_value={"listed_shares": 1e8})
+    @mock.patch.object(price_snapshot_cache, "kis_get_price_snapshots")
+    def test_cold_listed_shares_fetched_in_background(self, multi, single):
+        codes = ["000001", "000002", "000003"]
+        multi.side_effect = lambda missing: {code: _multi_snapshot(price=1000.0) for code in missing}
+
+        # 상장주식수 모름 → 기다리지 않고 시가총액 NaN, 단건 조회는 묶음으로 예약만
+        snaps = get_price_snapshots(codes)
+        self.assertTrue(all(math.isnan(snaps[code]["market_cap"]) for code in codes))
+        single.assert_not_called()
+        self.assertEqual([job_codes for _, job_codes in self.jobs], [["000001", "000002"], ["000003"]])
+
+        # 조회 대기 중인 종목은 다시 예약하지 않음
+        self.expire_snapshots()
+        get_price_snapshots(codes)
+        self.assertEqual(len(self.jobs), 2)
+
+        self.run_jobs()
+        self.assertEqual(single.call_count, 3)
+        self.expire_snapshots()
+        snaps = get_price_snapshots(codes)
+        self.assertEqual({snaps[code]["market_cap"] for code in codes}, {1000.0})
+        self.assertEqual(self.jobs, [])
+
+    @mock.patch.object(price_snapshot_cache, "kis_get_price_snapshots")
+    def test_cached_snapshot_skips_rest(self, multi):
+        multi.return_value = {"005930": _multi_snapshot(listed=1e8)}
+        get_price_snapshots(["005930"])
+        get_price_snapshots(["005930"])
+        multi.assert_called_once_with(["005930"])
+
+
+class _FakeWs:
+    # 수신 프레임 없이 닫힐 때까지 대기하는 연결
+    def __init__(self):
+        self.close_code = None
+        self._closed = asyncio.Event()
+
+    async def send(self, message):
+        pass
+
+    async def close(self):
+        self.drop(1000)
+
+    def drop(self, code=1006):
+        self.close_code = code
+        self._closed.set()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await self._closed.wait()
+        raise StopAsyncIteration
+
+
+class _FakeConnector:
+    def __init__(self, failures=0):
+        self.sockets = []
+        self.failures = failures
+
+    async def __call__(self, url):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("connection refused")
+        ws = _FakeWs()
+        self.sockets.append(ws)
+        return ws
+
+
+async def _settle():
+    for _ in range(20):
+        await asyncio.sleep(0)
+
+
+## WebSocket 세션 풀 - 최소 부하 세션 배정 / 세션 종료 시 재배정
+class WsConnectionPoolTest(SimpleTestCase):
+    def setUp(self):
+        self.connector = _FakeConnector()
+        patcher = mock.patch.object(connection_pool.websockets, "connect", self.connector)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.assigned = []
+
+    async def on_assign(self, key, session):
+        self.assigned.append((key, session.session_id))
+
+    def pool(self, **kwargs):
+        return WsConnectionPool("ws://test", lambda session, raw: None, self.on_assign, **kwargs)
+
+    async def test_least_loaded_assignment(self):
+        pool = self.pool(max_per_session=2, max_sessions=3)
+        for n in range(1, 6):
+            await pool.assign(("H0STCNT0", f"00000{n}"))
+        self.assertEqual(pool.stats()["sessions"], {0: 2, 1: 2, 2: 1})
+
+        # 빈 자리가 생기면 새 세션을 열지 않고 가장 적게 쓰는 세션에 배정
+        for n in (1, 2, 3):
+            await pool.release(("H0STCNT0", f"00000{n}"))
+        session = await pool.assign(("H0STCNT0", "000006"))
+        self.assertEqual(session.session_id, 0)
+        self.assertEqual(len(self.connector.sockets), 3)
+        await pool.close()
+
+    async def test_session_limit_keeps_pending(self):
+        pool = self.pool(max_per_session=1, max_sessions=1)
+        await pool.assign(("H0STCNT0", "000001"))
+        self.assertIsNone(await pool.assign(("H0STCNT0", "000002")))
+        self.assertEqual(pool.pending, {("H0STCNT0", "000002")})
+        await pool.close()
+
+    async def test_closed_session_keys_move_to_remaining_session(self):
+        pool = self.pool(max_per_session=2, max_sessions=2)
+        for n in range(1, 4):
+            await pool.assign(("H0STCNT0", f"00000{n}"))
+
+        self.connector.sockets[0].drop()
+        await _settle()
+
+        # 남은 세션 여유분(1) 만 즉시 재배정, 나머지는 대기 + 재연결 예약
+        self.assertEqual(pool.stats()["sessions"], {1: 2})
+        self.assertEqual(len(pool.pending), 1)
+        self.assertIsNotNone(pool.down_since)
+        self.assertEqual(len(self.connector.sockets), 2)  # 재배정 중에는 새 세션을 열지 않음
+        await pool.close()
+
+    async def supervise_until(self, pool, done):
+        stop_event = asyncio.Event()
+        task = asyncio.create_task(pool.supervise(stop_event))
+        for _ in range(200):
+            if done():
+                break
+            await asyncio.sleep(0)
+        stop_event.set()
+        pool._reconnect.set()
+        await task
+
+    async def test_pending_keys_handed_to_reconnected_session(self):
+        attempts = []
+
+        async def on_reconnect(attempt):
+            attempts.append(attempt)
+
+        pool = WsConnectionPool("ws://test", lambda session, raw: None, self.on_assign, on_reconnect,
+                                max_per_session=2, max_sessions=2)
+        keys = {("H0STCNT0", "000001"), ("H0STCNT0", "000002")}
+        for key in keys:
+            await pool.assign(key)
+
+        # 세션 유실 → 전부 대기, 재연결 2회 실패 후 새 세션에 재배정 (송신 큐 재등록)
+        self.connector.failures = 2
+        self.connector.sockets[0].drop()
+        await _settle()
+        self.assertEqual(pool.pending, keys)
+
+        self.assigned.clear()
+        with mock.patch.object(pool, "_backoff", return_value=0) as backoff:
+            await self.supervise_until(pool, lambda: not pool.pending)
+
+        self.assertEqual(attempts, [0, 1, 2])
+        self.assertEqual([c.args for c in backoff.call_args_list], [(0,), (1,)])
+        self.assertEqual((pool.failed_attempts, pool.reconnects), (2, 1))
+        self.assertEqual(set(self.assigned), {(key, 1) for key in keys})
+        self.assertIsNone(pool.down_since)
+        self.assertIsNotNone(pool.last_recovery)
+        await pool.close()
+
+    async def test_released_slot_handed_to_pending_key(self):
+        pool = self.pool(max_per_session=1, max_sessions=1)
+        await pool.assign(("H0STCNT0", "000001"))
+        await pool.assign(("H0STCNT0", "000002"))
+
+        await pool.release(("H0STCNT0", "000001"))
+        await self.supervise_until(pool, lambda: not pool.pending)
+
+        self.assertEqual(self.assigned[-1], (("H0STCNT0", "000002"), 0))
+        self.assertEqual(len(self.connector.sockets), 1)
+        await pool.close()
+
+    def test_backoff_full_jitter(self):
+        # 0 ~ min(max, base * 2^시도) 범위에서 무작위
+        pool = self.pool(backoff_base=1, backoff_max=10)
+        with mock.patch.object(connection_pool.random, "uniform", side_effect=lambda low, high: (low, high)):
+            self.assertEqual([pool._backoff(attempt) for attempt in range(6)],
+                             [(0, 1), (0, 2), (0, 4), (0, 8), (0, 10), (0, 10)])
+        self.assertTrue(all(0 <= pool._backoff(8) <= 10 for _ in range(100)))
+
+
+class _FakePubSub:
+    def __init__(self, redis):
+        self._redis = redis
+        self.channels = set()
+        self.messages = []
+
+    def subscribe(self, *channels):
+        self.channels.update(channels)
+        self._redis.step("subscribe")
+
+    def get_message(self, timeout=0):
+        return self.messages.pop(0) if self.messages else None
+
+    def close(self):
+        self._redis.pubsubs.remove(self)
+
+
+class _FakeTickRedis:
+    # 값 저장 + pub/sub (구독 중인 pubsub 에만 전달) / 명령 사이에 기록기 동작을 끼워 넣는 hooks
+    def __init__(self):
+        self.values = {}
+        self.live = set()
+        self.pubsubs = []
+        self.calls = []
+        self.hooks = {}
+
+    def step(self, name):
+        self.calls.append(name)
+        hook = self.hooks.pop(name, None)
+        if hook:
+            hook()
+
+    def write(self, redis_prefix, tr_key, tick):
+        # ws 클라이언트 기록기: SET + PUBLISH
+        value = encode_tick(redis_prefix, tick)
+        self.values[f"{redis_prefix}:{tr_key}"] = value
+        channel = tick_channel(redis_prefix, tr_key).encode()
+        for pubsub in self.pubsubs:
+            if channel in pubsub.channels:
+                pubsub.messages.append({"type": "message", "channel": channel, "data": value})
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        pubsub = _FakePubSub(self)
+        self.pubsubs.append(pubsub)
+        return pubsub
+
+    def mget(self, keys):
+        values = [self.values.get(key) for key in keys]
+        self.step("mget")
+        return values
+
+    def smismember(self, key, members):
+        return [member in self.live for member in members]
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self._redis = redis
+        self._commands = []
+
+    def __getattr__(self, name):
+        return lambda *args: self._commands.append((name, args))
+
+    def execute(self):
+        return [getattr(self._redis, name)(*args) for name, args in self._commands]
+
+
+def _tick(symbol, price):
+    return {**TickCodecTest.PRICE, "symbol": symbol, "current_price": price}
+
+
+## 첫 tick 대기 - tick 채널 구독 후 MGET (그 사이 기록된 값을 놓치지 않음)
+class WaitForTicksTest(SimpleTestCase):
+    def setUp(self):
+        self.redis = _FakeTickRedis()
+        patcher = mock.patch.object(kis_data_save, "r_tick", self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_write_after_subscribe_before_mget(self):
+        # 구독 직후 기록 → MGET 과 채널 양쪽에 도착해도 1건으로 반환
+        self.redis.hooks["subscribe"] = lambda: self.redis.write("price", "005930", _tick("005930", 70100.0))
+
+        results = wait_for_ticks("price", ["005930"], timeout=0.2)
+
+        self.assertEqual(results["005930"]["current_price"], 70100.0)
+        self.assertEqual(self.redis.calls, ["subscribe", "mget"])
+
+    def test_write_after_mget_is_received_on_channel(self):
+        # MGET 이 놓친 기록 → 먼저 구독한 채널로 수신 (MGET 후 구독했다면 timeout 까지 유실)
+        self.redis.hooks["mget"] = lambda: self.redis.write("price", "005930", _tick("005930", 70200.0))
+
+        results = wait_for_ticks("price", ["005930", "000660"], timeout=0.2)
+
+        self.assertEqual(list(results), ["005930"])
+        self.assertEqual(results["005930"]["current_price"], 70200.0)
+        self.assertEqual(self.redis.pubsubs, [])  # pubsub 정리
+
+    @mock.patch.object(kis_data_save, "publish_subscription_requests")
+    def test_many_publishes_then_waits_only_for_missing(self, publish):
+        self.redis.write("price", "005930", _tick("005930", 70000.0))
+        self.redis.live.add("price:005930")
+        self.redis.hooks["subscribe"] = lambda: self.redis.write("price", "000660", _tick("000660", 180000.0))
+
+        results = subscribe_and_get_many("H0STCNT0", ["005930", "000660"], "price", timeout=0.2)
+
+        publish.assert_called_once_with("H0STCNT0", ["000660"], "price")
+        self.assertEqual({code: tick["current_price"] for code, tick in results.items()},
+                         {"005930": 70000.0, "000660": 180000.0})
+        self.assertEqual(self.redis.calls, ["mget", "subscribe", "mget"])
+
+
+class _FakeAsyncPipeline:
+    def __init__(self, redis):
+        self._redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.commands.append((name, args))
+
+    async def execute(self):
+        if self._redis.failures:
+            self._redis.failures -= 1
+            raise ConnectionError("redis down")
+        self._redis.batches.append(self.commands)
+
+
+class _FakeAsyncRedis:
+    def __init__(self, failures=0):
+        self.batches = []  # 성공한 pipeline 별 명령 목록
+        self.failures = failures
+
+    def pipeline(self, transaction=True):
+        return _FakeAsyncPipeline(self)
+
+    async def aclose(self):
+        pass
+
+
+## tick 일괄 기록기 - 종목별 최신값 1건 / pipeline 1회 / 실패분 재시도
+class RedisTickWriterTest(SimpleTestCase):
+    def writer(self, redis, **kwargs):
+        writer = RedisTickWriter("redis://test", history_prefixes={"price"}, **kwargs)
+        writer._redis = redis
+        return writer
+
+    def written(self, batch):
+        return {args[0]: decode_tick(args[1])["current_price"] for name, args in batch if name == "set"}
+
+    async def test_latest_value_per_key_in_one_pipeline(self):
+        redis = _FakeAsyncRedis()
+        writer = self.writer(redis)
+        for price in (70000.0, 70100.0, 70200.0):
+            writer.put("price", "005930", _tick("005930", price))
+        writer.put("price", "000660", _tick("000660", 180000.0))
+
+        await writer.flush()
+
+        self.assertEqual(len(redis.batches), 1)
+        batch = redis.batches[0]
+        self.assertEqual(self.written(batch), {"price:005930": 70200.0, "price:000660": 180000.0})
+        self.assertEqual(sorted(name for name, _ in batch), ["publish"] * 2 + ["set"] * 2 + ["xadd"] * 2)
+        self.assertEqual(writer.stats()["conflated"], {"price": 2})
+
+    async def test_full_buffer_flushes_before_interval(self):
+        redis = _FakeAsyncRedis()
+        writer = self.writer(redis, flush_interval=10, max_items=2)
+        stop_event = asyncio.Event()
+        task = asyncio.create_task(writer.run(stop_event))
+
+        writer.put("price", "005930", _tick("005930", 70000.0))
+        writer.put("price", "000660", _tick("000660", 180000.0))
+        for _ in range(20):
+            if redis.batches:
+                break
+            await asyncio.sleep(0)
+
+        self.assertEqual(len(redis.batches), 1)
+        stop_event.set()
+        writer.put("price", "035420", _tick("035420", 200000.0))  # 대기 중인 run() 깨우기 (가득 찬 버퍼 → 즉시 flush)
+        writer.put("price", "051910", _tick("051910", 400000.0))
+        await task
+
+    async def test_failed_flush_retried_without_overwriting_newer_tick(self):
+        redis = _FakeAsyncRedis(failures=1)
+        writer = self.writer(redis, flush_interval=0)
+        writer.put("price", "005930", _tick("005930", 70000.0))
+        writer.put("price", "000660", _tick("000660", 180000.0))
+
+        await writer.flush()
+        self.assertEqual(redis.batches, [])
+
+        writer.put("price", "005930", _tick("005930", 70100.0))  # 실패 후 도착한 최신값 유지
+        await writer.flush()
+        self.assertEqual(self.written(redis.batches[0]), {"price:005930": 70100.0, "price:000660": 180000.0})
@@ -0,0 +1,11 @@
+"""
+실시간 WebSocket 클라이언트 실행: python -m kis.websocket
+
+- 디코딩 프로세스(spawn)는 실행 모듈이 *.__main__ 이면 다시 import 하지 않는다
+  → kis_ws_client 의 django.setup / Redis 연결 / signal 등록이 자식 프로세스마다 반복되지 않음
+"""
+import asyncio
+
+from kis.websocket.util.kis_ws_client import main
+
+asyncio.run(main())
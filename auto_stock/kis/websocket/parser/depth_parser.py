@@ -0,0 +1,20 @@
+import logging
+
+from kis.constants.const_realtime import DEPTH_FIELD_OFFSET, DEPTH_SLOTS
+
+logger = logging.getLogger(__name__)
+
+
+## 호가 레코드 1건 → 10단계 depth ladder (고정 길이 정수 배열)
+def decode_depth(tr_id: str, fields: list, base: int = 0) -> dict:
+    try:
+        start = base + DEPTH_FIELD_OFFSET
+        return {
+            "tr_id": tr_id,
+            "symbol": fields[base],     # 종목 코드
+            "time": fields[base + 1],   # HHMMSS
+            "ladder": [int(v) for v in fields[start:start + DEPTH_SLOTS]],
+        }
+    except Exception as e:
+        logger.warning(f"[parse_depth] 파싱 실패: {e}")
+        return None
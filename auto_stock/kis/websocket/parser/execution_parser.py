@@ -2,22 +2,29 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+## 체결 통보 레코드 1건 파싱
+def decode_exec(tr_id: str, body: list, base: int = 0):
+    try:
+        logger.info(f"체결 데이터 구독 body 정보 확인={body[base:base + 13]}")
+
+        return {
+            "tr_key": body[base],
+            "exec_type": body[base + 10],      # CNTG_YN 1=체결, 2=정정/취소
+            "order_no": body[base + 5],        # ODER_NO
+            "price": body[base + 11],          # CNTG_UNPR
+            "qty": body[base + 12],            # CNTG_QTY
+            "ts": body[base + 2],              # 체결시간
+        }
+    except:
+        return None
+
+
 ## 체결 정보 파싱
 def parse_exec(raw: str):
     try:
         parts = raw.split("|")
-        body = parts[3].split("^")
-
         logger.info(f"체결 데이터 구독 parts 정보 확인={parts}")
-        logger.info(f"체결 데이터 구독 body 정보 확인={body}")
 
-        return {
-            "tr_key": parts[3].split("^")[0],
-            "exec_type": body[10],      # CNTG_YN 1=체결, 2=정정/취소
-            "order_no": body[5],        # ODER_NO
-            "price": body[11],          # CNTG_UNPR
-            "qty": body[12],            # CNTG_QTY
-            "ts": body[2],              # 체결시간
-        }
+        return decode_exec(parts[1], parts[3].split("^"))
     except:
-        return None
\ No newline at end of file
+        return None
@@ -0,0 +1,90 @@
+import logging
+
+from kis.constants.const_realtime import REALTIME_FIELD_COUNT
+from kis.websocket.parser.price_parser import decode_price
+from kis.websocket.parser.quote_parser import decode_quote
+from kis.websocket.parser.depth_parser import decode_depth
+from kis.websocket.parser.index_parser import decode_index
+from kis.websocket.parser.execution_parser import decode_exec
+
+logger = logging.getLogger(__name__)
+
+# redis_prefix 별 레코드 디코더
+PREFIX_DECODERS = {
+    "price": decode_price,
+    "quote": decode_quote,
+    "depth": decode_depth,
+    "index": decode_index,
+    "exec": decode_exec,
+}
+
+# (tr_id, tr_key) 별 redis_prefix (구독 정보 없이 디코딩하는 프로세스용)
+# 같은 tr_id 가 종목마다 다른 prefix 로 구독될 수 있으므로 종목 단위로 등록
+_PREFIXES = {}
+
+
+def register_prefix(tr_id: str, tr_key: str, redis_prefix: str):
+    if redis_prefix in PREFIX_DECODERS:
+        _PREFIXES[(tr_id, tr_key)] = redis_prefix
+
+
+def unregister_prefix(tr_id: str, tr_key: str):
+    _PREFIXES.pop((tr_id, tr_key), None)
+
+
+def get_prefix(tr_id: str, tr_key: str):
+    return _PREFIXES.get((tr_id, tr_key))
+
+
+## 파이프 프레임 첫 레코드의 종목 코드 (body split 없이 추출)
+def frame_symbol(raw: str) -> str:
+    start = raw.find("|", raw.find("|", raw.find("|") + 1) + 1) + 1
+    end = raw.find("^", start)
+    return raw[start:end] if end != -1 else raw[start:]
+
+
+## 파이프 프레임 여부 (첫 글자 = 암호화 여부 0/1)
+def is_pipe_frame(raw: str) -> bool:
+    return raw[:1].isdigit()
+
+
+## KIS 파이프 프레임 → 레코드 전체 순회
+def iter_records(raw: str):
+    """
+    '암호화여부|TR_ID|데이터건수|레코드1^레코드2^...' 형식의 프레임에서
+    데이터건수만큼 모든 레코드를 (tr_id, fields, base) 로 반환한다.
+    - body 는 한 번만 split 하고, 레코드는 복사 없이 시작 위치(base)만 넘긴다
+    - 레코드 경계는 TR 별 고정 필드 수로 계산 (미등록 TR 은 건수로 나눠 추정)
+    - 등록 TR 인데 필드가 모자라면 (잘린 프레임) 온전한 레코드까지만 반환
+    """
+    parts = raw.split("|", 3)
+    if len(parts) < 4:
+        return
+
+    tr_id, count_str, body = parts[1], parts[2], parts[3]
+    fields = body.split("^")
+
+    try:
+        count = int(count_str)
+    except ValueError:
+        count = 1
+
+    if count <= 1:
+        yield tr_id, fields, 0
+        return
+
+    width = REALTIME_FIELD_COUNT.get(tr_id)
+    if width and width * count > len(fields):
+        complete = len(fields) // width
+        logger.warning(f"[FRAME] 잘린 프레임 → {tr_id} count={count} fields={len(fields)} (온전한 레코드 {complete}건)")
+        count = max(complete, 1)
+    elif not width or width * count != len(fields):
+        width, rest = divmod(len(fields), count)
+        if rest or not width:
+            logger.warning(f"[FRAME] 레코드 경계 불일치 → {tr_id} count={count} fields={len(fields)}")
+            yield tr_id, fields, 0
+            return
+
+    for base in range(0, width * count, width):
+        yield tr_id, fields, base
+
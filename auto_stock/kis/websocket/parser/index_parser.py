@@ -6,23 +6,17 @@ from kis.constants.const_index import INDEX_CODE_NAME_MAP
 logger = logging.getLogger(__name__)
 
 
-def parse_index(raw: str) -> dict | None:
-    if "|" not in raw or not raw[0].isdigit():
-        logger.warning(f"[parse_index] Invalid format: {raw}")
-        return None
-
+## 업종 지수 레코드 1건 파싱
+def decode_index(tr_id: str, fields: list, base: int = 0) -> dict | None:
     try:
-        _, _, _, body = raw.split("|", 3)
-        fields = body.split("^")
-
         # 최소 필드 수만 검사 (3개만 있으면 OK)
-        if len(fields) < 3:
-            logger.warning(f"[parse_index] Too few fields: {fields}")
+        if len(fields) - base < 3:
+            logger.warning(f"[parse_index] Too few fields: {fields[base:]}")
             return None
 
-        code = fields[0]
-        time_str = fields[1]
-        price_str = fields[2]
+        code = fields[base]
+        time_str = fields[base + 1]
+        price_str = fields[base + 2]
 
         price = float(price_str)
         timestamp = (
@@ -37,6 +31,20 @@ def parse_index(raw: str) -> dict | None:
             "timestamp": timestamp
         }
 
+    except Exception as e:
+        logger.warning(f"[parse_index] error: {e} | fields: {fields[base:base + 3]}")
+        return None
+
+
+def parse_index(raw: str) -> dict | None:
+    if "|" not in raw or not raw[0].isdigit():
+        logger.warning(f"[parse_index] Invalid format: {raw}")
+        return None
+
+    try:
+        _, tr_id, _, body = raw.split("|", 3)
+        return decode_index(tr_id, body.split("^"))
+
     except Exception as e:
         logger.warning(f"[parse_index] error: {e} | raw: {raw}")
-        return None
\ No newline at end of file
+        return None
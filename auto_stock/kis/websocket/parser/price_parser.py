@@ -3,27 +3,32 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-def parse_price(raw: str) -> dict:
+## 체결가 레코드 1건 파싱
+def decode_price(tr_id: str, fields: list, base: int = 0) -> dict:
     try:
-        parts = raw.split("|")
-        tr_id = parts[1]
-        tr_key = parts[3].split("^")[0]
-        fields = parts[3].split("^")
-
-        current_price = float(fields[11])
-        change = int(fields[4])
+        current_price = float(fields[base + 11])
+        change = int(fields[base + 4])
         previous_price = current_price - change
         change_rate = round((change / previous_price) * 100, 2) if previous_price != 0 else 0.0
 
         return {
             "tr_id": tr_id,
-            "symbol": tr_key, # 종목 코드
-            "timestamp": fields[1],
+            "symbol": fields[base], # 종목 코드
+            "timestamp": fields[base + 1],
             "current_price": current_price,
             "change_rate": change_rate,
-            "trade_value": int(fields[10]),
+            "trade_value": int(fields[base + 10]),
         }
 
     except Exception as e:
         logger.warning(f"[parse_price] 파싱 실패: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+def parse_price(raw: str) -> dict:
+    try:
+        parts = raw.split("|")
+        return decode_price(parts[1], parts[3].split("^"))
+    except Exception as e:
+        logger.warning(f"[parse_price] 파싱 실패: {e}")
+        return None
@@ -3,22 +3,27 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+## 호가 레코드 1건 파싱
+def decode_quote(tr_id: str, fields: list, base: int = 0) -> dict:
+    try:
+        return {
+            "tr_id": tr_id,
+            "symbol": fields[base],            # 종목 코드
+            "time": fields[base + 1],          # HHMMSS
+            "quote": int(fields[base + 2]),    # 현재가
+        }
+    except Exception as e:
+        logger.warning(f"[parse_quote] 파싱 실패: {e}")
+        return None
+
+
 def parse_quote(raw: str) -> dict:
     try:
         parts = raw.split("|")
         if len(parts) < 4:
             raise ValueError("Invalid quote format")
 
-        tr_id = parts[1]
-        tr_key = parts[3].split("^")[0]
-        fields = parts[3].split("^")
-
-        return {
-            "tr_id": tr_id,
-            "symbol": tr_key,                  # 종목 코드
-            "time": fields[1],                 # HHMMSS
-            "quote": int(fields[2]),           # 현재가
-        }
+        return decode_quote(parts[1], parts[3].split("^"))
     except Exception as e:
         logger.warning(f"[parse_quote] 파싱 실패: {e}")
-        return None
\ No newline at end of file
+        return None
@@ -0,0 +1,42 @@
+import os, gzip, time, logging
+
+logger = logging.getLogger(__name__)
+
+# 원본 프레임 캡처 파일 (비어 있으면 비활성, .gz 로 끝나면 gzip 압축)
+WS_CAPTURE_FILE = os.getenv("WS_CAPTURE_FILE", "")
+
+
+class FrameCapture:
+    """
+    수신 원본 프레임 append-only 기록
+    - 한 줄에 1 프레임: '수신시각(epoch μs)\\t세션ID\\t원본 프레임'
+    - 버퍼링 쓰기 (수신 루프에서 디스크 대기 없음), close() 시 flush
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if path.endswith(".gz"):
+            self._file = gzip.open(path, "at", encoding="utf-8")
+        else:
+            self._file = open(path, "a", encoding="utf-8", buffering=1024 * 1024)
+        self.frames = 0
+        logger.info(f"[CAPTURE] 원본 프레임 기록 → {path}")
+
+    def write(self, session_id: int, raw: str):
+        self._file.write(f"{time.time_ns() // 1000}\t{session_id}\t{raw}\n")
+        self.frames += 1
+
+    def close(self):
+        self._file.close()
+        logger.info(f"[CAPTURE] 기록 종료 → {self.path} ({self.frames}건)")
+
+
+def read_capture(path: str):
+    """
+    캡처 파일 → (수신시각 μs, 세션ID, 원본 프레임) 순회
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            ts, session_id, raw = line.rstrip("\n").split("\t", 2)
+            yield int(ts), int(session_id), raw
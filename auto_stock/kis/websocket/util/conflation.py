@@ -0,0 +1,58 @@
+import time
+from collections import Counter
+
+
+class ConflationBuffer:
+    """
+    (redis_prefix, tr_key) 별 최신값 1칸 버퍼
+    - put(): 같은 key 의 이전 값은 덮어쓰고 conflated 로 집계
+    - drain(): 모인 값 전체를 꺼내고 버퍼 교체 (flush 주기마다 1회)
+    → 출력(Redis 기록/발행) 건수는 시장 메시지 수가 아니라 종목 수에 비례
+    """
+
+    def __init__(self):
+        self._slots = {}  # {(redis_prefix, tr_key): parsed}
+        self.received = Counter()   # prefix 별 수신 tick 수
+        self.conflated = Counter()  # prefix 별 덮어써진(버려진) tick 수
+        self.drained = Counter()    # prefix 별 출력 tick 수
+        self._last_stats = (time.monotonic(), 0, 0)
+
+    def __len__(self):
+        return len(self._slots)
+
+    def put(self, redis_prefix: str, tr_key: str, parsed: dict):
+        key = (redis_prefix, tr_key)
+        if key in self._slots:
+            self.conflated[redis_prefix] += 1
+        self._slots[key] = parsed
+        self.received[redis_prefix] += 1
+
+    def drain(self) -> dict:
+        batch, self._slots = self._slots, {}
+        for redis_prefix, _ in batch:
+            self.drained[redis_prefix] += 1
+        return batch
+
+    def restore(self, batch: dict):
+        # 출력 실패분 복구 - 그 사이 들어온 더 최신 값이 있으면 유지
+        for key, parsed in batch.items():
+            self.drained[key[0]] -= 1
+            if key in self._slots:
+                self.conflated[key[0]] += 1
+            else:
+                self._slots[key] = parsed
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        received, drained = sum(self.received.values()), sum(self.drained.values())
+        last_at, last_received, last_drained = self._last_stats
+        elapsed = max(now - last_at, 1e-9)
+        self._last_stats = (now, received, drained)
+        return {
+            "received": dict(self.received),
+            "conflated": dict(self.conflated),
+            "written": dict(self.drained),
+            "received_per_sec": round((received - last_received) / elapsed, 1),
+            "written_per_sec": round((drained - last_drained) / elapsed, 1),
+            "buffered": len(self._slots),
+        }
@@ -0,0 +1,258 @@
+import os, time, random, asyncio, logging
+import websockets
+
+from kis.websocket.util.metrics import (
+    WS_RECONNECTS, WS_RECONNECT_FAILURES, WS_DOWNTIME_SECONDS, WS_RECOVERY_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+# KIS 는 세션 1개당 실시간 등록 건수를 제한하므로 여러 세션으로 나눠 등록
+WS_MAX_SUBSCRIPTIONS_PER_SESSION = int(os.getenv("WS_MAX_SUBSCRIPTIONS_PER_SESSION", "40"))
+WS_MAX_SESSIONS = int(os.getenv("WS_MAX_SESSIONS", "5"))
+
+# 재연결 대기 시간: min(MAX, BASE * 2^시도) 범위에서 무작위 (full jitter)
+WS_RECONNECT_BASE = float(os.getenv("WS_RECONNECT_BASE", "1"))
+WS_RECONNECT_MAX = float(os.getenv("WS_RECONNECT_MAX", "60"))
+
+
+class WsSession:
+    """
+    KIS WebSocket 세션 1개 + 해당 세션에 등록된 구독 목록
+    """
+
+    def __init__(self, session_id: int, ws):
+        self.session_id = session_id
+        self.ws = ws
+        self.keys = set()  # {(tr_id, tr_key)}
+        self.recv_task = None
+
+    @property
+    def load(self) -> int:
+        return len(self.keys)
+
+    @property
+    def closed(self) -> bool:
+        return self.ws.close_code is not None
+
+    async def send(self, message: str):
+        await self.ws.send(message)
+
+    def __repr__(self):
+        return f"WsSession#{self.session_id}(load={self.load})"
+
+
+class WsConnectionPool:
+    """
+    KIS WebSocket 세션 풀
+    - (tr_id, tr_key) 구독을 여유가 있는 세션 중 가장 적게 쓰는 세션에 배정
+    - 모든 세션이 가득 차면 새 세션을 연다 (최대 max_sessions)
+    - 세션이 끊기면 해당 세션의 구독을 남은 세션으로 재배정, 남은 구독은 대기
+    - 대기 구독은 supervise() 가 지수 백오프로 새 세션을 열어 다시 배정 (송신 큐로 재전송)
+    - 모든 세션의 수신 프레임은 on_frame(session, raw) 하나로 모인다
+    """
+
+    def __init__(self, url, on_frame, on_assign, on_reconnect=None,
+                 max_per_session=WS_MAX_SUBSCRIPTIONS_PER_SESSION, max_sessions=WS_MAX_SESSIONS,
+                 backoff_base=WS_RECONNECT_BASE, backoff_max=WS_RECONNECT_MAX):
+        self._url = url
+        self._on_frame = on_frame          # 공통 수신 처리
+        self._on_assign = on_assign        # 구독 배정 시 송신 큐 등록 (async)
+        self._on_reconnect = on_reconnect  # 재연결 시도 전 호출 (async, 승인키 갱신 등)
+        self._max_per_session = max_per_session
+        self._max_sessions = max_sessions
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._lock = asyncio.Lock()
+        self._next_id = 0
+        self._reconnect = asyncio.Event()
+
+        self.sessions = []
+        self.assignments = {}  # {(tr_id, tr_key): WsSession}
+        self.pending = set()   # 배정할 세션이 없어 대기 중인 구독
+
+        # 재연결 지표
+        self.reconnects = 0          # 재연결 성공 횟수
+        self.failed_attempts = 0     # 재연결 실패 횟수 (누적)
+        self.down_since = None       # 구독 유실 시작 시각 (monotonic)
+        self.last_downtime = None    # 유실 → 새 세션 연결까지 (초)
+        self.last_recovery = None    # 유실 → 대기 구독 전부 재배정까지 (초)
+
+    # ------------------ 세션 관리 ------------------
+    async def open(self):
+        async with self._lock:
+            return await self._open_session()
+
+    async def start(self):
+        # 최초 세션 연결 (실패 시 supervise() 가 백오프로 재시도)
+        try:
+            await self.open()
+        except Exception as e:
+            logger.error(f"[POOL] 최초 연결 실패 → 재연결 대기: {e}")
+            self._mark_down()
+
+    async def _open_session(self) -> WsSession:
+        ws = await websockets.connect(self._url)
+        session = WsSession(self._next_id, ws)
+        self._next_id += 1
+
+        session.recv_task = asyncio.create_task(self._recv_loop(session))
+        self.sessions.append(session)
+        logger.info(f"[POOL] 세션 연결 → {session} (총 {len(self.sessions)}개)")
+        return session
+
+    async def close(self):
+        for session in list(self.sessions):
+            if session.recv_task:
+                session.recv_task.cancel()
+            await session.ws.close()
+        self.sessions.clear()
+
+    async def _recv_loop(self, session: WsSession):
+        try:
+            async for raw in session.ws:
+                try:
+                    self._on_frame(session, raw)
+                except Exception as e:
+                    logger.error(f"[POOL] 프레임 처리 오류 ({session}): {e}")
+        except websockets.ConnectionClosed as e:
+            logger.error(f"[POOL] 세션 종료 ({session}): {e}")
+        except Exception as e:
+            logger.error(f"[POOL] 수신 오류 ({session}): {e}")
+
+        await self._handle_session_closed(session)
+
+    async def _handle_session_closed(self, session: WsSession):
+        async with self._lock:
+            if session in self.sessions:
+                self.sessions.remove(session)
+
+            orphaned = list(session.keys)
+            session.keys.clear()
+            for key in orphaned:
+                self.assignments.pop(key, None)
+
+            # 남은 세션 여유분에만 즉시 재배정, 새 세션은 supervise() 가 백오프로 연다
+            logger.warning(f"[POOL] 세션 {session.session_id} 구독 {len(orphaned)}건 재배정")
+            for key in orphaned:
+                await self._assign_locked(key, open_new=False)
+
+            if self.pending or not self.sessions:
+                self._mark_down()
+
+    def _mark_down(self):
+        if self.down_since is None:
+            self.down_since = time.monotonic()
+        self._reconnect.set()
+
+    # ------------------ 재연결 ------------------
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self._backoff_max, self._backoff_base * (2 ** attempt)))
+
+    async def supervise(self, stop_event: asyncio.Event):
+        """
+        세션 유실/연결 실패 시 재연결 루프
+        - 지수 백오프 + jitter 로 새 세션 연결
+        - 연결 후 대기 구독 전부 재배정 (on_assign → 송신 큐)
+        """
+        while not stop_event.is_set():
+            try:
+                await asyncio.wait_for(self._reconnect.wait(), timeout=1)
+            except asyncio.TimeoutError:
+                continue
+            self._reconnect.clear()
+
+            attempt = 0
+            while not stop_event.is_set() and (self.pending or not self.sessions):
+                try:
+                    if self._on_reconnect:
+                        await self._on_reconnect(attempt)
+                    async with self._lock:
+                        if not any(not s.closed for s in self.sessions):
+                            await self._open_session()
+                            self.reconnects += 1
+                            WS_RECONNECTS.inc()
+                            if self.down_since is not None:
+                                self.last_downtime = round(time.monotonic() - self.down_since, 3)
+                                WS_DOWNTIME_SECONDS.observe(self.last_downtime)
+                        for key in list(self.pending):
+                            if await self._assign_locked(key) is None and len(self.sessions) < self._max_sessions:
+                                raise ConnectionError("세션 추가 연결 실패")
+                except Exception as e:
+                    self.failed_attempts += 1
+                    WS_RECONNECT_FAILURES.inc()
+                    delay = self._backoff(attempt)
+                    attempt += 1
+                    logger.error(f"[POOL] 재연결 실패 ({attempt}회) → {delay:.1f}초 후 재시도: {e}")
+                    await asyncio.sleep(delay)
+                    continue
+
+                if self.pending:
+                    # 세션 한도 초과로 남은 대기 구독 → 세션이 비거나 끊길 때까지 대기
+                    break
+
+            if not self.pending and self.down_since is not None:
+                self.last_recovery = round(time.monotonic() - self.down_since, 3)
+                WS_RECOVERY_SECONDS.observe(self.last_recovery)
+                logger.info(
+                    f"[POOL] 재연결 완료 → 중단 {self.last_downtime}초 / 복구 {self.last_recovery}초"
+                )
+                self.down_since = None
+
+    # ------------------ 구독 배정 ------------------
+    async def assign(self, key):
+        # 연결 장애 중에는 새 세션을 열지 않고 대기 (supervise() 가 재배정)
+        async with self._lock:
+            return await self._assign_locked(key, open_new=self.down_since is None)
+
+    async def _assign_locked(self, key, open_new=True):
+        if key in self.assignments:
+            return self.assignments[key]
+
+        candidates = [s for s in self.sessions if not s.closed and s.load < self._max_per_session]
+        session = min(candidates, key=lambda s: s.load, default=None)
+
+        if session is None:
+            if len(self.sessions) >= self._max_sessions:
+                logger.warning(f"[POOL] 세션/구독 한도 초과 → {key} 대기")
+                self.pending.add(key)
+                return None
+            if not open_new:
+                self.pending.add(key)
+                return None
+            try:
+                session = await self._open_session()
+            except Exception as e:
+                logger.error(f"[POOL] 세션 연결 실패 → {key} 대기: {e}")
+                self.pending.add(key)
+                self._mark_down()
+                return None
+
+        self.pending.discard(key)
+        session.keys.add(key)
+        self.assignments[key] = session
+        await self._on_assign(key, session)
+        return session
+
+    async def release(self, key):
+        # 구독 해제: 배정된 세션 반환 (해당 세션으로 해제 메시지 전송)
+        async with self._lock:
+            self.pending.discard(key)
+            session = self.assignments.pop(key, None)
+            if session:
+                session.keys.discard(key)
+                # 한도 초과로 대기 중인 구독이 있으면 빈 자리에 배정
+                if self.pending:
+                    self._reconnect.set()
+            return session
+
+    def stats(self) -> dict:
+        return {
+            "sessions": {s.session_id: s.load for s in self.sessions},
+            "pending": len(self.pending),
+            "reconnects": self.reconnects,
+            "failed_attempts": self.failed_attempts,
+            "down_for": round(time.monotonic() - self.down_since, 3) if self.down_since else 0,
+            "last_downtime": self.last_downtime,
+            "last_recovery": self.last_recovery,
+        }
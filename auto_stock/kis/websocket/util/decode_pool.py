@@ -0,0 +1,124 @@
+import os, queue, asyncio, logging
+import multiprocessing as mp
+
+from kis.websocket.parser.frame_decoder import frame_symbol
+from kis.websocket.util.decode_worker import decode_worker_main
+from kis.websocket.util.redis_writer import REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+# 디코딩 프로세스 수 (0 = 수신 루프에서 직접 디코딩)
+WS_DECODE_WORKERS = int(os.getenv("WS_DECODE_WORKERS", "0"))
+WS_DECODE_QUEUE_SIZE = int(os.getenv("WS_DECODE_QUEUE_SIZE", "10000"))  # 프로세스별 대기 묶음 수
+
+
+class DecodePool:
+    """
+    수신 프레임 디코딩/기록을 별도 프로세스로 분산
+    - 수신 루프는 submit(raw) 로 원본 프레임만 넘긴다 (디코딩/JSON/Redis 작업 없음)
+    - 같은 종목은 항상 같은 프로세스로 보내 tick 순서 유지 (첫 레코드 종목 기준)
+    - 같은 이벤트 루프 차례에 들어온 프레임은 묶어서 한 번에 전달 (pickle 횟수 감소)
+    - 구독 등록/해제도 같은 flush 에서 프레임보다 먼저 비블로킹 전달 (이벤트 루프를 막지 않음, 순서 유지)
+    - 워커 진입점은 부수 효과 없는 decode_worker 모듈 (spawn 자식이 Django/Redis/signal 초기화를 반복하지 않음)
+    - 각 프로세스는 자체 RedisTickWriter 로 conflation + 기록/발행
+    - 체결 통보는 결과 큐로 메인 프로세스에 돌려준다 (DB 처리는 메인의 워커 풀)
+    """
+
+    def __init__(self, workers=WS_DECODE_WORKERS, on_exec=None, redis_url=REDIS_URL,
+                 queue_size=WS_DECODE_QUEUE_SIZE, target=decode_worker_main):
+        ctx = mp.get_context("spawn")
+        self._workers = workers
+        self._on_exec = on_exec
+        self._frames = [ctx.Queue(maxsize=queue_size) for _ in range(workers)]
+        self._results = ctx.Queue()
+        self._procs = [
+            ctx.Process(target=target, args=(i, self._frames[i], self._results, redis_url),
+                        name=f"ws-decode-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        self._buffers = [[] for _ in range(workers)]
+        self._controls = [[] for _ in range(workers)]  # 프로세스별 미전달 구독 변경 (전달 순서대로)
+        self._flush_scheduled = False
+
+        self.submitted = 0
+        self.dropped = 0
+        self.worker_stats = {}
+
+    def start(self):
+        for proc in self._procs:
+            proc.start()
+        logger.info(f"[DECODE] 디코딩 프로세스 {self._workers}개 시작")
+
+    def stop(self):
+        self.flush()
+        for frames in self._frames:
+            frames.put(None)
+        for proc in self._procs:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+
+    def register(self, tr_id: str, tr_key: str, redis_prefix: str):
+        # 모든 프로세스에 (tr_id, 종목) → prefix 등록 전달 (다음 flush 에서 프레임보다 먼저)
+        self._control("register", (tr_id, tr_key, redis_prefix))
+
+    def unregister(self, tr_id: str, tr_key: str):
+        # 구독 해제 → 모든 프로세스에서 prefix / 호가 잔량 제거
+        self._control("unregister", (tr_id, tr_key))
+
+    def _control(self, kind: str, item: tuple):
+        for controls in self._controls:
+            # 같은 종류가 이어지면 한 메시지로 묶는다
+            if controls and controls[-1][0] == kind:
+                controls[-1][1].append(item)
+            else:
+                controls.append((kind, [item]))
+        self._schedule_flush()
+
+    def submit(self, raw: str):
+        self._buffers[hash(frame_symbol(raw)) % self._workers].append(raw)
+        self.submitted += 1
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self.flush)
+
+    def flush(self):
+        self._flush_scheduled = False
+        for i in range(self._workers):
+            controls, buffer = self._controls[i], self._buffers[i]
+            self._buffers[i] = []
+            try:
+                while controls:
+                    self._frames[i].put_nowait(controls[0])
+                    controls.pop(0)
+                if buffer:
+                    self._frames[i].put_nowait(buffer)
+            except queue.Full:
+                # 구독 변경은 남겨 두고 다음 flush(다음 수신 프레임) 에서 재시도 (등록 전 프레임은 prefix 를 몰라 함께 유실)
+                self.dropped += len(buffer)
+                logger.error(f"[DECODE] 프로세스 {i} 대기열 초과 → 프레임 {len(buffer)}건 유실")
+
+    async def drain_results(self, stop_event: asyncio.Event):
+        # 워커 결과 수신 (체결 통보 / 통계)
+        loop = asyncio.get_running_loop()
+        while not stop_event.is_set():
+            try:
+                kind, worker_id, data = await loop.run_in_executor(None, self._results.get, True, 1)
+            except queue.Empty:
+                continue
+
+            if kind == "exec" and self._on_exec:
+                self._on_exec(data)
+            elif kind == "stats":
+                self.worker_stats[worker_id] = data
+
+    def stats(self) -> dict:
+        return {
+            "workers": self._workers,
+            "submitted": self.submitted,
+            "dropped": self.dropped,
+            "per_worker": self.worker_stats,
+        }
@@ -0,0 +1,100 @@
+"""
+디코딩 프로세스 진입점 (DecodePool 이 spawn 으로 실행)
+- spawn 자식은 target 모듈을 import 하므로 이 모듈은 import 시 부수 효과가 없어야 한다
+  (django.setup / Redis 연결 / signal 등록 금지)
+"""
+import time, queue, signal, asyncio
+
+from kis.websocket.parser.frame_decoder import iter_records, get_prefix, register_prefix, unregister_prefix, PREFIX_DECODERS
+from kis.websocket.util.depth_book import DepthBook
+from kis.websocket.util.redis_writer import RedisTickWriter, REDIS_URL
+
+DECODE_STATS_INTERVAL = 5  # 워커 → 메인 통계 보고 주기(초)
+
+
+## 프레임 1개 디코딩 → sink.put(prefix, tr_key, parsed) (체결은 on_exec 로 별도 전달)
+def decode_frame(raw: str, sink, books: dict, on_exec) -> int:
+    records = 0
+    for tr_id, fields, base in iter_records(raw):
+        tr_key = fields[base]
+        redis_prefix = get_prefix(tr_id, tr_key)
+        decoder = PREFIX_DECODERS.get(redis_prefix)
+        parsed = decoder(tr_id, fields, base) if decoder else None
+        if not parsed:
+            continue
+
+        if redis_prefix == "exec":
+            on_exec(parsed)
+        elif redis_prefix == "depth":
+            book = books.get(tr_key)
+            if book is None:
+                book = books[tr_key] = DepthBook()
+            if not book.update(parsed["ladder"]):
+                continue
+
+        sink.put(redis_prefix, tr_key, parsed)
+        records += 1
+    return records
+
+
+def _get_batch(frames):
+    # 첫 묶음은 블로킹 대기, 이후 쌓인 묶음은 대기 없이 함께 처리
+    batches = [frames.get()]
+    try:
+        while len(batches) < 64:
+            batches.append(frames.get_nowait())
+    except queue.Empty:
+        pass
+    return batches
+
+
+def apply_control(message: tuple, books: dict):
+    # 메인 프로세스 구독 변경 반영
+    # - ("register", [(tr_id, tr_key, redis_prefix), ...])
+    # - ("unregister", [(tr_id, tr_key), ...]) → prefix 와 호가 잔량 제거 (재구독 첫 스냅샷이 변화 없음으로 버려지지 않도록)
+    kind, items = message
+    for item in items:
+        if kind == "register":
+            register_prefix(*item)
+        elif kind == "unregister":
+            unregister_prefix(*item)
+            books.pop(item[1], None)
+
+
+async def _worker_loop(worker_id, frames, results, redis_url):
+    loop = asyncio.get_running_loop()
+    stop_event = asyncio.Event()
+    writer = RedisTickWriter(redis_url)
+    writer_task = asyncio.create_task(writer.run(stop_event))
+    books = {}
+    on_exec = lambda parsed: results.put(("exec", worker_id, parsed))
+
+    frames_done = records = 0
+    reported_at = time.monotonic()
+    running = True
+    while running:
+        for batch in await loop.run_in_executor(None, _get_batch, frames):
+            if batch is None:
+                running = False
+                break
+            if isinstance(batch, tuple):
+                apply_control(batch, books)
+                continue
+            for raw in batch:
+                records += decode_frame(raw, writer, books, on_exec)
+            frames_done += len(batch)
+
+        now = time.monotonic()
+        if now - reported_at >= DECODE_STATS_INTERVAL:
+            results.put(("stats", worker_id, {"frames": frames_done, "records": records, "ticks": writer.stats()}))
+            reported_at = now
+
+    stop_event.set()
+    await writer_task
+    await writer.close()
+
+
+def decode_worker_main(worker_id, frames, results, redis_url=REDIS_URL):
+    # 종료는 메인 프로세스가 None 을 넣어 알린다
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(_worker_loop(worker_id, frames, results, redis_url))
@@ -0,0 +1,24 @@
+from array import array
+
+from kis.constants.const_realtime import DEPTH_SLOTS
+
+
+class DepthBook:
+    """
+    종목 1개의 10단계 호가 잔량 (고정 크기 배열, 제자리 갱신)
+    - update(): 바뀐 칸만 덮어쓰고 변경 여부 반환 → 변화 없는 호가 프레임은 기록/발행 생략
+    """
+
+    __slots__ = ("ladder",)
+
+    def __init__(self):
+        self.ladder = array("q", bytes(8 * DEPTH_SLOTS))
+
+    def update(self, values: list) -> bool:
+        ladder = self.ladder
+        changed = False
+        for i, value in enumerate(values[:DEPTH_SLOTS]):
+            if ladder[i] != value:
+                ladder[i] = value
+                changed = True
+        return changed
@@ -0,0 +1,86 @@
+import os, queue, logging, threading
+from concurrent.futures import ThreadPoolExecutor
+from django.db import close_old_connections
+
+from trading.services.save_order_execution import save_execution_notices
+from trading.tasks.execution_notice import process_execution_notices, retry_unmatched_notices
+
+logger = logging.getLogger(__name__)
+
+EXEC_QUEUE_SIZE = int(os.getenv("EXEC_QUEUE_SIZE", "1000"))
+EXEC_WORKERS = int(os.getenv("EXEC_WORKERS", "2"))
+EXEC_BATCH_SIZE = int(os.getenv("EXEC_BATCH_SIZE", "50"))
+
+
+class ExecutionWorkerPool:
+    """
+    체결 통보 DB 처리 워커 풀
+    - 수신 루프는 submit() 으로 큐에 넣기만 하고 즉시 반환 (ORM 작업으로 이벤트 루프 블로킹 방지)
+    - 워커 스레드가 큐에서 최대 batch_size 건씩 꺼내 한 번에 DB 반영
+    - 큐가 가득 찬 경우 celery 태스크로 넘겨 유실 방지 (broker 전송은 전용 스레드에서 - 수신 루프 블로킹 방지)
+    - 체결 기록이 아직 없는 통보는 celery 로 지연 재시도
+    """
+
+    def __init__(self, workers=EXEC_WORKERS, maxsize=EXEC_QUEUE_SIZE, batch_size=EXEC_BATCH_SIZE):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._workers = workers
+        self._batch_size = batch_size
+        self._threads = []
+        self._stopped = threading.Event()
+        self._overflow = ThreadPoolExecutor(max_workers=1, thread_name_prefix="exec-overflow")
+
+    def start(self):
+        for i in range(self._workers):
+            thread = threading.Thread(target=self._run, name=f"exec-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"[EXEC] 체결 처리 워커 {self._workers}개 시작")
+
+    def stop(self):
+        self._stopped.set()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._overflow.shutdown(wait=True)
+
+    def submit(self, parsed: dict):
+        try:
+            self._queue.put_nowait(parsed)
+        except queue.Full:
+            logger.warning("[EXEC] 체결 처리 큐 가득 참 → celery 로 전달")
+            self._overflow.submit(self._hand_off, parsed)
+
+    @staticmethod
+    def _hand_off(parsed: dict):
+        try:
+            process_execution_notices.delay([parsed])
+        except Exception as e:
+            logger.error(f"[EXEC] celery 전달 실패 → 체결 통보 유실 {parsed}: {e}")
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def _next_batch(self) -> list:
+        try:
+            batch = [self._queue.get(timeout=1)]
+        except queue.Empty:
+            return []
+
+        while len(batch) < self._batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not (self._stopped.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if not batch:
+                continue
+
+            close_old_connections()
+            try:
+                _, unmatched = save_execution_notices(batch)
+                retry_unmatched_notices(unmatched)
+            except Exception as e:
+                logger.error(f"[EXEC] 체결 처리 실패 ({len(batch)}건): {e}")
@@ -1,4 +1,9 @@
-import os, time, json, redis, logging
+import os, time, json, redis, asyncio, logging
+import redis.asyncio as aioredis
+
+from kis.websocket.util.tick_channel import LIVE_SUBSCRIPTIONS_KEY, tick_channel, tick_history_key
+from kis.websocket.util.tick_codec import decode_tick
+from kis.websocket.util.subscription_lease import SubscriptionLeases
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.DEBUG)
@@ -6,6 +11,16 @@ logging.basicConfig(level=logging.DEBUG)
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
 r = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+r_tick = redis.Redis.from_url(REDIS_URL)  # tick 값 조회용 (binary, tick_codec)
+
+_r_async = None  # Consumer(이벤트 루프)용 - 최초 사용 시 생성
+
+
+def _get_async_redis():
+    global _r_async
+    if _r_async is None:
+        _r_async = aioredis.Redis.from_url(REDIS_URL)
+    return _r_async
 
 
 def publish_subscription_request(tr_id: str, tr_key: str, sub_type: str):
@@ -19,40 +34,233 @@ def publish_subscription_request(tr_id: str, tr_key: str, sub_type: str):
     r.publish("subscribe.add", json.dumps(payload))
 
 
-def subscribe_and_get_data(tr_id: str, tr_key: str, redis_prefix: str, timeout=10):
+def publish_subscription_requests(tr_id: str, tr_keys: list, sub_type: str, action="subscribe"):
+    """
+    여러 종목 구독 요청을 한 번의 publish 로 전달 (관심 종목 일괄 등록)
+    action
+    - subscribe: 참조 없는 구독 (유휴 시간 경과 후 자동 해제)
+    - acquire / release: Consumer 연결/종료 시 참조 증감 (프로세스 단위 lease, heartbeat 로 갱신)
+    """
+    holder = None
+    if action == "acquire":
+        tr_keys, holder = leases.acquire(tr_id, tr_keys, sub_type), leases.holder
+    elif action == "release":
+        tr_keys, holder = leases.release(tr_id, tr_keys, sub_type), leases.holder
+    if not tr_keys:
+        return
+    _publish_subscription(tr_id, tr_keys, sub_type, action, holder)
+
+
+def _publish_subscription(tr_id, tr_keys, sub_type, action, holder=None):
+    r.publish("subscribe.add", _subscription_message(tr_id, tr_keys, sub_type, action, holder))
+
+
+def _subscription_message(tr_id, tr_keys, sub_type, action, holder=None) -> str:
+    payload = {
+        "action": action,
+        "items": [{"tr_id": tr_id, "tr_key": tr_key, "type": sub_type} for tr_key in tr_keys],
+    }
+    if holder:
+        payload["holder"] = holder
+    logger.debug(f"[SUB] 구독 일괄 요청({action}) → {sub_type} {len(tr_keys)}건")
+    return json.dumps(payload)
+
+
+# 이 프로세스의 구독 참조 (acquire / release 합산 + 주기적 lease 갱신)
+leases = SubscriptionLeases(_publish_subscription)
+
+
+def _decode(value, redis_key):
+    try:
+        return decode_tick(value)
+    except ValueError:
+        logger.warning(f"[ERROR] 데이터 형식 오류 ({redis_key}): {value!r}")
+        return None
+
+
+def subscribe_and_get_data(tr_id: str, tr_key: str, redis_prefix: str, timeout=10, publish=True):
     redis_key = f"{redis_prefix}:{tr_key}"
     logger.debug(f"[SUB] redis 구독 저장 → {redis_key}")
 
-    # 1. 기존 데이터 우선 확인
-    cached = r.get(redis_key)
+    # 1. 기존 데이터 우선 확인 (구독 해제된 종목은 캐시를 돌려주면서 재구독 요청)
+    pipe = r_tick.pipeline(transaction=False)
+    pipe.get(redis_key)
+    pipe.sismember(LIVE_SUBSCRIPTIONS_KEY, redis_key)
+    cached, is_live = pipe.execute()
     if cached:
         try:
-            logger.debug(f"[SUB] redis 구독 저장 → {cached}")
-            return json.loads(cached)
-        except json.JSONDecodeError:
-            logger.warning(f"[ERROR] 캐시된 데이터가 유효한 JSON이 아닙니다: {cached}")
+            data = decode_tick(cached)
+            logger.debug(f"[SUB] redis 구독 저장 → {data}")
+            if publish and not is_live:
+                publish_subscription_request(tr_id, tr_key, redis_prefix)
+            return data
+        except ValueError:
+            logger.warning(f"[ERROR] 캐시된 데이터 형식 오류: {cached!r}")
             pass
 
-    # 2. WebSocket 구독 요청
-    logger.info(f"[SUB_REQ] 새 데이터 구독 요청 시작: {redis_key}")
-    publish_subscription_request(tr_id, tr_key, redis_prefix)
+    # 2. WebSocket 구독 요청 (publish=False 는 호출 측에서 이미 일괄 요청한 경우)
+    if publish:
+        logger.info(f"[SUB_REQ] 새 데이터 구독 요청 시작: {redis_key}")
+        publish_subscription_request(tr_id, tr_key, redis_prefix)
+
+    # 3. tick 채널 발행을 기다림 (polling 없음)
+    return wait_for_ticks(redis_prefix, [tr_key], timeout).get(tr_key)
+
+
+def wait_for_ticks(redis_prefix: str, tr_keys: list, timeout=10) -> dict:
+    """
+    여러 종목의 첫 tick 을 동시에 기다림 → {tr_key: data} (시간 내 못 받은 종목은 제외)
+    - tick 채널(tick:{prefix}:{key}) 을 먼저 구독한 뒤 MGET → 그 사이 기록된 값도 놓치지 않음
+    - 대기 시간은 종목 수와 무관하게 최대 timeout 초
+    """
+    tr_keys = list(dict.fromkeys(tr_keys))
+    if not tr_keys:
+        return {}
+
+    start = time.monotonic()
+    channels = {tick_channel(redis_prefix, tr_key).encode(): tr_key for tr_key in tr_keys}
+    pubsub = r_tick.pubsub(ignore_subscribe_messages=True)
+    try:
+        pubsub.subscribe(*channels)
+        results = {}
+        for tr_key, value in zip(tr_keys, r_tick.mget([f"{redis_prefix}:{k}" for k in tr_keys])):
+            if value and (data := _decode(value, f"{redis_prefix}:{tr_key}")):
+                results[tr_key] = data
+
+        while len(results) < len(tr_keys):
+            remaining = timeout - (time.monotonic() - start)
+            if remaining <= 0:
+                break
+            message = pubsub.get_message(timeout=remaining)
+            if not message or message["type"] != "message":
+                continue
+            tr_key = channels.get(message["channel"])
+            if tr_key and tr_key not in results and (data := _decode(message["data"], tr_key)):
+                results[tr_key] = data
+    finally:
+        pubsub.close()
+
+    _log_wait(redis_prefix, tr_keys, results, start)
+    return results
+
+
+def _log_wait(redis_prefix, tr_keys, results, start):
+    elapsed = round(time.monotonic() - start, 2)
+    missing = [k for k in tr_keys if k not in results]
+    if missing:
+        logger.warning(f"[TIMEOUT] 데이터를 찾지 못하고 종료됨 ({elapsed}초): {redis_prefix} {missing}")
+    else:
+        logger.debug(f"[RECEIVE] 데이터 수신 성공 ({elapsed}초 대기) → {redis_prefix} {len(results)}건")
+
+
+def subscribe_and_get_many(tr_id: str, tr_keys: list, redis_prefix: str, timeout=10, publish=True) -> dict:
+    """
+    여러 종목 조회: 캐시/구독 상태 1회 확인 → 미구독 종목 일괄 구독 요청 → 캐시 없는 종목만 동시에 대기
+    반환: {tr_key: data} (시간 내 못 받은 종목은 제외)
+    """
+    tr_keys = list(dict.fromkeys(tr_keys))
+    if not tr_keys:
+        return {}
+
+    redis_keys = [f"{redis_prefix}:{tr_key}" for tr_key in tr_keys]
+    pipe = r_tick.pipeline(transaction=False)
+    pipe.mget(redis_keys)
+    pipe.smismember(LIVE_SUBSCRIPTIONS_KEY, redis_keys)
+    values, live = pipe.execute()
+
+    results = {}
+    for tr_key, value in zip(tr_keys, values):
+        if value and (data := _decode(value, f"{redis_prefix}:{tr_key}")):
+            results[tr_key] = data
+
+    if publish:
+        publish_subscription_requests(
+            tr_id, [k for k, v, is_live in zip(tr_keys, values, live) if not v or not is_live], redis_prefix,
+        )
+
+    missing = [tr_key for tr_key in tr_keys if tr_key not in results]
+    if missing:
+        results.update(wait_for_ticks(redis_prefix, missing, timeout))
+    return results
+
+
+# ------------------ async (Channels Consumer) ------------------
+async def wait_for_ticks_async(redis_prefix: str, tr_keys: list, timeout=10) -> dict:
+    """
+    wait_for_ticks 의 async 버전 (이벤트 루프를 막지 않음)
+    """
+    tr_keys = list(dict.fromkeys(tr_keys))
+    if not tr_keys:
+        return {}
+
+    redis_async = _get_async_redis()
+    start = time.monotonic()
+    channels = {tick_channel(redis_prefix, tr_key).encode(): tr_key for tr_key in tr_keys}
+    pubsub = redis_async.pubsub(ignore_subscribe_messages=True)
+    try:
+        await pubsub.subscribe(*channels)
+        results = {}
+        for tr_key, value in zip(tr_keys, await redis_async.mget([f"{redis_prefix}:{k}" for k in tr_keys])):
+            if value and (data := _decode(value, f"{redis_prefix}:{tr_key}")):
+                results[tr_key] = data
 
-    # 3. Redis에서 데이터 기다리기
-    start = time.time() 
-    while time.time() - start < timeout:
-        val = r.get(redis_key)
-        if val:
+        while len(results) < len(tr_keys):
+            remaining = timeout - (time.monotonic() - start)
+            if remaining <= 0:
+                break
             try:
-                data = json.loads(val)
-                elapsed = round(time.time() - start, 2)
-                logger.debug(f"[RECEIVE] 데이터 수신 성공 ({elapsed}초 대기) → {val}")
-                return data
-            except json.JSONDecodeError:
-                logger.warning(f"[ERROR] 데이터가 유효한 JSON이 아닙니다: {val}")
-                pass
-        time.sleep(0.2)
-    logger.warning(f"[TIMEOUT] 데이터를 찾지 못하고 종료됨: {redis_key}")
-    return None
+                message = await asyncio.wait_for(pubsub.get_message(timeout=remaining), remaining + 1)
+            except asyncio.TimeoutError:
+                break
+            if not message or message["type"] != "message":
+                continue
+            tr_key = channels.get(message["channel"])
+            if tr_key and tr_key not in results and (data := _decode(message["data"], tr_key)):
+                results[tr_key] = data
+    finally:
+        await pubsub.aclose()
+
+    _log_wait(redis_prefix, tr_keys, results, start)
+    return results
+
+
+async def subscribe_and_get_many_async(tr_id: str, tr_keys: list, redis_prefix: str, timeout=10, publish=True) -> dict:
+    """
+    subscribe_and_get_many 의 async 버전
+    """
+    tr_keys = list(dict.fromkeys(tr_keys))
+    if not tr_keys:
+        return {}
+
+    redis_async = _get_async_redis()
+    redis_keys = [f"{redis_prefix}:{tr_key}" for tr_key in tr_keys]
+    pipe = redis_async.pipeline(transaction=False)
+    pipe.mget(redis_keys)
+    pipe.smismember(LIVE_SUBSCRIPTIONS_KEY, redis_keys)
+    values, live = await pipe.execute()
+
+    results = {}
+    for tr_key, value in zip(tr_keys, values):
+        if value and (data := _decode(value, f"{redis_prefix}:{tr_key}")):
+            results[tr_key] = data
+
+    unsubscribed = [k for k, v, is_live in zip(tr_keys, values, live) if not v or not is_live]
+    if publish and unsubscribed:
+        await redis_async.publish(
+            "subscribe.add", _subscription_message(tr_id, unsubscribed, redis_prefix, "subscribe"),
+        )
+
+    missing = [tr_key for tr_key in tr_keys if tr_key not in results]
+    if missing:
+        results.update(await wait_for_ticks_async(redis_prefix, missing, timeout))
+    return results
+
+
+async def subscribe_and_get_data_async(tr_id: str, tr_key: str, redis_prefix: str, timeout=10, publish=True):
+    """
+    subscribe_and_get_data 의 async 버전
+    """
+    return (await subscribe_and_get_many_async(tr_id, [tr_key], redis_prefix, timeout, publish)).get(tr_key)
 
 
 def get_cached_data(tr_key: str, redis_prefix: str):
@@ -60,10 +268,29 @@ def get_cached_data(tr_key: str, redis_prefix: str):
     구독 요청 없이 Redis에 캐시된 데이터만 조회
     """
     redis_key = f"{redis_prefix}:{tr_key}"
-    cached = r.get(redis_key)
+    cached = r_tick.get(redis_key)
     if cached:
         try:
-            return json.loads(cached)
-        except json.JSONDecodeError:
+            return decode_tick(cached)
+        except ValueError:
             pass
-    return None
\ No newline at end of file
+    return None
+
+
+def get_tick_history(tr_key: str, redis_prefix: str, minutes=10, count=None) -> list:
+    """
+    최근 N분 tick 이력 조회 (KIS 호출 없음, 오래된 순)
+    - stream ID(ms) 기준 범위 조회 → [{"ts": epoch_ms, ...tick}]
+    """
+    since_ms = int((time.time() - minutes * 60) * 1000)
+    entries = r_tick.xrange(tick_history_key(redis_prefix, tr_key), min=since_ms, max="+", count=count)
+
+    history = []
+    for entry_id, fields in entries:
+        try:
+            tick = decode_tick(fields[b"v"])
+        except (KeyError, ValueError):
+            continue
+        tick["ts"] = int(entry_id.split(b"-", 1)[0])
+        history.append(tick)
+    return history
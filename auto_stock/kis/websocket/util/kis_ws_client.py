@@ -1,29 +1,43 @@
-import os, asyncio, json, redis, signal, logging
-import websockets
+import os, time, asyncio, itertools, json, signal, logging
+import redis.asyncio as aioredis
 import django, dotenv
 
 dotenv.load_dotenv(".env")
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "auto_stock.settings")
 django.setup()
 
-from trading.models import OrderRequest
-from trading.services.save_order_execution import save_execution_data
-
 from kis.auth.kis_ws_key import get_web_socket_key
-from kis.websocket.parser.quote_parser import parse_quote
-from kis.websocket.parser.price_parser import parse_price
-from kis.websocket.parser.index_parser import parse_index
-from kis.websocket.parser.execution_parser import parse_exec
+from kis.websocket.parser.frame_decoder import iter_records, is_pipe_frame, PREFIX_DECODERS
+from kis.websocket.util.execution_worker import ExecutionWorkerPool
+from kis.websocket.util.redis_writer import RedisTickWriter
+from kis.websocket.util.connection_pool import WsConnectionPool
+from kis.websocket.util.subscription_registry import SubscriptionRegistry
+from kis.websocket.util.token_bucket import TokenBucket
+from kis.websocket.util.depth_book import DepthBook
+from kis.websocket.util.decode_pool import DecodePool, WS_DECODE_WORKERS
+from kis.websocket.util.capture import FrameCapture, WS_CAPTURE_FILE
+from trading.services.open_positions import open_position_symbols
+from kis.websocket.util.metrics import (
+    WS_FRAMES, WS_RECORDS, WS_PARSE_SECONDS, WS_EXCHANGE_LAG_SECONDS,
+    SEND_QUEUE_DEPTH, LIVE_SUBSCRIPTIONS, WS_SESSIONS,
+    child, exchange_lag, start_metrics_server,
+)
+from kis.websocket.util.tick_channel import LIVE_SUBSCRIPTIONS_KEY, SUBSCRIPTION_STATS_KEY
 
 
 # ------------------ 환경 변수 ------------------
 WS_BASE_URL_REAL = os.getenv("WS_BASE_URL_REAL")
 CUST_TYPE = os.getenv("CUST_TYPE")
-REDIS_TTL = 60 * 60 * 18
 REDIS_CHANNEL = "subscribe.add"
 
+SUBSCRIPTION_CHECK_INTERVAL = 10  # 유휴 구독 점검 / 통계 갱신 주기(초)
+OPEN_POSITION_REFRESH_INTERVAL = 60  # 보유 종목(우선 전송 구독) 갱신 주기(초)
+APPROVAL_REFRESH_MIN_INTERVAL = 30  # 승인키 강제 재발급 최소 간격(초)
+WS_APPROVAL_KEY = os.getenv("WS_APPROVAL_KEY")  # 고정 승인키 (재생 서버 등 오프라인 실행)
+WS_FRAME_LOG_SAMPLE = int(os.getenv("WS_FRAME_LOG_SAMPLE", "0"))  # N 프레임마다 1회 원본 DEBUG 출력 (0 = 끔)
+
 REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
-r = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+redis_async = aioredis.Redis.from_url(REDIS_URL, decode_responses=True)
 
 logging.basicConfig(
     level=logging.DEBUG,
@@ -35,215 +49,390 @@ logger.setLevel(logging.DEBUG)
 
 # ------------------ 글로벌 상태 ------------------
 stop_event = asyncio.Event()
-send_queue = asyncio.Queue()  # 소켓 구독 요청 저장 큐
-subscriptions = {}  # {(tr_id, tr_key): redis_prefix}
-shared_ws = None  # 하나의 웹 소켓 공유
+send_queue = asyncio.PriorityQueue()  # 소켓 구독 요청 저장 큐 [(우선순위, 순번, payload)]
+send_seq = itertools.count()  # 같은 우선순위 내 FIFO 보장
+send_bucket = TokenBucket()   # KIS 메시지 전송 한도 (WS_SEND_RATE / WS_SEND_BURST)
+subscriptions = SubscriptionRegistry()  # {(tr_id, tr_key): redis_prefix} + 참조 카운트
+ws_pool = None  # KIS WebSocket 세션 풀 (구독 한도 초과 시 세션 추가)
+approval_key = None  # 재연결 시 갱신
+approval_refreshed_at = 0.0
+execution_pool = ExecutionWorkerPool()  # 체결 통보 DB 처리 (수신 루프 밖에서 실행)
+tick_writer = RedisTickWriter()  # tick Redis 저장/발행 (비동기 일괄 전송)
+depth_books = {}  # {tr_key: DepthBook} 10단계 호가 (제자리 갱신)
+decode_pool = None  # WS_DECODE_WORKERS > 0 이면 디코딩/기록을 별도 프로세스에서 처리
+frame_seq = itertools.count()  # 원본 프레임 로그 샘플링
+frame_capture = None  # WS_CAPTURE_FILE 지정 시 원본 프레임 기록
+
+
+# 송신 우선순위 (작을수록 먼저 전송)
+SEND_PRIORITY_HIGH = 0  # 체결 통보 / 보유 종목
+SEND_PRIORITY_NORMAL = 1
+SEND_PRIORITY_LOW = 2   # 구독 해제
 
 
-# 체결 데이터 저장 작업
-def handle_execution(parsed):
+async def enqueue_send(payload, priority=SEND_PRIORITY_NORMAL):
+    await send_queue.put((priority, next(send_seq), payload))
+
+
+# ------------------ 구독 작업 ------------------
+async def subscribe_worker(tr_id, tr_key, redis_key_prefix, action="subscribe", holder=""):
     """
-    H0STCNI0 체결 데이터 처리:
-    - 체결 발생 시 OrderRequest 조회
-    - 체결 데이터 저장
-    - 상태 SELL_DONE 으로 변경
+    action
+    - subscribe: 참조 없는 구독 요청 (REST 조회 등) → 유휴 시간만 갱신
+    - acquire / release: 보유 프로세스(holder) 참조 등록/해제 - acquire 는 주기적으로 다시 와서 lease 갱신
     """
-    try:
-        order_no = parsed["order_no"]      # 주문번호
-        cntg_yn = parsed["cntg_yn"]        # 체결 여부 (1: 체결, 2: 정정/취소)
+    key = (tr_id, tr_key)
+    logger.debug(f"[SUB] 구독 요청 → {key} ({action})")
 
-        # 체결이 아닌 경우 무시
-        if cntg_yn != "1":
-            return
+    if action == "release":
+        subscriptions.release(key, holder)
+        return
 
-        # DB에서 주문 찾기
-        try:
-            order = OrderRequest.objects.get(kis_order_id=order_no)
-        except OrderRequest.DoesNotExist:
-            logger.warning(f"[EXEC] 주문번호 {order_no} 에 해당하는 OrderRequest 없음")
-            return
+    if action == "acquire":
+        is_new = subscriptions.acquire(key, redis_key_prefix, holder)
+    else:
+        is_new = subscriptions.touch(key, redis_key_prefix)
 
-        logger.info(f"[EXEC] 매도 체결 발생 → 주문번호 {order_no}")
+    if not is_new:
+        logger.debug(f"[SUB] 이미 등록된 구독: {key}")
+        return
 
-        # 체결 정보 저장
-        save_execution_data(order, {
-            "EXEC_QTY": parsed["qty"],
-            "EXEC_PRICE": parsed["price"],
-            "EXEC_TIME": parsed["time"],
-        }, "SELL")
+    if decode_pool:
+        decode_pool.register(tr_id, tr_key, redis_key_prefix)
+    await redis_async.sadd(LIVE_SUBSCRIPTIONS_KEY, f"{redis_key_prefix}:{tr_key}")
+    logger.debug(f"[SUB] 구독 요청 → {redis_key_prefix}:{tr_key}")
 
-        # 상태 업데이트
-        order.status = "SELL_DONE"
-        order.save()
+    # 세션 배정 → on_session_assign 에서 송신 큐 등록
+    session = await ws_pool.assign(key)
+    if session is None:
+        logger.warning(f"[SUB] 배정 가능한 세션 없음 (대기) → {redis_key_prefix}:{tr_key}")
+
+
+# 구독 해제 (tr_type=2) 전송
+async def unsubscribe_worker(key):
+    tr_id, tr_key = key
+    redis_prefix = subscriptions.get(key)
+    subscriptions.remove(key)
+    if redis_prefix == "depth":
+        depth_books.pop(tr_key, None)
+    if decode_pool:
+        decode_pool.unregister(tr_id, tr_key)
+    await redis_async.srem(LIVE_SUBSCRIPTIONS_KEY, f"{redis_prefix}:{tr_key}")
+
+    session = await ws_pool.release(key)
+    if session is None or session.closed:
+        return
 
-        logger.info(f"[EXEC] SELL_DONE 업데이트 완료 → 주문 {order_no}")
+    await enqueue_send({
+        "tr_id": tr_id,
+        "tr_key": tr_key,
+        "tr_type": "2",
+        "session": session,
+    }, SEND_PRIORITY_LOW)
+    logger.info(f"[ QUEUE ] 구독 해제 큐 등록 → {redis_prefix}:{tr_key} ({session})")
 
-    except Exception as e:
-        logger.error(f"[EXEC] 체결 처리 실패: {e}")
 
+# 참조 없는 유휴 구독 정리 + prefix 별 구독 통계 기록
+async def subscription_evict_loop():
+    while not stop_event.is_set():
+        await asyncio.sleep(SUBSCRIPTION_CHECK_INTERVAL)
 
-# ------------------ 구독 작업 ------------------
-async def subscribe_worker(tr_id, tr_key, redis_key_prefix):
+        for key in subscriptions.expired():
+            try:
+                await unsubscribe_worker(key)
+            except Exception as e:
+                logger.warning(f"[SUB] 구독 해제 실패 {key}: {e}")
 
-    # 구독 요청 -> send_queue & subscriptions dict 등록
-    key = (tr_id, tr_key)
-    logger.debug(f"[SUB] 구독 요청 → {key}")
-    if key in subscriptions:
-        logger.info(f"[WARN] 이미 등록된 구독: {key}")
-        return
+        prefix_stats = subscriptions.stats()
+        for redis_prefix in PREFIX_DECODERS:
+            child(LIVE_SUBSCRIPTIONS, redis_prefix).set(prefix_stats.get(redis_prefix, {}).get("live", 0))
 
-    subscriptions[key] = redis_key_prefix
-    logger.debug(f"[SUB] 구독 요청 → {redis_key_prefix}:{tr_key}")
+        stats = {
+            "prefixes": prefix_stats,
+            "pool": ws_pool.stats(),
+            "send_queue": send_queue.qsize(),
+            "ticks": tick_writer.stats(),
+        }
+        if decode_pool:
+            stats["decode"] = decode_pool.stats()
+        await redis_async.set(SUBSCRIPTION_STATS_KEY, json.dumps(stats), ex=SUBSCRIPTION_CHECK_INTERVAL * 6)
+
+
+# 보유 종목 조회 (DB) → 해당 종목 구독은 송신 큐에서 먼저 전송
+async def open_position_loop():
+    while not stop_event.is_set():
+        try:
+            symbols = await asyncio.to_thread(open_position_symbols)
+            subscriptions.set_priority_symbols(symbols)
+        except Exception as e:
+            logger.warning(f"[SUB] 보유 종목 조회 실패: {e}")
+        await asyncio.sleep(OPEN_POSITION_REFRESH_INTERVAL)
+
+
+# 구독이 세션에 배정(또는 재배정)될 때 해당 세션으로 구독 메시지 전송 예약
+# 재연결 후 재전송도 이 경로 → 우선 구독부터 전송 한도 내 최대 속도로 전송
+async def on_session_assign(key, session):
+    tr_id, tr_key = key
     payload = {
         "tr_id": tr_id,
         "tr_key": tr_key,
-        "redis_prefix": redis_key_prefix
+        "session": session,
     }
+    priority = SEND_PRIORITY_HIGH if subscriptions.is_priority(key) else SEND_PRIORITY_NORMAL
     logger.debug(f"[ SUBSCRIBE ] 구독 요청 body → {payload}")
-    await send_queue.put(payload)
-
-    logger.info(f"[ QUEUE ] 구독 요청 큐 등록 → {redis_key_prefix}:{tr_key}")
+    await enqueue_send(payload, priority)
 
+    logger.info(f"[ QUEUE ] 구독 요청 큐 등록 → {tr_id}:{tr_key} ({session})")
 
-# ------------------ WebSocket 수신 루프 ------------------
-async def ws_recv_loop():
-    global shared_ws
 
-    while not stop_event.is_set():
-        try:
-            raw = await asyncio.wait_for(shared_ws.recv(), timeout=10)
-            logger.debug(f"==== RAW FRAME ====\n{raw}\n====================")
+# 승인키 갱신 (강제 재발급은 최소 간격 내 1회만)
+async def refresh_approval_key(force=False):
+    global approval_key, approval_refreshed_at
+    if WS_APPROVAL_KEY:
+        return
+    now = time.monotonic()
+    if force and now - approval_refreshed_at < APPROVAL_REFRESH_MIN_INTERVAL:
+        force = False
+    key = await asyncio.to_thread(get_web_socket_key, force_refresh=force)
+    if force:
+        approval_refreshed_at = now
+    if key != approval_key:
+        logger.info("[WS] approval_key 갱신")
+        approval_key = key
+
+
+# 재연결 시도 전 승인키 확인
+# - 첫 시도: 캐시 만료 시에만 재발급 / 연속 실패 시: 강제 재발급
+async def on_pool_reconnect(attempt):
+    await refresh_approval_key(force=attempt > 0)
+
+
+# 승인키 오류로 거절된 구독 → 승인키 재발급 후 같은 세션으로 재전송
+async def refresh_and_resubscribe(session, tr_id, tr_key):
+    await refresh_approval_key(force=True)
+    logger.info(f"[WS] {tr_id}:{tr_key} 재구독")
+    await enqueue_send({"tr_id": tr_id, "tr_key": tr_key, "session": session}, SEND_PRIORITY_HIGH)
+
+
+# ------------------ 파이프 프레임 처리 ------------------
+def handle_pipe_frame(raw, tr_id):
+    # 프레임 내 모든 레코드를 파싱하여 Redis 기록 버퍼에 전달
+    start = time.perf_counter()
+    last_parsed = None  # 디코딩에 성공한 마지막 레코드 (지연 계산용)
+    records = 0
+    for tr_id, fields, base in iter_records(raw):
+        tr_key = fields[base]
+
+        redis_prefix = subscriptions.get((tr_id, tr_key))
+        if not redis_prefix:
+            logger.warning(f"[WS] 알 수 없는 종목 데이터 수신 → {tr_id}:{tr_key}")
+            continue
 
-            # JSON 메시지 처리
-            try:
-                obj = json.loads(raw)
-                tr_id = obj.get("header", {}).get("tr_id")
-
-                # PING (최초 연결 확인)
-                if tr_id == "PINGPONG":
-                    logger.info("[INFO] KIS와 ping 연결 확인 ")
-
-                # SUBSCRIBE SUCCESS
-                msg_cd = obj.get("body", {}).get("msg_cd", "")
-                if msg_cd in ["OPSP0000", "OPSP0003"]:
-                    logger.info("[WS] 구독 성공 메시지 수신")
-                    continue
-            except json.JSONDecodeError:
-                pass
-
-            # 가격 데이터 처리 (PIPE format)
-            if "|" in raw:
-                parts = raw.split("|")
-                if len(parts) < 4:
-                    continue
-
-                tr_id = parts[1]
-                tr_key = parts[3].split("^")[0]
-
-                redis_prefix = subscriptions.get((tr_id, tr_key))
-                if not redis_prefix:
-                    logger.warning(f"[WS] 알 수 없는 종목 데이터 수신 → {tr_id}:{tr_key}")
-                    continue
-
-                # 파싱 실행
-                if redis_prefix == "price":
-                    parsed = parse_price(raw)
-                elif redis_prefix == "quote":
-                    parsed = parse_quote(raw)
-                elif redis_prefix == "index":
-                    parsed = parse_index(raw)
-                elif redis_prefix == "exec":
-                    parsed = parse_exec(raw)
-                else:
-                    parsed = None
-
-                if parsed:
-                    # 체결 데이터
-                    if redis_prefix == "exec":
-                        handle_execution(parsed)
-                    redis_key = f"{redis_prefix}:{tr_key}"
-                    r.set(redis_key, json.dumps(parsed), ex=REDIS_TTL)
-                    logger.info(f"[WS:{tr_id}] 저장됨 → {redis_key}")
-                else:
-                    logger.warning(f"[WS] 파싱 실패 → {tr_id}:{tr_key}")
-
-        except asyncio.TimeoutError:
+        # 파싱 실행 (구독 prefix 별 디코더에 split 된 필드를 그대로 전달 - H0STASP0 는 quote / depth 공용)
+        decoder = PREFIX_DECODERS.get(redis_prefix)
+        parsed = decoder(tr_id, fields, base) if decoder else None
+        if not parsed:
+            logger.warning(f"[WS] 파싱 실패 → {tr_id}:{tr_key}")
             continue
-        except Exception as e:
-            logger.error(f"[WS] 수신 오류: {e}")
-            break
+        last_parsed = parsed
 
+        # 체결 데이터 → 워커 풀 큐로 전달 (DB 작업은 수신 루프 밖에서 처리)
+        if redis_prefix == "exec":
+            execution_pool.submit(parsed)
 
-# ------------------ WebSocket 송신 루프 ------------------
-async def ws_send_loop(approval_key):
-    # 큐의 모든 구독 요청을 하나의 웹 소켓으로 전송
-    global shared_ws
+        # 호가 → 종목별 배열에 반영, 잔량 변화가 없으면 기록/발행 생략
+        elif redis_prefix == "depth":
+            book = depth_books.get(tr_key)
+            if book is None:
+                book = depth_books[tr_key] = DepthBook()
+            if not book.update(parsed["ladder"]):
+                continue
 
+        # 최신값 저장 + 종목 채널 발행 (flush 주기마다 pipeline 일괄 전송)
+        tick_writer.put(redis_prefix, tr_key, parsed)
+        records += 1
+
+    if last_parsed is None:
+        return
+
+    child(WS_PARSE_SECONDS, tr_id).observe(time.perf_counter() - start)
+    if records:
+        child(WS_RECORDS, tr_id).inc(records)
+
+    # 거래소 시각 → 수신 지연 (프레임의 마지막 디코딩 성공 레코드 기준)
+    lag = exchange_lag(last_parsed.get("timestamp") or last_parsed.get("time") or last_parsed.get("ts") or "")
+    if lag is not None:
+        child(WS_EXCHANGE_LAG_SECONDS, tr_id).observe(lag)
+
+
+# ------------------ WebSocket 수신 처리 (모든 세션 공통) ------------------
+def handle_frame(session, raw):
+    if frame_capture:
+        frame_capture.write(session.session_id, raw)
+
+    if WS_FRAME_LOG_SAMPLE and next(frame_seq) % WS_FRAME_LOG_SAMPLE == 0:
+        logger.debug(f"==== RAW FRAME ====\n{raw}\n====================")
+
+    # 가격 데이터 처리 (PIPE format) - JSON 파싱 시도 없이 바로 디코딩
+    # 멀티 프로세스 모드: 원본 프레임만 디코딩 프로세스로 전달
+    if is_pipe_frame(raw):
+        tr_id = raw[2:raw.find("|", 2)]
+        child(WS_FRAMES, tr_id).inc()
+        if decode_pool:
+            decode_pool.submit(raw)
+        else:
+            handle_pipe_frame(raw, tr_id)
+        return
+
+    # JSON 메시지 처리
+    try:
+        obj = json.loads(raw)
+    except json.JSONDecodeError:
+        logger.warning(f"[WS] 알 수 없는 형식의 메시지 → {raw[:100]}")
+        return
+
+    header = obj.get("header", {})
+    tr_id = header.get("tr_id")
+
+    # PINGPONG → 그대로 돌려보내야 KIS 가 세션을 유지
+    if tr_id == "PINGPONG":
+        logger.debug(f"[INFO] KIS와 ping 연결 확인 ({session})")
+        asyncio.create_task(session.send(raw))
+        return
+
+    # SUBSCRIBE SUCCESS
+    body = obj.get("body", {})
+    msg_cd = body.get("msg_cd", "")
+    if msg_cd in ["OPSP0000", "OPSP0003"]:
+        logger.info(f"[WS] 구독 성공 메시지 수신 ({session})")
+        return
+
+    # 승인키 만료/무효 → 재발급 후 재구독
+    if "approval" in body.get("msg1", "").lower() and header.get("tr_key"):
+        logger.warning(f"[WS] 승인키 오류 ({msg_cd}) → {tr_id}:{header['tr_key']}")
+        asyncio.create_task(refresh_and_resubscribe(session, tr_id, header["tr_key"]))
+
+
+# ------------------ WebSocket 송신 루프 ------------------
+async def ws_send_loop():
+    # 큐의 구독 요청을 배정된 세션으로 전송 (우선순위 순, token bucket 한도 내)
     while not stop_event.is_set():
-        logging.debug("[WS] 송신 루프 시작")
-        try:
-            data = await send_queue.get()
-            logging.debug(f"[WS] send message → {data}")
-            msg = {
-                "header": {
-                    "approval_key": approval_key,
-                    "tr_type": "1",
-                    "custtype": CUST_TYPE,
-                    "content-type": "utf-8"
-                },
-                "body": {
-                    "input": {
-                        "tr_id": data["tr_id"],
-                        "tr_key": data["tr_key"]
-                    }
+        _, _, data = await send_queue.get()
+        session = data["session"]
+
+        # 전송 전에 세션이 끊긴 경우: 재배정 시 새 세션으로 다시 큐 등록됨
+        if session.closed:
+            logger.warning(f"[WS] 종료된 세션 구독 전송 생략 → {data['tr_id']} / {data['tr_key']}")
+            continue
+
+        tr_type = data.get("tr_type", "1")  # 1: 등록, 2: 해제
+        msg = {
+            "header": {
+                "approval_key": approval_key,
+                "tr_type": tr_type,
+                "custtype": CUST_TYPE,
+                "content-type": "utf-8"
+            },
+            "body": {
+                "input": {
+                    "tr_id": data["tr_id"],
+                    "tr_key": data["tr_key"]
                 }
             }
-            logging.debug(f"[WS] send message → {json.dumps(msg)}")
-            await shared_ws.send(json.dumps(msg))
-            logger.info(f"[WS] 구독 전송 → {data['tr_id']} / {data['tr_key']}")
+        }
+
+        await send_bucket.acquire()
+        try:
+            await session.send(json.dumps(msg))
+            action = "구독" if tr_type == "1" else "구독 해제"
+            logger.info(f"[WS] {action} 전송 → {data['tr_id']} / {data['tr_key']} ({session}, 대기 {send_queue.qsize()})")
         except Exception as e:
             logger.error(f"[WS] 구독 전송 실패: {e}")
 
-        await asyncio.sleep(0.03)
-
 
 # ------------------ Redis 이벤트 수신 → 구독 요청 ------------------
 async def redis_subscribe_listener():
-    pubsub = r.pubsub()
-    pubsub.subscribe(REDIS_CHANNEL)
+    # redis.asyncio 블로킹 listen() → 메시지 도착 즉시 처리 (polling / sleep 없음)
+    pubsub = redis_async.pubsub(ignore_subscribe_messages=True)
+    await pubsub.subscribe(REDIS_CHANNEL)
     logger.info("[INFO] Redis 구독 요청 대기")
 
-    while not stop_event.is_set():
-        message = pubsub.get_message()
-        if message and message["type"] == "message":
+    try:
+        async for message in pubsub.listen():
+            if stop_event.is_set():
+                break
+            if message["type"] != "message":
+                continue
+
             try:
                 data = json.loads(message["data"])
-                tr_id = data["tr_id"]
-                tr_key = data["tr_key"]
-                redis_prefix = data["type"]
-                await subscribe_worker(tr_id, tr_key, redis_prefix)
-            except Exception as e:
-                logger.warning(f"Redis 메시지 처리 실패: {e}")
-
-        await asyncio.sleep(0.3)
-
-
-# ------------------ WebSocket 단일 연결 관리 ------------------
+            except json.JSONDecodeError:
+                logger.warning(f"Redis 메시지 형식 오류: {message['data']}")
+                continue
+
+            # 단건 {"tr_id", "tr_key", "type"} 또는 묶음 {"items": [...]}
+            action = data.get("action", "subscribe")
+            holder = data.get("holder", "")
+            for item in data.get("items") or [data]:
+                try:
+                    await subscribe_worker(item["tr_id"], item["tr_key"], item["type"], action, holder)
+                except Exception as e:
+                    logger.warning(f"Redis 메시지 처리 실패: {e}")
+    finally:
+        await pubsub.aclose()
+
+
+# ------------------ WebSocket 세션 풀 관리 ------------------
 async def main_websocket():
-    global shared_ws
-    
+    global ws_pool, approval_key, approval_refreshed_at, decode_pool, frame_capture
+
     # 최초 연결시 강제 갱신 
-    approval_key = get_web_socket_key(force_refresh=True)
+    approval_key = WS_APPROVAL_KEY or get_web_socket_key(force_refresh=True)
+    approval_refreshed_at = time.monotonic()
     logger.info(f"[WS] 새 approval_key 획득: {approval_key}")
-    async with websockets.connect(WS_BASE_URL_REAL) as ws:
-        shared_ws = ws
-        logger.info("[WS] 연결 완료")
 
-        recv_task = asyncio.create_task(ws_recv_loop())
-        send_task = asyncio.create_task(ws_send_loop(approval_key))
-        redis_task = asyncio.create_task(redis_subscribe_listener())
+    if WS_CAPTURE_FILE:
+        frame_capture = FrameCapture(WS_CAPTURE_FILE)
+
+    # 이전 실행의 구독 상태 초기화
+    await redis_async.delete(LIVE_SUBSCRIPTIONS_KEY)
+
+    # Prometheus metrics (/metrics) - WS_METRICS_PORT
+    start_metrics_server()
+
+    # 세션 유실 시 supervise() 가 백오프로 재연결 + 구독 재전송
+    ws_pool = WsConnectionPool(WS_BASE_URL_REAL, handle_frame, on_session_assign, on_pool_reconnect)
+    SEND_QUEUE_DEPTH.set_function(send_queue.qsize)
+    WS_SESSIONS.set_function(lambda: sum(1 for s in ws_pool.sessions if not s.closed))
+    await ws_pool.start()
+    logger.info("[WS] 연결 완료")
 
-        await asyncio.gather(recv_task, send_task, redis_task)
+    execution_pool.start()
+
+    tasks = []
+    if WS_DECODE_WORKERS > 0:
+        decode_pool = DecodePool(WS_DECODE_WORKERS, on_exec=execution_pool.submit)
+        decode_pool.start()
+        tasks.append(asyncio.create_task(decode_pool.drain_results(stop_event)))
+
+    send_task = asyncio.create_task(ws_send_loop())
+    redis_task = asyncio.create_task(redis_subscribe_listener())
+    writer_task = asyncio.create_task(tick_writer.run(stop_event))
+    evict_task = asyncio.create_task(subscription_evict_loop())
+    supervise_task = asyncio.create_task(ws_pool.supervise(stop_event))
+    position_task = asyncio.create_task(open_position_loop())
+
+    try:
+        await asyncio.gather(send_task, redis_task, writer_task, evict_task, supervise_task, position_task, *tasks)
+    finally:
+        await ws_pool.close()
+        if decode_pool:
+            decode_pool.stop()
+        await tick_writer.close()
+        await redis_async.aclose()
+        execution_pool.stop()
+        if frame_capture:
+            frame_capture.close()
 
 
 # ------------------ 종료 처리 ------------------
@@ -260,5 +449,6 @@ async def main():
     await main_websocket()
 
 
+# 실행은 python -m kis.websocket (이 모듈을 직접 실행하면 디코딩 프로세스가 이 모듈을 다시 import)
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,61 @@
+import os, time
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+# ws 클라이언트 프로세스 metrics HTTP 포트 (0 = 비활성)
+WS_METRICS_PORT = int(os.getenv("WS_METRICS_PORT", "9101"))
+
+_LATENCY_BUCKETS = (0.00001, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05)
+_LAG_BUCKETS = (0.5, 1, 2, 3, 5, 10, 30, 60, 300)
+_REDIS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1)
+
+## 수신
+WS_FRAMES = Counter("kis_ws_frames_total", "KIS WebSocket 수신 프레임 수", ["tr_id"])
+WS_RECORDS = Counter("kis_ws_records_total", "디코딩된 레코드 수", ["tr_id"])
+WS_PARSE_SECONDS = Histogram("kis_ws_parse_seconds", "프레임 1개 디코딩 시간", ["tr_id"], buckets=_LATENCY_BUCKETS)
+WS_EXCHANGE_LAG_SECONDS = Histogram(
+    "kis_ws_exchange_lag_seconds", "거래소 체결 시각 → 수신 시각 지연 (초 단위 시각 기준)", ["tr_id"],
+    buckets=_LAG_BUCKETS,
+)
+
+## Redis 기록
+REDIS_FLUSH_SECONDS = Histogram("kis_ws_redis_flush_seconds", "tick pipeline 1회 전송 시간", buckets=_REDIS_BUCKETS)
+REDIS_FLUSH_ITEMS = Counter("kis_ws_redis_written_total", "Redis 기록/발행 tick 수", ["prefix"])
+REDIS_FLUSH_ERRORS = Counter("kis_ws_redis_flush_errors_total", "tick pipeline 전송 실패 수")
+TICKS_CONFLATED = Counter("kis_ws_ticks_conflated_total", "conflation 으로 덮어써진 tick 수", ["prefix"])
+
+## 구독 / 세션
+SEND_QUEUE_DEPTH = Gauge("kis_ws_send_queue_depth", "구독 송신 대기 메시지 수")
+LIVE_SUBSCRIPTIONS = Gauge("kis_ws_live_subscriptions", "prefix 별 실시간 구독 수", ["prefix"])
+WS_SESSIONS = Gauge("kis_ws_sessions", "연결된 KIS WebSocket 세션 수")
+WS_RECONNECTS = Counter("kis_ws_reconnects_total", "세션 재연결 성공 수")
+WS_RECONNECT_FAILURES = Counter("kis_ws_reconnect_failures_total", "세션 재연결 실패 수")
+WS_DOWNTIME_SECONDS = Histogram("kis_ws_downtime_seconds", "구독 유실 → 새 세션 연결까지", buckets=_LAG_BUCKETS)
+WS_RECOVERY_SECONDS = Histogram("kis_ws_recovery_seconds", "구독 유실 → 전체 재배정까지", buckets=_LAG_BUCKETS)
+
+# 라벨별 child 캐시 (수신 루프에서 labels() 조회 비용 제거)
+_children = {}
+
+
+def child(metric, label: str):
+    key = (metric, label)
+    value = _children.get(key)
+    if value is None:
+        value = _children[key] = metric.labels(label)
+    return value
+
+
+# KST 기준 HHMMSS(또는 HH:MM:SS) → 현재 시각과의 차이(초)
+def exchange_lag(hhmmss: str, now=None):
+    digits = hhmmss.replace(":", "")
+    if len(digits) < 6 or not digits[:6].isdigit():
+        return None
+    now = time.time() if now is None else now
+    now_sod = (now + 9 * 3600) % 86400
+    ts_sod = int(digits[:2]) * 3600 + int(digits[2:4]) * 60 + int(digits[4:6])
+    lag = now_sod - ts_sod
+    return lag + 86400 if lag < -43200 else lag
+
+
+def start_metrics_server(port=WS_METRICS_PORT):
+    if port:
+        start_http_server(port)
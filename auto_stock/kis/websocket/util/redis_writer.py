@@ -0,0 +1,119 @@
+import os, time, asyncio, logging
+from collections import Counter
+import redis.asyncio as aioredis
+
+from kis.websocket.util.tick_channel import tick_channel, tick_history_key
+from kis.websocket.util.conflation import ConflationBuffer
+from kis.websocket.util.tick_codec import encode_tick
+from kis.websocket.util.metrics import (
+    REDIS_FLUSH_SECONDS, REDIS_FLUSH_ITEMS, REDIS_FLUSH_ERRORS, TICKS_CONFLATED, child,
+)
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+REDIS_TTL = 60 * 60 * 18
+
+# conflation 주기 - 이 시간 동안 같은 종목 tick 은 최신값 1건만 기록/발행
+TICK_FLUSH_INTERVAL = float(os.getenv("TICK_FLUSH_INTERVAL", "0.005"))  # 5ms
+TICK_FLUSH_MAX_ITEMS = int(os.getenv("TICK_FLUSH_MAX_ITEMS", "500"))
+
+# tick 이력 (장중 차트) - 종목별 stream 에 flush 마다 최신값 추가
+# 건수가 아닌 시간 기준으로 최근 MINUTES 분만 유지 (XADD MINID, TickHistoryView 조회 한도와 동일)
+TICK_HISTORY_PREFIXES = set(filter(None, os.getenv("TICK_HISTORY_PREFIXES", "price,index").split(",")))
+TICK_HISTORY_MINUTES = int(os.getenv("TICK_HISTORY_MINUTES", str(60 * 7)))
+
+
+class RedisTickWriter:
+    """
+    수신 루프 → Redis 비동기 일괄 기록기
+    - put() 은 conflation 버퍼에 최신값만 남기고 즉시 반환 (같은 key 는 덮어씀)
+    - flush_interval 경과 또는 max_items 도달 시 SET + PUBLISH (+ 이력 XADD) 를 하나의 pipeline 으로 전송
+    - Redis 가 느려도 수신 루프는 멈추지 않고 다음 버퍼에 계속 쌓는다
+    """
+
+    def __init__(self, redis_url=REDIS_URL, ttl=REDIS_TTL,
+                 flush_interval=TICK_FLUSH_INTERVAL, max_items=TICK_FLUSH_MAX_ITEMS,
+                 history_prefixes=TICK_HISTORY_PREFIXES, history_minutes=TICK_HISTORY_MINUTES):
+        self._redis = aioredis.Redis.from_url(redis_url)  # tick 값은 binary (tick_codec)
+        self._ttl = ttl
+        self._history_prefixes = history_prefixes
+        self._history_window_ms = int(history_minutes * 60 * 1000)
+        self._flush_interval = flush_interval
+        self._max_items = max_items
+        self._buffer = ConflationBuffer()
+        self._conflated_reported = Counter()  # metrics 에 반영한 conflation 건수
+        self._has_data = asyncio.Event()
+        self._full = asyncio.Event()
+
+    def put(self, redis_prefix: str, tr_key: str, parsed: dict):
+        self._buffer.put(redis_prefix, tr_key, parsed)
+        self._has_data.set()
+        if len(self._buffer) >= self._max_items:
+            self._full.set()
+
+    def stats(self) -> dict:
+        # prefix 별 수신 / conflation / 기록 건수
+        return self._buffer.stats()
+
+    async def run(self, stop_event: asyncio.Event):
+        while not stop_event.is_set():
+            try:
+                await asyncio.wait_for(self._has_data.wait(), timeout=1)
+            except asyncio.TimeoutError:
+                continue
+
+            # flush 주기 동안 모으기 (버퍼가 가득 차면 즉시 전송)
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self._flush_interval)
+            except asyncio.TimeoutError:
+                pass
+
+            self._has_data.clear()
+            self._full.clear()
+            await self.flush()
+
+    async def flush(self):
+        if not len(self._buffer):
+            return
+
+        batch = self._buffer.drain()
+        pipe = self._redis.pipeline(transaction=False)
+        # stream ID(ms) 가 이보다 오래된 이력은 trim
+        min_id = int(time.time() * 1000) - self._history_window_ms
+        for (redis_prefix, tr_key), parsed in batch.items():
+            value = encode_tick(redis_prefix, parsed)
+            pipe.set(f"{redis_prefix}:{tr_key}", value, ex=self._ttl)
+            pipe.publish(tick_channel(redis_prefix, tr_key), value)
+            if redis_prefix in self._history_prefixes:
+                pipe.xadd(
+                    tick_history_key(redis_prefix, tr_key), {"v": value},
+                    minid=min_id, approximate=True,
+                )
+
+        start = time.perf_counter()
+        try:
+            await pipe.execute()
+            REDIS_FLUSH_SECONDS.observe(time.perf_counter() - start)
+            self._report(batch)
+            logger.debug(f"[REDIS] 저장/발행 → {len(batch)}건")
+        except Exception as e:
+            REDIS_FLUSH_ERRORS.inc()
+            logger.error(f"[REDIS] 일괄 저장 실패 ({len(batch)}건): {e}")
+            # 실패분은 그 사이 들어온 더 최신 값이 없을 때만 다음 flush 로 재시도
+            self._buffer.restore(batch)
+            self._has_data.set()
+            await asyncio.sleep(self._flush_interval)
+
+    def _report(self, batch: dict):
+        for redis_prefix, count in Counter(prefix for prefix, _ in batch).items():
+            child(REDIS_FLUSH_ITEMS, redis_prefix).inc(count)
+        for redis_prefix, count in self._buffer.conflated.items():
+            delta = count - self._conflated_reported[redis_prefix]
+            if delta:
+                child(TICKS_CONFLATED, redis_prefix).inc(delta)
+                self._conflated_reported[redis_prefix] = count
+
+    async def close(self):
+        await self.flush()
+        await self._redis.aclose()
@@ -0,0 +1,118 @@
+"""
+KIS WebSocket 재생 서버 (WS_BASE_URL_REAL 대체)
+
+python -m kis.websocket.util.replay_server capture.log             # 1배속
+python -m kis.websocket.util.replay_server capture.log --speed 10  # 10배속
+python -m kis.websocket.util.replay_server capture.log --speed max # 대기 없이 최대 속도
+
+ws 클라이언트: WS_BASE_URL_REAL=ws://localhost:8765 WS_APPROVAL_KEY=replay
+- 구독 요청(tr_type=1/2)에 KIS 와 같은 형식의 성공 응답을 돌려준다
+- 첫 구독 요청 이후 캡처된 파이프 프레임을 원래 간격 / speed 로 재생
+- 연결별로 구독 중인 (tr_id, 종목) 프레임만 전송 (--all: 전체 전송)
+"""
+import argparse, asyncio, json, logging, time
+import websockets
+
+from kis.websocket.util.capture import read_capture
+
+logger = logging.getLogger(__name__)
+
+
+def load_frames(path: str) -> list:
+    # 파이프 프레임만 재생 (PINGPONG / 구독 응답은 서버가 직접 생성)
+    return [(ts, raw) for ts, _, raw in read_capture(path) if raw[:1].isdigit()]
+
+
+def frame_key(raw: str):
+    _, tr_id, _, body = raw.split("|", 3)
+    return tr_id, body.split("^", 1)[0]
+
+
+class ReplaySession:
+    def __init__(self, ws, frames, speed, send_all):
+        self.ws = ws
+        self.frames = frames
+        self.speed = speed  # None = 최대 속도
+        self.send_all = send_all
+        self.keys = set()
+        self.started = asyncio.Event()
+        self.sent = 0
+
+    async def handle_requests(self):
+        async for message in self.ws:
+            try:
+                obj = json.loads(message)
+                header, body = obj["header"], obj["body"]["input"]
+            except (json.JSONDecodeError, KeyError, TypeError):
+                continue
+
+            key = (body["tr_id"], body["tr_key"])
+            if header.get("tr_type") == "2":
+                self.keys.discard(key)
+                msg = "UNSUBSCRIBE SUCCESS"
+            else:
+                self.keys.add(key)
+                msg = "SUBSCRIBE SUCCESS"
+            await self.ws.send(json.dumps({
+                "header": {"tr_id": key[0], "tr_key": key[1], "encrypt": "N"},
+                "body": {"rt_cd": "0", "msg_cd": "OPSP0000", "msg1": msg},
+            }))
+            self.started.set()
+
+    async def play(self):
+        await self.started.wait()
+        ts0 = self.frames[0][0] if self.frames else 0
+        start = time.monotonic()
+
+        for i, (ts, raw) in enumerate(self.frames):
+            if self.speed:
+                delay = start + (ts - ts0) / 1_000_000 / self.speed - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif i % 500 == 0:
+                await asyncio.sleep(0)
+
+            if self.send_all or frame_key(raw) in self.keys:
+                await self.ws.send(raw)
+                self.sent += 1
+
+        elapsed = time.monotonic() - start
+        logger.info(f"[REPLAY] 재생 완료 → {self.sent}건 / {elapsed:.2f}초 ({self.sent / max(elapsed, 1e-9):,.0f} frames/sec)")
+
+
+async def serve(path: str, host: str, port: int, speed, send_all: bool):
+    frames = load_frames(path)
+    logger.info(f"[REPLAY] {path} 프레임 {len(frames)}건 로드 (speed={speed or 'max'})")
+
+    async def handler(ws):
+        session = ReplaySession(ws, frames, speed, send_all)
+        requests_task = asyncio.create_task(session.handle_requests())
+        try:
+            await session.play()
+            await requests_task  # 재생 후에도 클라이언트가 끊을 때까지 연결 유지
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            requests_task.cancel()
+
+    async with websockets.serve(handler, host, port, max_queue=None):
+        logger.info(f"[REPLAY] ws://{host}:{port} 대기")
+        await asyncio.Future()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("capture", help="WS_CAPTURE_FILE 로 기록한 캡처 파일")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--speed", default="1", help="재생 배속 (1, 10, ... 또는 max)")
+    parser.add_argument("--all", action="store_true", help="구독 여부와 무관하게 모든 프레임 전송")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    speed = None if args.speed == "max" else float(args.speed)
+    asyncio.run(serve(args.capture, args.host, args.port, speed, args.all))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import os, time, uuid, socket, logging, threading
+from collections import Counter, defaultdict
+
+from kis.websocket.util.subscription_registry import WS_SUBSCRIPTION_LEASE_TTL
+
+logger = logging.getLogger(__name__)
+
+# 보유 참조 재전송 주기(초) - lease 만료 전에 여러 번 갱신되도록 TTL 의 1/3
+WS_SUBSCRIPTION_HEARTBEAT = float(os.getenv("WS_SUBSCRIPTION_HEARTBEAT", str(WS_SUBSCRIPTION_LEASE_TTL / 3)))
+
+
+class SubscriptionLeases:
+    """
+    이 프로세스가 보유한 실시간 구독 참조 (ws 클라이언트 registry 에서는 보유자 1명)
+    - 같은 프로세스의 Consumer / 생산자 참조는 여기서 합산 → 0→1 / 1→0 일 때만 acquire / release 발행
+    - heartbeat 스레드가 보유 중인 참조를 주기적으로 다시 acquire (lease 갱신)
+      → ws 클라이언트가 재시작해도 참조 복구, 이 프로세스가 release 없이 죽으면 lease 만료로 해제
+    - fork 된 자식 프로세스는 새 보유자 id / 빈 참조로 시작
+    """
+
+    def __init__(self, publish, interval=WS_SUBSCRIPTION_HEARTBEAT):
+        self._publish = publish  # (tr_id, tr_keys, sub_type, action, holder)
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self.holder = f"{socket.gethostname()}:{self._pid}:{uuid.uuid4().hex[:6]}"
+        self._refs = Counter()  # {(tr_id, tr_key, sub_type): 참조 수}
+        self._thread = None
+
+    def acquire(self, tr_id, tr_keys, sub_type) -> list:
+        # 새로 보유하게 된 종목만 반환 → 호출 측이 발행
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            changed = []
+            for tr_key in tr_keys:
+                key = (tr_id, tr_key, sub_type)
+                self._refs[key] += 1
+                if self._refs[key] == 1:
+                    changed.append(tr_key)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="subscription-lease", daemon=True)
+                self._thread.start()
+        return changed
+
+    def release(self, tr_id, tr_keys, sub_type) -> list:
+        # 마지막 참조가 해제된 종목만 반환
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            released = []
+            for tr_key in tr_keys:
+                key = (tr_id, tr_key, sub_type)
+                if self._refs[key] <= 0:
+                    self._refs.pop(key, None)
+                    continue
+                self._refs[key] -= 1
+                if self._refs[key] == 0:
+                    del self._refs[key]
+                    released.append(tr_key)
+        return released
+
+    def held(self) -> dict:
+        # {(tr_id, sub_type): [tr_key]}
+        groups = defaultdict(list)
+        with self._lock:
+            for tr_id, tr_key, sub_type in self._refs:
+                groups[(tr_id, sub_type)].append(tr_key)
+        return dict(groups)
+
+    def _run(self):
+        while True:
+            time.sleep(self._interval)
+            for (tr_id, sub_type), tr_keys in self.held().items():
+                try:
+                    self._publish(tr_id, tr_keys, sub_type, "acquire", self.holder)
+                except Exception as e:
+                    logger.warning(f"[SUB] 참조 lease 갱신 실패 ({sub_type} {len(tr_keys)}건): {e}")
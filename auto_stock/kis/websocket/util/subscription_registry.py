@@ -0,0 +1,122 @@
+import os, time, logging
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+# 참조가 모두 해제된 구독을 유지하는 시간(초) - 이후 구독 해제(tr_type=2) 전송
+WS_UNSUBSCRIBE_GRACE = float(os.getenv("WS_UNSUBSCRIBE_GRACE", "300"))
+
+# 참조 lease 유지 시간(초) - 보유 프로세스는 이보다 짧은 주기로 acquire 를 다시 보낸다
+# (ws 클라이언트 재시작 시 참조 복구 / release 없이 죽은 프로세스의 참조는 만료)
+WS_SUBSCRIPTION_LEASE_TTL = float(os.getenv("WS_SUBSCRIPTION_LEASE_TTL", "180"))
+
+# 참조 수와 무관하게 항상 유지하는 구독 (체결 통보)
+PINNED_PREFIXES = {"exec"}
+
+# 송신 큐에서 먼저 전송하는 구독 (체결 통보) - 보유 종목은 set_priority_symbols 로 따로 지정
+PRIORITY_PREFIXES = {"exec"}
+
+
+class SubscriptionEntry:
+    def __init__(self, redis_prefix: str):
+        self.redis_prefix = redis_prefix
+        self.priority = redis_prefix in PRIORITY_PREFIXES
+        self.holders = {}  # {보유자: lease 만료 시각}
+        self.idle_since = time.monotonic()
+
+    @property
+    def refs(self) -> int:
+        return len(self.holders)
+
+
+class SubscriptionRegistry:
+    """
+    실시간 구독 참조 (보유자별 lease)
+    - acquire/release: 보유자(프로세스) 단위 참조 등록/해제 - acquire 는 lease 갱신도 겸함
+    - lease_ttl 안에 다시 acquire 하지 않은 보유자는 만료 (release 없이 종료된 프로세스)
+    - touch: REST 조회 등 참조 없는 구독 요청 → 유휴 시간만 갱신
+    - 참조 0 상태로 grace 초 이상 지난 구독은 expired() 로 반환 (구독 해제 대상)
+    - 우선 전송: PRIORITY_PREFIXES 구독 + set_priority_symbols 로 지정한 종목 (보유 종목)
+    """
+
+    def __init__(self, idle_grace=WS_UNSUBSCRIBE_GRACE, lease_ttl=WS_SUBSCRIPTION_LEASE_TTL):
+        self._idle_grace = idle_grace
+        self._lease_ttl = lease_ttl
+        self._entries = {}  # {(tr_id, tr_key): SubscriptionEntry}
+        self._priority_symbols = frozenset()
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        return entry.redis_prefix if entry else None
+
+    def keys(self):
+        return list(self._entries.keys())
+
+    def items(self):
+        return [(key, entry.redis_prefix) for key, entry in self._entries.items()]
+
+    def set_priority_symbols(self, symbols):
+        self._priority_symbols = frozenset(symbols)
+
+    def is_priority(self, key) -> bool:
+        entry = self._entries.get(key)
+        return bool(entry and (entry.priority or key[1] in self._priority_symbols))
+
+    def touch(self, key, redis_prefix) -> bool:
+        # 신규 구독이면 True
+        entry = self._entries.get(key)
+        if entry is None:
+            self._entries[key] = SubscriptionEntry(redis_prefix)
+            return True
+        if entry.refs == 0:
+            entry.idle_since = time.monotonic()
+        return False
+
+    def acquire(self, key, redis_prefix, holder="", now=None) -> bool:
+        now = time.monotonic() if now is None else now
+        is_new = self.touch(key, redis_prefix)
+        self._entries[key].holders[holder] = now + self._lease_ttl
+        return is_new
+
+    def release(self, key, holder="", now=None):
+        entry = self._entries.get(key)
+        if entry is None or entry.holders.pop(holder, None) is None:
+            return
+        if not entry.holders:
+            entry.idle_since = time.monotonic() if now is None else now
+
+    def remove(self, key):
+        self._entries.pop(key, None)
+
+    def _expire_leases(self, entry, now):
+        lapsed = [holder for holder, expires in entry.holders.items() if expires <= now]
+        for holder in lapsed:
+            expires = entry.holders.pop(holder)
+            logger.warning(f"[SUB] 참조 lease 만료 → {entry.redis_prefix} ({holder})")
+            if not entry.holders:
+                entry.idle_since = max(entry.idle_since, expires)
+
+    def expired(self, now=None) -> list:
+        now = time.monotonic() if now is None else now
+        for entry in self._entries.values():
+            self._expire_leases(entry, now)
+        return [
+            key for key, entry in self._entries.items()
+            if entry.refs == 0
+            and entry.redis_prefix not in PINNED_PREFIXES
+            and now - entry.idle_since >= self._idle_grace
+        ]
+
+    def stats(self) -> dict:
+        # prefix 별 구독 수 / 참조 수
+        live = Counter(entry.redis_prefix for entry in self._entries.values())
+        refs = Counter()
+        for entry in self._entries.values():
+            refs[entry.redis_prefix] += entry.refs
+        return {prefix: {"live": count, "refs": refs[prefix]} for prefix, count in live.items()}
@@ -0,0 +1,33 @@
+## 실시간 tick 발행 채널 (Redis pub/sub)
+TICK_CHANNEL_PREFIX = "tick"
+
+## 종목별 tick 이력 (capped Redis Stream)
+TICK_HISTORY_PREFIX = "history"
+
+## WebSocket 클라이언트 구독 상태 (Redis)
+LIVE_SUBSCRIPTIONS_KEY = "ws:live"               # 현재 구독 중인 redis_key 집합 (price:005930 ...)
+SUBSCRIPTION_STATS_KEY = "ws:subscriptions:stats"  # prefix 별 구독/참조 수 (JSON)
+
+
+def tick_channel(redis_prefix: str, tr_key: str) -> str:
+    """
+    종목/지수 단위 tick 채널명
+    ex) tick:price:005930, tick:index:0001
+    """
+    return f"{TICK_CHANNEL_PREFIX}:{redis_prefix}:{tr_key}"
+
+
+def split_tick_channel(channel: str) -> tuple[str, str]:
+    """
+    tick 채널명 → (redis_prefix, tr_key)
+    """
+    _, redis_prefix, tr_key = channel.split(":", 2)
+    return redis_prefix, tr_key
+
+
+def tick_history_key(redis_prefix: str, tr_key: str) -> str:
+    """
+    종목/지수 단위 tick 이력 stream 키
+    ex) history:price:005930
+    """
+    return f"{TICK_HISTORY_PREFIX}:{redis_prefix}:{tr_key}"
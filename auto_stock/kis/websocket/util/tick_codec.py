@@ -0,0 +1,147 @@
+import os, json, struct
+
+from kis.constants.const_index import INDEX_CODE_NAME_MAP
+
+try:
+    import msgpack
+except ImportError:  # 선택 의존성
+    msgpack = None
+
+# tick 저장/발행 인코딩: struct (prefix 별 고정 layout) / msgpack / json
+TICK_CODEC = os.getenv("TICK_CODEC", "struct")
+
+# 첫 바이트 = 형식 버전
+# - '{' (0x7b): JSON (기존 형식, 버전 바이트 없음)
+# - 0x01 ~ 0x0f: prefix 별 struct layout v1
+# - 0x10: msgpack
+# layout 을 바꿀 때는 새 버전 번호를 추가하고 기존 번호의 decode 는 남겨둔다.
+VERSION_PRICE_V1 = 0x01
+VERSION_INDEX_V1 = 0x02
+VERSION_DEPTH_V1 = 0x03
+VERSION_MSGPACK = 0x10
+
+_JSON_START = ord("{")
+
+
+def _s(value: bytes) -> str:
+    return value.rstrip(b"\0").decode()
+
+
+def _b(value: str, size: int) -> bytes:
+    # 고정 폭 문자열 필드 - struct 's' 는 넘치면 자르고 모자라면 \0 으로 채우므로 미리 검사
+    # (잘리거나 \0 이 섞여 round-trip 이 깨지는 값은 struct.error → JSON)
+    encoded = value.encode()
+    if len(encoded) > size or b"\0" in encoded:
+        raise struct.error(f"{size}바이트 필드에 맞지 않는 값: {value!r}")
+    return encoded
+
+
+# price: tr_id, symbol, timestamp, current_price, change_rate, trade_value
+_PRICE = struct.Struct("<B8s9s6sddq")
+
+# index: code, price, timestamp(HH:MM:SS) - name 은 코드로 복원
+_INDEX = struct.Struct("<B6sd8s")
+
+# depth: tr_id, symbol, time, ladder(42)
+_DEPTH = struct.Struct("<B8s9s6s42q")
+
+
+def _encode_price(t):
+    return _PRICE.pack(VERSION_PRICE_V1, _b(t["tr_id"], 8), _b(t["symbol"], 9), _b(t["timestamp"], 6),
+                       t["current_price"], t["change_rate"], t["trade_value"])
+
+
+def _decode_price(data):
+    _, tr_id, symbol, ts, current_price, change_rate, trade_value = _PRICE.unpack(data)
+    return {
+        "tr_id": _s(tr_id),
+        "symbol": _s(symbol),
+        "timestamp": _s(ts),
+        "current_price": current_price,
+        "change_rate": change_rate,
+        "trade_value": trade_value,
+    }
+
+
+def _encode_index(t):
+    return _INDEX.pack(VERSION_INDEX_V1, _b(t["code"], 6), t["price"], _b(t["timestamp"], 8))
+
+
+def _decode_index(data):
+    _, code, price, ts = _INDEX.unpack(data)
+    code = _s(code)
+    return {
+        "code": code,
+        "name": INDEX_CODE_NAME_MAP.get(code, code),
+        "price": price,
+        "timestamp": _s(ts),
+    }
+
+
+def _encode_depth(t):
+    return _DEPTH.pack(VERSION_DEPTH_V1, _b(t["tr_id"], 8), _b(t["symbol"], 9), _b(t["time"], 6), *t["ladder"])
+
+
+def _decode_depth(data):
+    values = _DEPTH.unpack(data)
+    return {
+        "tr_id": _s(values[1]),
+        "symbol": _s(values[2]),
+        "time": _s(values[3]),
+        "ladder": list(values[4:]),
+    }
+
+
+_STRUCT_ENCODERS = {
+    "price": _encode_price,
+    "index": _encode_index,
+    "depth": _encode_depth,
+}
+
+_DECODERS = {
+    VERSION_PRICE_V1: _decode_price,
+    VERSION_INDEX_V1: _decode_index,
+    VERSION_DEPTH_V1: _decode_depth,
+}
+
+
+def encode_tick(redis_prefix: str, tick: dict, codec=TICK_CODEC) -> bytes:
+    """
+    tick → Redis 저장/발행 값
+    - layout 이 없는 prefix (exec, quote 등) 또는 값이 layout 에 맞지 않으면 JSON
+      (고정 폭보다 긴 종목 코드 등 - 잘린 값을 저장하지 않음)
+    """
+    if codec == "struct":
+        encoder = _STRUCT_ENCODERS.get(redis_prefix)
+        if encoder:
+            try:
+                return encoder(tick)
+            except (KeyError, TypeError, struct.error):
+                pass
+    elif codec == "msgpack" and msgpack:
+        return bytes((VERSION_MSGPACK,)) + msgpack.packb(tick)
+
+    return json.dumps(tick).encode()
+
+
+def decode_tick(data) -> dict:
+    """
+    Redis 값 → tick (JSON / struct / msgpack 모두 처리)
+    - 형식 오류는 ValueError
+    """
+    if isinstance(data, str):
+        return json.loads(data)
+
+    version = data[0]
+    if version == _JSON_START:
+        return json.loads(data)
+    if version == VERSION_MSGPACK and msgpack:
+        return msgpack.unpackb(data[1:])
+
+    decoder = _DECODERS.get(version)
+    if decoder is None:
+        raise ValueError(f"알 수 없는 tick 형식 버전: {version}")
+    try:
+        return decoder(data)
+    except struct.error as e:
+        raise ValueError(f"tick 형식 오류: {e}")
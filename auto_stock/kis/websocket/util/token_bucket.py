@@ -0,0 +1,32 @@
+import os, time, asyncio
+
+# KIS 실시간 등록/해제 메시지 전송 한도
+WS_SEND_RATE = float(os.getenv("WS_SEND_RATE", "20"))   # 초당 메시지 수
+WS_SEND_BURST = int(os.getenv("WS_SEND_BURST", "10"))   # 순간 최대 전송 수
+
+
+class TokenBucket:
+    """
+    초당 rate 개씩 토큰을 채우고 최대 burst 개까지 쌓아두는 전송 한도
+    - acquire(): 토큰이 있으면 즉시 반환, 없으면 다음 토큰이 찰 때까지만 대기
+    - 송신 루프 1개에서만 사용 (lock 없음)
+    """
+
+    def __init__(self, rate=WS_SEND_RATE, burst=WS_SEND_BURST):
+        self.rate = rate
+        self.capacity = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        while True:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
@@ -14,6 +14,10 @@ ORDER_STATUS = [
 ]
 
 
+# 보유 중 (매수 체결 ~ 매도 체결 전)
+OPEN_POSITION_STATUS = ['BUY_DONE', 'SELL_PENDING', 'SELL_REQUEST_FAILED']
+
+
 ORDER_EXECUTION_SIDE = [
     'BUY',
     'SELL'
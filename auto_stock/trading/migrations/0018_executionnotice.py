@@ -0,0 +1,28 @@
+# Generated by Django 4.2.26 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trading', '0017_alter_orderrequest_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExecutionNotice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_no', models.CharField(db_index=True, max_length=100)),
+                ('executed_price', models.IntegerField()),
+                ('executed_quantity', models.IntegerField()),
+                ('executed_at', models.DateTimeField()),
+                ('matched', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'execution_notice',
+            },
+        ),
+    ]
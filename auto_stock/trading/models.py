@@ -42,4 +42,18 @@ class OrderExecution(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        db_table = "order_execution"
\ No newline at end of file
+        db_table = "order_execution"
+
+## 실시간 체결 통보 (부분 체결마다 1행)
+# 매도 체결 기록은 주문번호별 통보 합계로 갱신 → 체결 기록을 끝내 찾지 못한 통보도 matched=False 로 남는다
+class ExecutionNotice(models.Model):
+    order_no = models.CharField(max_length=100, db_index=True) # KIS 주문번호
+    executed_price = models.IntegerField() # 체결가
+    executed_quantity = models.IntegerField() # 체결 수량
+    executed_at = models.DateTimeField() # 체결 시간
+    matched = models.BooleanField(default=False) # 매도 체결 기록 반영 여부
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "execution_notice"
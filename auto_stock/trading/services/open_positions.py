@@ -0,0 +1,7 @@
+from trading.constants.trading_status import OPEN_POSITION_STATUS
+from trading.models import OrderRequest
+
+
+## 보유 종목 코드 (실시간 구독 송신 우선순위)
+def open_position_symbols() -> set:
+    return set(OrderRequest.objects.filter(status__in=OPEN_POSITION_STATUS).values_list("symbol", flat=True))
@@ -1,8 +1,11 @@
 import time, logging
 from datetime import datetime
+from django.db import transaction
+from django.db.models import F, Max, Sum
+from django.utils import timezone
 
 from trading.data.trading_result import TradeResult
-from trading.models import OrderRequest, OrderExecution
+from trading.models import OrderRequest, OrderExecution, ExecutionNotice
 
 from kis.api.account import fetch_recent_ccld
 
@@ -52,4 +55,98 @@ def save_execution_data(order: OrderRequest, executed_result: TradeResult, side:
         executed_price=exec_data["price"],
         executed_quantity=exec_data["qty"],
         executed_at=executed_at,
-    )
\ No newline at end of file
+    )
+
+
+## 체결 통보 기준 날짜 (통보에는 체결시각 HHMMSS 만 있음 → 거래소 현지 날짜)
+def _exchange_date() -> str:
+    now = timezone.now()
+    if timezone.is_aware(now):
+        now = timezone.localtime(now)
+    return now.strftime("%Y%m%d")
+
+
+## 체결 통보 1건 검증 → ExecutionNotice (체결이 아니거나 형식이 잘못된 통보는 None)
+def _to_execution_notice(notice: dict, today: str):
+    if notice.get("exec_type") != "1":
+        return None
+    try:
+        order_no = str(notice["order_no"]).strip()
+        price = int(notice["price"])
+        qty = int(notice["qty"])
+        executed_at = datetime.strptime(today + str(notice["ts"]).zfill(6), "%Y%m%d%H%M%S")
+    except (KeyError, TypeError, ValueError) as e:
+        logger.warning(f"[EXEC] 체결 통보 형식 오류 → 건너뜀 {notice}: {e}")
+        return None
+
+    if not order_no or qty <= 0 or price <= 0:
+        logger.warning(f"[EXEC] 체결 통보 값 오류 → 건너뜀 {notice}")
+        return None
+    return ExecutionNotice(order_no=order_no, executed_price=price, executed_quantity=qty, executed_at=executed_at)
+
+
+## 실시간 체결 통보(H0STCNI0) 일괄 저장
+def save_execution_notices(notices: list) -> tuple[int, list]:
+    """
+    WebSocket 체결 통보 묶음을 한 번에 DB 반영
+    - 체결(exec_type=1) 건만 처리, 정정/취소는 무시
+    - 통보는 1건씩 검증 후 execution_notice 에 저장 (형식 오류 통보만 건너뜀)
+    - 주문번호별 누적 통보로 매도 체결 기록 갱신 (match_execution_notices)
+    반환: (갱신 건수, 체결 기록이 아직 없는 주문번호 목록 - 호출 측에서 재시도)
+    """
+    today = _exchange_date()
+    rows = [row for row in (_to_execution_notice(n, today) for n in notices) if row]
+    if not rows:
+        return 0, []
+
+    ExecutionNotice.objects.bulk_create(rows)
+    return match_execution_notices({row.order_no for row in rows})
+
+
+## 주문번호별 누적 체결 통보 → 매도 체결 기록 갱신
+def match_execution_notices(order_nos) -> tuple[int, list]:
+    """
+    - 부분 체결 통보를 모두 합산: 수량 = 합계, 체결가 = 수량 가중 평균, 체결 시간 = 마지막 통보
+    - 주문번호(kis_order_id)로 매도 체결 기록을 한 번에 조회 + 주문 상태 SELL_DONE
+    - 체결 기록이 없는 주문의 통보는 matched=False 로 남는다
+    반환: (갱신 건수, 체결 기록이 아직 없는 주문번호 목록)
+    """
+    order_nos = set(order_nos)
+    if not order_nos:
+        return 0, []
+
+    executions = list(OrderExecution.objects.filter(kis_order_id__in=order_nos, executed_side="SELL"))
+    matched = {execution.kis_order_id for execution in executions}
+
+    # auto_order 의 save_execution_data 가 체결 기록을 만들기 전에 통보가 먼저 올 수 있음
+    missing = sorted(order_nos - matched)
+    for order_no in missing:
+        logger.warning(f"[EXEC] 주문번호 {order_no} 에 해당하는 매도 체결 기록 없음 → 재시도 대상")
+
+    if not executions:
+        return 0, missing
+
+    totals = {
+        row["order_no"]: row
+        for row in (ExecutionNotice.objects
+                    .filter(order_no__in=matched)
+                    .values("order_no")
+                    .annotate(quantity=Sum("executed_quantity"),
+                              amount=Sum(F("executed_price") * F("executed_quantity")),
+                              last_at=Max("executed_at")))
+    }
+
+    for execution in executions:
+        total = totals[execution.kis_order_id]
+        execution.executed_quantity = total["quantity"]
+        execution.executed_price = round(total["amount"] / total["quantity"])
+        execution.executed_at = total["last_at"]
+
+    order_ids = {execution.order_request_id for execution in executions}
+    with transaction.atomic():
+        OrderExecution.objects.bulk_update(executions, ["executed_price", "executed_quantity", "executed_at"])
+        OrderRequest.objects.filter(id__in=order_ids).update(status="SELL_DONE", updated_at=timezone.now())
+        ExecutionNotice.objects.filter(order_no__in=matched, matched=False).update(matched=True)
+    logger.info(f"[EXEC] SELL_DONE 업데이트 완료 → 주문 {len(order_ids)}건")
+
+    return len(executions), missing
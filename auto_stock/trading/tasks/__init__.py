@@ -1,3 +1,4 @@
 from .auto_order import *
 from .debug import *
-from .auto_re_order import *
\ No newline at end of file
+from .auto_re_order import *
+from .execution_notice import *
\ No newline at end of file
@@ -4,6 +4,7 @@ from celery import chain
 
 from auto_stock.celery import app
 from trading.models import OrderRequest, OrderExecution
+from trading.constants.trading_status import OPEN_POSITION_STATUS
 from kis.websocket.trading_ws import order_sell, order_cancel
 from trading.tasks.auto_order import auto_order
 from trading.services.save_order_execution import save_execution_data
@@ -60,7 +61,7 @@ def retry_unfilled_buys():
 @app.task
 def retry_unfilled_sells():
     # 미체결 매도건 DB 조회
-    orders = (OrderRequest.objects.filter(status__in=["BUY_DONE", "SELL_PENDING", "SELL_REQUEST_FAILED"]))
+    orders = (OrderRequest.objects.filter(status__in=OPEN_POSITION_STATUS))
     today = timezone.now().date()
 
     for order in orders:
@@ -0,0 +1,40 @@
+import os, logging
+
+from auto_stock.celery import app
+from trading.services.save_order_execution import save_execution_notices, match_execution_notices
+
+logger = logging.getLogger(__name__)
+
+# 체결 기록이 아직 없는 통보 재시도 (auto_order 의 체결 조회 polling 완료 대기)
+EXEC_NOTICE_RETRY_DELAY = int(os.getenv("EXEC_NOTICE_RETRY_DELAY", "5"))  # 초
+EXEC_NOTICE_MAX_RETRIES = int(os.getenv("EXEC_NOTICE_MAX_RETRIES", "12"))
+
+
+## 체결 기록 없는 주문번호 → 지연 후 재매칭 (attempt: 이번이 몇 번째 재시도인지)
+# 통보는 이미 execution_notice 에 저장되어 있으므로 주문번호만 넘긴다
+def retry_unmatched_notices(order_nos: list, attempt: int = 1):
+    if not order_nos:
+        return
+    if attempt > EXEC_NOTICE_MAX_RETRIES:
+        logger.error(f"[EXEC] 체결 기록을 끝내 찾지 못한 주문 {len(order_nos)}건 → {list(order_nos)} "
+                     f"(execution_notice 에 matched=False 로 보관)")
+        return
+    match_unmatched_notices.apply_async((list(order_nos), attempt), countdown=EXEC_NOTICE_RETRY_DELAY)
+
+
+## 체결 통보 처리 (WebSocket 워커 큐 초과분)
+@app.task
+def process_execution_notices(notices):
+    saved, unmatched = save_execution_notices(notices)
+    logger.info(f"[EXEC] celery 체결 통보 처리 → 체결 기록 {saved}건 갱신")
+    retry_unmatched_notices(unmatched)
+    return saved
+
+
+## 저장된 통보 재매칭 (체결 기록 생성 대기)
+@app.task
+def match_unmatched_notices(order_nos, attempt=1):
+    saved, unmatched = match_execution_notices(order_nos)
+    logger.info(f"[EXEC] 체결 통보 재매칭 → {saved}/{len(order_nos)}건 (재시도 {attempt}회차)")
+    retry_unmatched_notices(unmatched, attempt + 1)
+    return saved
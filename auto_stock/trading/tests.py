@@ -1,3 +1,144 @@
-from django.test import TestCase
+from datetime import datetime
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, SimpleTestCase
+from rest_framework.test import APIRequestFactory
+
+from trading.models import OrderRequest, OrderExecution, ExecutionNotice
+from trading.services.save_order_execution import save_execution_notices, match_execution_notices
+from trading.services.open_positions import open_position_symbols
+from trading.tasks import execution_notice
+from trading.tasks.execution_notice import retry_unmatched_notices, match_unmatched_notices
+from trading.views import ManualBuyView, ManualSellView
+
+
+def _notice(order_no="0001", price="1000", qty="10", ts="093001", exec_type="1"):
+    return {"tr_key": "hts", "exec_type": exec_type, "order_no": order_no, "price": price, "qty": qty, "ts": ts}
+
+
+## 실시간 체결 통보 일괄 저장 / 매도 체결 기록 갱신
+@mock.patch("trading.services.save_order_execution._exchange_date", return_value="20261016")
+class SaveExecutionNoticesTest(TestCase):
+    def setUp(self):
+        self.order = OrderRequest.objects.create(symbol="005930", quantity=40, strategy="rsi", risk="low",
+                                                 status="SELL_PENDING")
+        self.execution = OrderExecution.objects.create(order_request=self.order, kis_order_id="0001",
+                                                       executed_side="SELL")
+
+    def test_partial_fills_are_summed(self, _):
+        saved, unmatched = save_execution_notices([
+            _notice(price="1000", qty="10", ts="093001"),
+            _notice(price="1100", qty="30", ts="093005"),
+            _notice(exec_type="2"),  # 정정/취소 무시
+        ])
+
+        self.assertEqual((saved, unmatched), (1, []))
+        self.execution.refresh_from_db()
+        self.assertEqual(self.execution.executed_quantity, 40)
+        self.assertEqual(self.execution.executed_price, 1075)  # (10×1000 + 30×1100) / 40
+        self.assertEqual(self.execution.executed_at, datetime(2026, 10, 16, 9, 30, 5))
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, "SELL_DONE")
+
+    def test_fills_accumulate_across_batches(self, _):
+        save_execution_notices([_notice(price="1000", qty="10", ts="093001")])
+        save_execution_notices([_notice(price="1200", qty="10", ts="100000")])
+
+        self.execution.refresh_from_db()
+        self.assertEqual((self.execution.executed_quantity, self.execution.executed_price), (20, 1100))
+        self.assertEqual(self.execution.executed_at, datetime(2026, 10, 16, 10, 0, 0))
+
+    def test_malformed_notice_does_not_drop_batch(self, _):
+        saved, unmatched = save_execution_notices([
+            _notice(price="abc"),
+            _notice(ts="99:99"),
+            {"exec_type": "1", "order_no": "0001"},
+            _notice(qty="0"),
+            _notice(price="1000", qty="5"),
+        ])
+
+        self.assertEqual((saved, unmatched), (1, []))
+        self.assertEqual(ExecutionNotice.objects.count(), 1)
+        self.execution.refresh_from_db()
+        self.assertEqual(self.execution.executed_quantity, 5)
+
+    def test_unmatched_notices_are_kept_and_matched_later(self, _):
+        saved, unmatched = save_execution_notices([_notice(order_no="0002", price="2000", qty="3")])
+
+        self.assertEqual((saved, unmatched), (0, ["0002"]))
+        self.assertTrue(ExecutionNotice.objects.filter(order_no="0002", matched=False).exists())
+
+        # 체결 기록이 나중에 생기면 저장된 통보로 갱신
+        execution = OrderExecution.objects.create(order_request=self.order, kis_order_id="0002", executed_side="SELL")
+        self.assertEqual(match_execution_notices(["0002"]), (1, []))
+        execution.refresh_from_db()
+        self.assertEqual((execution.executed_quantity, execution.executed_price), (3, 2000))
+        self.assertFalse(ExecutionNotice.objects.filter(order_no="0002", matched=False).exists())
+
+    def test_buy_execution_is_not_updated(self, _):
+        OrderExecution.objects.filter(pk=self.execution.pk).update(executed_side="BUY")
+        self.assertEqual(save_execution_notices([_notice()]), (0, ["0001"]))
+
+
+## 체결 기록 없는 통보 celery 재시도
+@mock.patch.object(execution_notice.match_unmatched_notices, "apply_async")
+class RetryUnmatchedNoticesTest(TestCase):
+    def test_schedules_retry_with_delay(self, apply_async):
+        retry_unmatched_notices(["0001"], attempt=3)
+        apply_async.assert_called_once_with((["0001"], 3), countdown=execution_notice.EXEC_NOTICE_RETRY_DELAY)
+
+    def test_stops_after_max_retries(self, apply_async):
+        retry_unmatched_notices(["0001"], attempt=execution_notice.EXEC_NOTICE_MAX_RETRIES + 1)
+        retry_unmatched_notices([])
+        apply_async.assert_not_called()
+
+    def test_task_reschedules_until_matched(self, apply_async):
+        order = OrderRequest.objects.create(symbol="005930", quantity=1, strategy="rsi", risk="low")
+        ExecutionNotice.objects.create(order_no="0003", executed_price=100, executed_quantity=1,
+                                       executed_at=datetime(2026, 10, 16, 9, 0, 0))
+
+        self.assertEqual(match_unmatched_notices(["0003"], attempt=1), 0)
+        apply_async.assert_called_once_with((["0003"], 2), countdown=execution_notice.EXEC_NOTICE_RETRY_DELAY)
+
+        apply_async.reset_mock()
+        OrderExecution.objects.create(order_request=order, kis_order_id="0003", executed_side="SELL")
+        self.assertEqual(match_unmatched_notices(["0003"], attempt=2), 1)
+        apply_async.assert_not_called()
+
+
+## 보유 종목 (실시간 구독 우선 전송 대상)
+class OpenPositionSymbolsTest(TestCase):
+    def test_only_held_orders(self):
+        for symbol, status in (("005930", "BUY_DONE"), ("000660", "SELL_PENDING"), ("035420", "SELL_REQUEST_FAILED"),
+                               ("051910", "BUY_PENDING"), ("068270", "SELL_DONE")):
+            OrderRequest.objects.create(symbol=symbol, quantity=1, strategy="rsi", risk="low", status=status)
+
+        self.assertEqual(open_position_symbols(), {"005930", "000660", "035420"})
+
+
+## 수동 주문 - 시장가 주문 전 호가 잔량 확인
+@mock.patch("trading.views.order_sell")
+@mock.patch("trading.views.order_buy")
+class ManualOrderDepthCheckTest(SimpleTestCase):
+    def post(self, view, **data):
+        request = APIRequestFactory().post("/api/trading/buy/", {"symbol": "005930", **data}, format="json")
+        return view.as_view()(request)
+
+    @mock.patch("trading.views.get_available_depth_qty", return_value=30)
+    def test_market_order_over_depth_rejected(self, depth_qty, order_buy, order_sell):
+        self.assertEqual(self.post(ManualBuyView, qty=31).status_code, 400)
+        self.assertEqual(self.post(ManualSellView, qty=31).status_code, 400)
+        order_buy.assert_not_called()
+        order_sell.assert_not_called()
+        self.assertEqual([c.args for c in depth_qty.call_args_list], [("005930", "BUY"), ("005930", "SELL")])
+
+        self.post(ManualBuyView, qty=30)
+        order_buy.assert_called_once_with("005930", 30, order_type="market")
+
+    @mock.patch("trading.views.get_available_depth_qty", return_value=None)
+    def test_unknown_depth_or_limit_order_not_checked(self, depth_qty, order_buy, order_sell):
+        self.post(ManualBuyView, qty=1000)  # 호가 정보 없음
+        self.post(ManualSellView, qty=1000, order_type="limit")
+        order_buy.assert_called_once()
+        order_sell.assert_called_once()
+        depth_qty.assert_called_once_with("005930", "BUY")
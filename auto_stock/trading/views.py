@@ -10,6 +10,7 @@ from trading.services.save_order_request import cancel_order_request
 
 from kis.websocket.trading_ws import order_sell, order_buy, order_cancel
 from kis.api.account import fetch_psbl_order, fetch_balance, fetch_recent_ccld
+from data.services.realtime_depth import get_available_depth_qty
 
 
 
@@ -128,6 +129,18 @@ class AutoOrderCreateView(APIView):
         return Response({"message": "주문 요청이 접수되었습니다."}, status=201)
 
 
+## 시장가 주문 전 호가 잔량 확인 (실시간 호가 캐시 - REST 호출 없음)
+# - 10단계 잔량 합보다 많은 수량은 여러 호가를 훑고도 남으므로 거절
+# - 호가 정보가 없으면 (depth 미구독 종목) 확인 없이 진행
+def check_depth_liquidity(symbol, qty, side, order_type):
+    if order_type != "market":
+        return None
+    available = get_available_depth_qty(symbol, side)
+    if available is not None and qty > available:
+        return Response({"error": f"호가 잔량 부족 (주문 {qty}주 / 잔량 {available}주)"}, status=400)
+    return None
+
+
 ## 수동 매수(buy)
 class ManualBuyView(APIView):
     def post(self, request):
@@ -138,6 +151,10 @@ class ManualBuyView(APIView):
         if not symbol or qty <= 0:
             return Response({"error": "symbol, qty 필요"}, status=400)
 
+        rejected = check_depth_liquidity(symbol, qty, "BUY", order_type)
+        if rejected:
+            return rejected
+
         result = order_buy(symbol, qty, order_type=order_type)
 
         return Response({
@@ -157,6 +174,10 @@ class ManualSellView(APIView):
         if not symbol or qty <= 0:
             return Response({"error": "symbol, qty 필요"}, status=400)
 
+        rejected = check_depth_liquidity(symbol, qty, "SELL", order_type)
+        if rejected:
+            return rejected
+
         result = order_sell(symbol, qty, order_type=order_type)
 
         return Response({